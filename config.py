@@ -1,4 +1,17 @@
 # config.py
+# Shared settings, persisted to SETTINGS_FILE on every change and loaded
+# once at startup (load()). Recipients and schedules live in jobstore.
+import json
+import threading
+
+import storage
+
+# Lives next to the Reports folder: ~/Documents/FilePulse/settings.json
+SETTINGS_FILE = storage.APP_DIR.parent / "settings.json"
+
+_save_lock = threading.Lock()
+_loading = False
+
 # Shared thresholds (in days). Default example: Green=3, Amber=14, Red=30.
 _green_days = 3
 _amber_days = 14
@@ -6,12 +19,33 @@ _red_days = 30
 
 _callbacks = []  # functions to notify when thresholds change
 
+# Folders tracked on the Analysis tab, in the order they were added
+_folders = []
+
+# Archive retention (0 = rule disabled). See storage.apply_retention().
+_retention = {
+    "keep_last": 0,            # keep only the newest N reports (0 = no limit)
+    "max_age_days": 0,         # delete reports older than this
+    "thin_after_days": 0,      # older than this: keep one report per bucket ...
+    "thin_every": "day",       # ... "day" or "week"
+    "compress_after_days": 0,  # gzip reports older than this
+}
+
+# Report email attachments. Reports over max_mb are handled per 'oversize':
+# "gzip" = attach them compressed if that fits, else send a summary only;
+# "summary" = send a summary only. See mailer.prepare_attachment().
+_attachment_limits = {
+    "max_mb": 10,
+    "oversize": "gzip",
+}
+
 def get_thresholds() -> tuple[int, int, int]:
     return _green_days, _amber_days, _red_days
 
 def set_thresholds(green: int, amber: int, red: int) -> None:
     global _green_days, _amber_days, _red_days
     _green_days, _amber_days, _red_days = int(green), int(amber), int(red)
+    _save()
     for fn in list(_callbacks):
         try:
             fn(_green_days, _amber_days, _red_days)
@@ -21,3 +55,102 @@ def set_thresholds(green: int, amber: int, red: int) -> None:
 def register_callback(fn) -> None:
     if callable(fn) and fn not in _callbacks:
         _callbacks.append(fn)
+
+
+def get_retention() -> dict:
+    return dict(_retention)
+
+def set_retention(**rules) -> None:
+    for key, val in rules.items():
+        if key not in _retention:
+            raise KeyError(f"Unknown retention rule: {key}")
+        if key == "thin_every":
+            if val not in ("day", "week"):
+                raise ValueError("thin_every must be 'day' or 'week'.")
+            _retention[key] = val
+        else:
+            if int(val) < 0:
+                raise ValueError("Retention values must be non-negative.")
+            _retention[key] = int(val)
+    _save()
+
+
+def get_attachment_limits() -> dict:
+    return dict(_attachment_limits)
+
+def set_attachment_limits(**rules) -> None:
+    for key, val in rules.items():
+        if key not in _attachment_limits:
+            raise KeyError(f"Unknown attachment setting: {key}")
+        if key == "oversize":
+            if val not in ("gzip", "summary"):
+                raise ValueError("oversize must be 'gzip' or 'summary'.")
+            _attachment_limits[key] = val
+        else:
+            if int(val) < 1:
+                raise ValueError("The attachment limit must be at least 1 MB.")
+            _attachment_limits[key] = int(val)
+    _save()
+
+
+def get_folders() -> list:
+    return list(_folders)
+
+def set_folders(folders: list) -> None:
+    _folders[:] = [str(f) for f in folders]
+    _save()
+
+
+# ---------------- persistence ----------------
+
+def load() -> None:
+    """Apply saved settings (call once at startup). Bad or missing entries keep their defaults."""
+    global _loading
+    try:
+        saved = json.loads(SETTINGS_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"Ignoring unreadable settings file: {e}")
+        return
+    _loading = True
+    try:
+        for key, apply in (
+            ("thresholds", _load_thresholds),
+            ("retention", lambda rules: set_retention(**rules)),
+            ("attachments", lambda rules: set_attachment_limits(**rules)),
+            ("folders", _load_folders),
+        ):
+            if key in saved:
+                try:
+                    apply(saved[key])
+                except Exception as e:
+                    print(f"Ignoring saved {key}: {e!r}")
+    finally:
+        _loading = False
+
+
+def _load_thresholds(values) -> None:
+    g, a, r = (int(v) for v in values)
+    if not 0 <= g <= a <= r:
+        raise ValueError(f"thresholds out of order: {values}")
+    set_thresholds(g, a, r)
+
+
+def _load_folders(folders) -> None:
+    if not isinstance(folders, list):
+        raise TypeError("folders must be a list")
+    set_folders(folders)
+
+
+def _save() -> None:
+    if _loading:
+        return
+    data = json.dumps({
+        "thresholds": list(get_thresholds()),
+        "retention": get_retention(),
+        "attachments": get_attachment_limits(),
+        "folders": get_folders(),
+    }, indent=1)
+    with _save_lock:
+        storage.atomic_write_text(SETTINGS_FILE, data)
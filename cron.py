@@ -0,0 +1,323 @@
+# cron.py
+# Schedule rules for the scheduler: cron expressions ("0 8 * * mon-fri")
+# and fixed intervals anchored at a start time (every N hours/days/months).
+# next_fire() jumps field by field (month -> day -> hour -> minute) or
+# computes the interval step directly, never walking minute by minute.
+# python cron.py runs randomized checks against a brute-force reference.
+from __future__ import annotations
+import bisect
+import calendar
+from datetime import datetime, timedelta
+from typing import List
+
+MAX_YEARS = 30   # an expression with no match within this many years never fires
+
+_MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+_DAY_NAMES = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+_MACROS = {
+    "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *", "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@hourly": "0 * * * *",
+}
+
+# Frequency names offered in the UI, in display order (see schedule_for)
+FREQUENCIES = (
+    "Hourly", "Daily", "Weekdays", "Every 2 days", "Every 3 days", "Weekly",
+    "Fortnightly", "Monthly", "Every 6 months", "Yearly",
+)
+
+
+# ---------------- cron expressions ----------------
+
+class CronExpr:
+    """
+    Standard 5-field cron: minute hour day-of-month month day-of-week.
+    Fields take *, lists, ranges, steps (*/15, 1-5/2) and names (jan, mon);
+    day-of-month also takes L (last day of the month). If both day fields
+    are restricted, a day matching either one fires (as in cron).
+    """
+
+    def __init__(self, expr: str) -> None:
+        self.expr = expr.strip()
+        fields = _MACROS.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: '{expr}'")
+        self.minutes = _parse(fields[0], 0, 59)
+        self.hours = _parse(fields[1], 0, 23)
+        self.last_day = False
+        dom_tokens = fields[2].split(",")
+        if "L" in (t.upper() for t in dom_tokens):
+            self.last_day = True
+            dom_tokens = [t for t in dom_tokens if t.upper() != "L"]
+        self.days = _parse(",".join(dom_tokens), 1, 31) if dom_tokens else []
+        self.months = _parse(fields[3], 1, 12, _MONTH_NAMES)
+        self.weekdays = sorted({d % 7 for d in _parse(fields[4], 0, 7, _DAY_NAMES)})
+        self._dom_any = fields[2].startswith("*")
+        self._dow_any = fields[4].startswith("*")
+        self._day_set, self._weekday_set = set(self.days), set(self.weekdays)
+
+    def __repr__(self) -> str:
+        return f"CronExpr({self.expr!r})"
+
+    def day_matches(self, year: int, month: int, day: int) -> bool:
+        dom = day in self._day_set or (self.last_day and day == calendar.monthrange(year, month)[1])
+        dow = (calendar.weekday(year, month, day) + 1) % 7 in self._weekday_set
+        if self._dom_any and self._dow_any:
+            return True
+        if self._dom_any:
+            return dow
+        if self._dow_any:
+            return dom
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return (dt.minute in self.minutes and dt.hour in self.hours and dt.month in self.months
+                and self.day_matches(dt.year, dt.month, dt.day))
+
+    def next_fire(self, after: datetime) -> datetime:
+        """First matching minute strictly after 'after'."""
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = t.year + MAX_YEARS
+        while t.year <= last_year:
+            if t.month not in self.months:
+                month = _next(self.months, t.month)
+                t = datetime(t.year, month, 1) if month is not None else datetime(t.year + 1, self.months[0], 1)
+                continue
+            if not self.day_matches(t.year, t.month, t.day):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            hour = _next(self.hours, t.hour)
+            if hour is None:
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            if hour != t.hour:
+                t = t.replace(hour=hour, minute=0)
+            minute = _next(self.minutes, t.minute)
+            if minute is None:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=minute)
+        raise ValueError(f"'{self.expr}' does not fire within {MAX_YEARS} years")
+
+
+def _next(values: List[int], current: int) -> int | None:
+    """Smallest value >= current, or None."""
+    i = bisect.bisect_left(values, current)
+    return values[i] if i < len(values) else None
+
+
+def _value(token: str, names: dict | None) -> int:
+    key = token.lower()
+    if names and key in names:
+        return names[key]
+    try:
+        return int(token)
+    except ValueError:
+        raise ValueError(f"Bad cron value '{token}'")
+
+
+def _parse(field: str, lo: int, hi: int, names: dict | None = None) -> List[int]:
+    values = set()
+    for part in field.split(","):
+        rng, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Bad cron step in '{part}'")
+        if rng == "*":
+            start, end = lo, hi
+        elif "-" in rng:
+            a, b = rng.split("-", 1)
+            start, end = _value(a, names), _value(b, names)
+        else:
+            start = _value(rng, names)
+            end = hi if part.count("/") else start
+        if not (lo <= start <= hi and lo <= end <= hi) or start > end:
+            raise ValueError(f"Cron field '{part}' outside {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+# ---------------- anchored intervals ----------------
+
+class Every:
+    """
+    Fires at start, start + step, start + 2*step, ... where step is hours,
+    days or months. Month steps count from 'start' and clamp to the end of
+    shorter months (the 31st -> Feb 28/29 -> Mar 31).
+    """
+
+    def __init__(self, start: datetime, hours: int = 0, days: int = 0, months: int = 0) -> None:
+        if sum(1 for n in (hours, days, months) if n) != 1 or min(hours, days, months) < 0:
+            raise ValueError("Every needs exactly one positive unit")
+        self.start = start.replace(second=0, microsecond=0)
+        self.months = months
+        self.step = timedelta(hours=hours, days=days)
+
+    def __repr__(self) -> str:
+        unit = f"months={self.months}" if self.months else f"step={self.step}"
+        return f"Every({self.start:%Y-%m-%d %H:%M}, {unit})"
+
+    def at(self, k: int) -> datetime:
+        """The k-th fire time (k = 0 is start)."""
+        if not self.months:
+            return self.start + k * self.step
+        month0 = self.start.month - 1 + k * self.months
+        year, month = self.start.year + month0 // 12, month0 % 12 + 1
+        return self.start.replace(year=year, month=month,
+                                  day=min(self.start.day, calendar.monthrange(year, month)[1]))
+
+    def next_fire(self, after: datetime) -> datetime:
+        """First fire time strictly after 'after'."""
+        if after < self.start:
+            return self.start
+        if self.months:
+            k = ((after.year - self.start.year) * 12 + after.month - self.start.month) // self.months
+        else:
+            k = int((after - self.start) // self.step)
+        while self.at(k) <= after:
+            k += 1
+        return self.at(k)
+
+
+def schedule_for(frequency: str, start: datetime):
+    """
+    Rule for a frequency name (FREQUENCIES) first due at 'start', or for a
+    cron expression. Raises ValueError for anything else.
+    """
+    start = start.replace(second=0, microsecond=0)
+    m, h = start.minute, start.hour
+    rules = {
+        "Hourly": lambda: Every(start, hours=1),
+        "Daily": lambda: CronExpr(f"{m} {h} * * *"),
+        "Weekdays": lambda: CronExpr(f"{m} {h} * * mon-fri"),
+        "Every 2 days": lambda: Every(start, days=2),
+        "Every 3 days": lambda: Every(start, days=3),
+        "Weekly": lambda: Every(start, days=7),
+        "Fortnightly": lambda: Every(start, days=14),
+        "Monthly": lambda: Every(start, months=1),
+        "Every 6 months": lambda: Every(start, months=6),
+        "Yearly": lambda: Every(start, months=12),
+    }
+    if frequency in rules:
+        return rules[frequency]()
+    if len(frequency.split()) == 1 and not frequency.startswith("@"):
+        raise ValueError(f"Unknown frequency '{frequency}' (use one of {', '.join(FREQUENCIES)} "
+                         f"or a cron expression)")
+    return CronExpr(frequency)
+
+
+def first_fire(rule, start: datetime, now: datetime) -> datetime:
+    """First run of a schedule: its start time, or the next fire after now if that has passed."""
+    start = start.replace(second=0, microsecond=0)
+    return rule.next_fire(max(start - timedelta(minutes=1), now))
+
+
+# ---------------- reference check ----------------
+
+def _brute_cron(expr: CronExpr, after: datetime) -> datetime | None:
+    """
+    Reference: walk day by day, then every minute of a matching day,
+    testing each parsed field itself -- shares no matching code (day
+    rules, weekday numbering, L) with CronExpr.
+    """
+    fields = _MACROS.get(expr.expr.lower(), expr.expr).split()
+    dom_any, dow_any = fields[2].startswith("*"), fields[4].startswith("*")
+    day = datetime(after.year, after.month, after.day)
+    for _ in range(366 * 8):
+        month_end = (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        dom = day.day in expr.days or (expr.last_day and day == month_end)
+        dow = day.isoweekday() % 7 in expr.weekdays
+        if dom_any or dow_any:
+            day_ok = (dom_any or dom) and (dow_any or dow)
+        else:
+            day_ok = dom or dow
+        if day.month in expr.months and day_ok:
+            t = day
+            while t.day == day.day:
+                if t > after and t.hour in expr.hours and t.minute in expr.minutes:
+                    return t
+                t += timedelta(minutes=1)
+        day += timedelta(days=1)
+    return None
+
+
+def _brute_every(rule: Every, after: datetime) -> datetime:
+    k = 0
+    while rule.at(k) <= after:
+        k += 1
+    return rule.at(k)
+
+
+def _random_field(rng, lo: int, hi: int) -> str:
+    kind = rng.random()
+    if kind < 0.3:
+        return "*"
+    if kind < 0.45:
+        return f"*/{rng.randint(2, max(2, (hi - lo) // 2))}"
+    if kind < 0.7:
+        return ",".join(str(v) for v in sorted(rng.sample(range(lo, hi + 1), rng.randint(1, 3))))
+    a = rng.randint(lo, hi)
+    b = rng.randint(a, hi)
+    return f"{a}-{b}" + (f"/{rng.randint(1, 3)}" if rng.random() < 0.3 else "")
+
+
+def _check(cases: int = 500, seed: int = 1) -> None:
+    """python cron.py [cases] [seed] -- next_fire() vs the brute-force reference."""
+    import random
+    import time
+    rng = random.Random(seed)
+    failures, fast_s, brute_s = 0, 0.0, 0.0
+    for _ in range(cases):
+        after = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 3 * 365 * 1440))
+        if rng.random() < 0.6:
+            dom = "L" if rng.random() < 0.1 else _random_field(rng, 1, 31)
+            rule = CronExpr(" ".join((_random_field(rng, 0, 59), _random_field(rng, 0, 23), dom,
+                                      _random_field(rng, 1, 12), _random_field(rng, 0, 6))))
+            brute = _brute_cron
+        else:
+            start = datetime(2023, 1, 1) + timedelta(minutes=rng.randint(0, 2 * 365 * 1440))
+            unit = rng.choice(("hours", "days", "months"))
+            rule = Every(start, **{unit: rng.choice((1, 2, 3, 6, 7, 12, 14))})
+            brute = _brute_every
+        t0 = time.perf_counter()
+        try:
+            got = rule.next_fire(after)
+        except ValueError:
+            got = None
+        fast_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        want = brute(rule, after)
+        brute_s += time.perf_counter() - t0
+        if got != want:
+            failures += 1
+            print(f"MISMATCH {rule} after {after}: got {got}, want {want}")
+    print(f"{cases} cases, {failures} mismatches; next_fire {fast_s * 1e6 / cases:.0f}us/case, "
+          f"reference {brute_s * 1e3 / cases:.1f}ms/case")
+
+    # fixed edge cases: (what, got, want)
+    monthly = schedule_for("Monthly", datetime(2025, 1, 31, 9, 0))
+    start = datetime(2020, 1, 1, 6, 15)
+    edge = [
+        ("monthly clamps to month end", [monthly.at(k).day for k in range(4)], [31, 28, 31, 30]),
+        ("yearly from Feb 29", schedule_for("Yearly", datetime(2024, 2, 29, 9, 0)).next_fire(datetime(2024, 3, 1)),
+         datetime(2025, 2, 28, 9, 0)),
+        ("weekdays skip the weekend", CronExpr("0 8 * * mon-fri").next_fire(datetime(2025, 6, 6, 8, 0)),
+         datetime(2025, 6, 9, 8, 0)),
+        ("L in a leap February", CronExpr("0 0 L 2 *").next_fire(datetime(2024, 1, 1)), datetime(2024, 2, 29)),
+        ("future anchor fires at its start",
+         schedule_for("Hourly", datetime(2030, 1, 1, 6, 15)).next_fire(datetime(2025, 1, 1)),
+         datetime(2030, 1, 1, 6, 15)),
+        ("past start resumes on the anchor's grid",
+         first_fire(schedule_for("Hourly", start), start, datetime(2025, 1, 1, 12, 30)),
+         datetime(2025, 1, 1, 13, 15)),
+    ]
+    bad = [f"{what}: got {got}, want {want}" for what, got, want in edge if got != want]
+    for line in bad:
+        print(f"EDGE CASE FAILED {line}")
+    if failures or bad:
+        raise SystemExit(1)
+    print("edge cases ok")
+
+
+if __name__ == "__main__":
+    import sys
+    _check(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,115 @@
+# digest.py
+# Change-only digests: compare a fresh scan with the previous one and keep
+# the folders worth telling someone about -- state changes (e.g. crossing
+# into red), significant growth/shrinkage, newly added folders.
+from __future__ import annotations
+import html
+from datetime import datetime
+from typing import Dict, List
+
+import report
+
+MIN_CHANGE_PCT = 10.0            # size change worth reporting, percent of the old size ...
+MIN_CHANGE_BYTES = 1024 * 1024   # ... and at least this many bytes
+
+_STATE_COLORS = {"green": "#16a34a", "amber": "#d97706", "red": "#dc2626"}
+
+
+def snapshot(rows: List[dict]) -> Dict[str, dict]:
+    """What a digest compares, per folder path (small enough to store)."""
+    return {
+        r["file_path"]: {
+            "name": r.get("file_name"),
+            "size": r.get("file_size"),
+            "state": r.get("file_state"),
+            "mtime": r.get("last_modified_ts"),
+        }
+        for r in rows
+    }
+
+
+def diff(previous: Dict[str, dict] | None, rows: List[dict],
+         min_pct: float = MIN_CHANGE_PCT, min_bytes: int = MIN_CHANGE_BYTES) -> List[dict]:
+    """
+    Folders that changed since 'previous' (a snapshot()), worst first.
+    Each: {"folder", "name", "reasons", "old_state", "new_state",
+           "old_size", "new_size", "row"}. reasons from: new, red, state,
+    grew, shrank. With no previous snapshot every folder counts as new.
+    """
+    previous = previous or {}
+    changes = []
+    for r in rows:
+        old = previous.get(r["file_path"])
+        new_state, new_size = r.get("file_state"), r.get("file_size")
+        reasons = []
+        if old is None:
+            reasons.append("new")
+        else:
+            if new_state != old.get("state"):
+                reasons.append("red" if new_state == "red" else "state")
+            old_size = old.get("size")
+            if isinstance(old_size, int) and isinstance(new_size, int):
+                delta = new_size - old_size
+                pct = abs(delta) * 100.0 / old_size if old_size else float("inf")
+                if abs(delta) >= min_bytes and pct >= min_pct:
+                    reasons.append("grew" if delta > 0 else "shrank")
+        if reasons:
+            changes.append({
+                "folder": r["file_path"],
+                "name": r.get("file_name") or r["file_path"],
+                "reasons": reasons,
+                "old_state": old.get("state") if old else None,
+                "new_state": new_state,
+                "old_size": old.get("size") if old else None,
+                "new_size": new_size,
+                "row": r,
+            })
+    rank = {"red": 0, "state": 1, "grew": 2, "shrank": 3, "new": 4}
+    changes.sort(key=lambda c: min(rank[x] for x in c["reasons"]))
+    return changes
+
+
+def _describe(c: dict) -> str:
+    parts = []
+    for reason in c["reasons"]:
+        if reason == "new":
+            parts.append("newly tracked")
+        elif reason in ("red", "state"):
+            parts.append(f"{c['old_state']} &rarr; {c['new_state']}")
+        else:
+            parts.append(f"{reason} {report.human_size(c['old_size'])} &rarr; "
+                         f"{report.human_size(c['new_size'])}")
+    return "; ".join(parts)
+
+
+def render_html(changes: List[dict], title: str, attached: bool = False) -> str:
+    """Compact email body listing the changed folders."""
+    rows = []
+    for c in changes:
+        color = _STATE_COLORS.get(c["new_state"], "#6b7280")
+        rows.append(
+            "<tr>"
+            f"<td style=\"padding:4px 8px;\"><span style=\"color:{color};\">&#9679;</span> "
+            f"{html.escape(c['name'])}</td>"
+            f"<td style=\"padding:4px 8px;\">{_describe(c)}</td>"
+            f"<td style=\"padding:4px 8px;text-align:right;\">{report.human_size(c['new_size'])}</td>"
+            "</tr>"
+        )
+    return """
+    <html>
+    <body style="font-family: Arial, sans-serif; padding: 20px;">
+        <h2 style="color: #2563eb;">FilePulse - Changes in {}</h2>
+        <p>{} folder(s) changed since the last digest.</p>
+        <table style="border-collapse: collapse; font-size: 13px;">{}</table>
+        <p>{}</p>
+        <hr style="margin: 20px 0;">
+        <p style="color: #666; font-size: 12px;">Automated digest from FilePulse &middot; {}</p>
+    </body>
+    </html>
+    """.format(
+        html.escape(title),
+        len(changes),
+        "".join(rows),
+        "The full report is attached." if attached else "",
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
@@ -0,0 +1,194 @@
+# jobstore.py
+# Durable scheduler state: shared recipients, schedule definitions (with
+# next/last successful run), the scan each digest schedule last
+# reported and an outbox of emails not yet delivered. One JSON file,
+# rewritten atomically after every change, so a restart (or crash)
+# loses neither schedules nor pending sends.
+from __future__ import annotations
+import json
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+import storage
+
+# Lives next to the Reports folder: ~/Documents/FilePulse/scheduler.json
+STORE_FILE = storage.APP_DIR.parent / "scheduler.json"
+
+OUTBOX_MAX_ATTEMPTS = 5    # failed replays before a send is given up
+
+# Outbox entries being sent are marked with the sending process's SESSION,
+# so a replay never picks up a send that is still in flight. A mark left by
+# an earlier session means that run died mid-send: fair game.
+SESSION = uuid.uuid4().hex
+
+_lock = threading.Lock()
+_state: Dict | None = None
+
+
+def _load() -> Dict:
+    global _state
+    if _state is None:
+        try:
+            _state = json.loads(STORE_FILE.read_text(encoding="utf-8"))
+        except Exception:
+            _state = {}
+        _state.setdefault("recipients", [])
+        _state.setdefault("schedules", {})
+        _state.setdefault("scans", {})
+        _state.setdefault("outbox", [])
+    return _state
+
+
+def _save() -> None:
+    storage.atomic_write_text(STORE_FILE, json.dumps(_state, indent=1))
+
+
+# ---------------- recipients & schedules ----------------
+
+def get_recipients() -> List[str]:
+    with _lock:
+        return list(_load()["recipients"])
+
+
+def set_recipients(emails: List[str]) -> None:
+    with _lock:
+        _load()["recipients"] = list(emails)
+        _save()
+
+
+def get_schedules() -> Dict[str, Dict]:
+    """name -> stored schedule (dates/times as ISO strings)."""
+    with _lock:
+        return json.loads(json.dumps(_load()["schedules"]))
+
+
+def put_schedule(name: str, record: Dict) -> None:
+    """Store (or replace) a schedule; keeps its last_success."""
+    with _lock:
+        schedules = _load()["schedules"]
+        old = schedules.get(name, {})
+        schedules[name] = {"last_success": old.get("last_success"), **record}
+        _save()
+
+
+def update_schedule(name: str, **fields) -> None:
+    with _lock:
+        rec = _load()["schedules"].get(name)
+        if rec is not None:
+            rec.update(fields)
+            _save()
+
+
+def delete_schedule(name: str) -> None:
+    with _lock:
+        state = _load()
+        found = state["schedules"].pop(name, None) is not None
+        found |= state["scans"].pop(name, None) is not None
+        if found:
+            _save()
+
+
+def get_scan(name: str) -> Dict | None:
+    """The digest.snapshot a digest schedule last reported, or None."""
+    with _lock:
+        scan = _load()["scans"].get(name)
+        return json.loads(json.dumps(scan)) if scan is not None else None
+
+
+def put_scan(name: str, snapshot: Dict) -> None:
+    """Make 'snapshot' the baseline of the schedule's next digest."""
+    with _lock:
+        _load()["scans"][name] = snapshot
+        _save()
+
+
+# ---------------- outbox ----------------
+
+def add_pending(entries: List[Dict]) -> List[str]:
+    """
+    Record sends about to be attempted (each: schedule, to, paths,
+    title; digests also carry subject + html, paths may be empty) and
+    return their ids, in order. Written before sending, so a crash
+    mid-send leaves them to be replayed. They are in flight (see
+    claim_pending) until resolve() or release().
+    """
+    now = time.time()
+    ids = []
+    with _lock:
+        box = _load()["outbox"]
+        for e in entries:
+            eid = uuid.uuid4().hex
+            box.append({**e, "id": eid, "created": now, "attempts": 0, "last_error": None,
+                        "sending": SESSION})
+            ids.append(eid)
+        _save()
+    return ids
+
+
+def resolve(ids: List[str], results: List[Dict]) -> List[Dict]:
+    """
+    Apply send results (mailer.send_all order matches 'ids'): delivered
+    entries leave the outbox, failed ones count an attempt and stay until
+    OUTBOX_MAX_ATTEMPTS. Returns the entries given up on.
+    """
+    outcome = dict(zip(ids, results))
+    dropped = []
+    with _lock:
+        keep = []
+        for e in _load()["outbox"]:
+            res = outcome.get(e["id"])
+            if res is None:
+                keep.append(e)
+            elif not res["ok"]:
+                e["attempts"] += 1
+                e["last_error"] = res["error"]
+                e["sending"] = None
+                (keep if e["attempts"] < OUTBOX_MAX_ATTEMPTS else dropped).append(e)
+        _state["outbox"] = keep
+        _save()
+    return dropped
+
+
+def release(ids: List[str], error: str) -> None:
+    """Give entries still in flight back unsent (the send itself blew up), for the next replay."""
+    gone = set(ids)
+    with _lock:
+        for e in _load()["outbox"]:
+            if e["id"] in gone and e.get("sending") == SESSION:
+                e["sending"], e["last_error"] = None, error
+        _save()
+
+
+def pending() -> List[Dict]:
+    with _lock:
+        return [dict(e) for e in _load()["outbox"]]
+
+
+def claim_pending() -> List[Dict]:
+    """
+    Entries not in flight in this session, marked as in flight for the
+    caller (a replay), which must resolve(), release() or drop() them.
+    """
+    with _lock:
+        claimed = [e for e in _load()["outbox"] if e.get("sending") != SESSION]
+        for e in claimed:
+            e["sending"] = SESSION
+        if claimed:
+            _save()
+        return [dict(e) for e in claimed]
+
+
+def pending_count() -> int:
+    with _lock:
+        return len(_load()["outbox"])
+
+
+def drop(ids: List[str]) -> None:
+    """Remove entries that can never be sent (e.g. report deleted)."""
+    gone = set(ids)
+    with _lock:
+        state = _load()
+        state["outbox"] = [e for e in state["outbox"] if e["id"] not in gone]
+        _save()
@@ -0,0 +1,505 @@
+# mailer.py
+# Email delivery: one message per recipient, sent through a pluggable
+# transport (Resend API, SMTP relay -- see smtp_transport.py -- or any
+# Resend-compatible HTTP endpoint) with bounded concurrency, exponential-
+# backoff retries and a result per recipient. StubServer + HttpTransport
+# let throughput and retry behaviour be measured offline (python mailer.py).
+#
+# The transport comes from the environment (.env): MAIL_TRANSPORT=resend
+# (default, RESEND_API_KEY), smtp (SMTP_HOST, SMTP_PORT, SMTP_USERNAME,
+# SMTP_PASSWORD, SMTP_SECURITY, SMTP_FROM -- defaults to SMTP_USERNAME if
+# that is an address) or http (MAIL_HTTP_URL).
+from __future__ import annotations
+import abc
+import base64
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+FROM_ADDRESS = "onboarding@resend.dev"
+
+MAX_WORKERS = 8        # concurrent sends per fan-out
+RETRIES = 3            # extra attempts after the first, for transient failures
+BACKOFF_S = 0.5        # first retry delay; doubles per attempt (+/- 50% jitter)
+BACKOFF_MAX_S = 30.0
+BATCH_MAX = 100        # messages per provider batch call
+
+ENCODE_CHUNK = 3 * 64 * 1024   # bytes read per step; a multiple of 3 so chunks encode independently
+PREPARED_KEEP = 2              # encoded attachments kept for reuse (recipients, replays)
+
+# HTTP statuses worth retrying: rate limited / server-side trouble
+_TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TransientError(Exception):
+    """Temporary failure (rate limit, 5xx, network) -- worth retrying."""
+
+
+# ---------------- transports ----------------
+
+class Transport(abc.ABC):
+    """
+    Delivers message dicts (from, to, subject, html, optional attachments)
+    and returns provider message ids. Raise TransientError for failures
+    that may succeed on retry; anything else is final.
+    """
+    name = "base"
+    supports_batch = False     # send_batch() used by send_all (no attachments)
+
+    @abc.abstractmethod
+    def send(self, message: Dict) -> str:
+        """Send one message; returns its provider id."""
+
+    @abc.abstractmethod
+    def send_batch(self, messages: List[Dict]) -> List[str]:
+        """Send several messages; returns their ids, in order."""
+
+    def close(self) -> None:
+        """Release held connections (pooled transports)."""
+
+
+def _batch_ids(resp) -> List[str]:
+    data = resp.get("data", []) if isinstance(resp, dict) else resp
+    return [d.get("id", "") for d in data or []]
+
+
+class ResendTransport(Transport):
+    """Resend API; the key (RESEND_API_KEY) is read on first use."""
+    name = "resend"
+    supports_batch = True
+
+    def __init__(self, api_key: str | None = None) -> None:
+        self.api_key = api_key
+
+    def _client(self):
+        import resend
+        if not self.api_key:
+            self.api_key = _env("RESEND_API_KEY")
+            if not self.api_key:
+                raise RuntimeError("RESEND_API_KEY is not set (add it to the .env file)")
+        resend.api_key = self.api_key
+        return resend
+
+    def send(self, message: Dict) -> str:
+        resend = self._client()
+        try:
+            return resend.Emails.send(message).get("id", "")
+        except Exception as e:
+            raise self._classify(e)
+
+    def send_batch(self, messages: List[Dict]) -> List[str]:
+        resend = self._client()
+        try:
+            return _batch_ids(resend.Batch.send(messages))
+        except Exception as e:
+            raise self._classify(e)
+
+    @staticmethod
+    def _classify(e: Exception) -> Exception:
+        from resend.exceptions import ResendError
+        if isinstance(e, ResendError):
+            try:
+                status = int(e.code)
+            except (TypeError, ValueError):
+                status = 0
+            return TransientError(str(e)) if status in _TRANSIENT_STATUS else e
+        if isinstance(e, (ValueError, TypeError)):
+            return e  # bad message, retrying won't help
+        return TransientError(str(e))  # network trouble
+
+
+class HttpTransport(Transport):
+    """POSTs messages as JSON to a Resend-compatible endpoint (e.g. StubServer)."""
+    name = "http"
+    supports_batch = True
+
+    def __init__(self, base_url: str, timeout: float = 10.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path: str, payload) -> Dict:
+        req = urllib.request.Request(
+            self.base_url + path, data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            msg = f"HTTP {e.code}: {e.read()[:200].decode('utf-8', 'replace')}"
+            raise TransientError(msg) if e.code in _TRANSIENT_STATUS else RuntimeError(msg)
+        except (urllib.error.URLError, OSError) as e:
+            raise TransientError(str(e))
+
+    def send(self, message: Dict) -> str:
+        return self._post("/emails", message).get("id", "")
+
+    def send_batch(self, messages: List[Dict]) -> List[str]:
+        return _batch_ids(self._post("/emails/batch", messages))
+
+
+TRANSPORTS = ("resend", "smtp", "http")
+
+_transport: Transport | None = None
+_transport_lock = threading.Lock()
+_env_loaded = False
+
+
+def _env(name: str, default: str = "") -> str:
+    """Setting from the environment, .env included (loaded once, on first use)."""
+    global _env_loaded
+    if not _env_loaded:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        _env_loaded = True
+    return os.getenv(name, default).strip()
+
+
+def transport_from_env() -> Transport:
+    """Build the transport named by MAIL_TRANSPORT (see the header for its settings)."""
+    kind = (_env("MAIL_TRANSPORT") or "resend").lower()
+    if kind == "resend":
+        return ResendTransport()
+    if kind == "smtp":
+        from smtp_transport import SmtpTransport
+        host = _env("SMTP_HOST")
+        if not host:
+            raise RuntimeError("MAIL_TRANSPORT=smtp needs SMTP_HOST")
+        username = _env("SMTP_USERNAME") or None
+        # a relay rejects (or fails SPF/DMARC on) the Resend onboarding sender
+        sender = _env("SMTP_FROM") or (username if username and "@" in username else None)
+        if not sender:
+            raise RuntimeError("MAIL_TRANSPORT=smtp needs SMTP_FROM (or an email address as SMTP_USERNAME)")
+        security = _env("SMTP_SECURITY") or "starttls"
+        default_port = {"ssl": "465", "none": "25"}.get(security, "587")
+        return SmtpTransport(host, int(_env("SMTP_PORT") or default_port),
+                             username=username, password=_env("SMTP_PASSWORD") or None,
+                             security=security, from_address=sender)
+    if kind == "http":
+        if not _env("MAIL_HTTP_URL"):
+            raise RuntimeError("MAIL_TRANSPORT=http needs MAIL_HTTP_URL")
+        return HttpTransport(_env("MAIL_HTTP_URL"))
+    raise RuntimeError(f"Unknown MAIL_TRANSPORT '{kind}' (one of {', '.join(TRANSPORTS)})")
+
+
+def get_transport() -> Transport:
+    """Transport used when send_all() is not given one (built once from the environment)."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = transport_from_env()
+        return _transport
+
+
+def set_transport(transport: Transport | None) -> None:
+    """Replace the default transport (None = rebuild from the environment on next use)."""
+    global _transport
+    with _transport_lock:
+        old, _transport = _transport, transport
+    if old is not None and old is not transport:
+        old.close()
+
+
+def close_transport() -> None:
+    """Close the default transport's idle connections (it reconnects on next use)."""
+    with _transport_lock:
+        transport = _transport
+    if transport is not None:
+        transport.close()
+
+
+# ---------------- fan-out ----------------
+
+def message_for(recipient: str, subject: str, html: str, attachments: List[Dict] | None = None) -> Dict:
+    msg = {"from": FROM_ADDRESS, "to": recipient, "subject": subject, "html": html}
+    if attachments:
+        msg["attachments"] = attachments
+    return msg
+
+
+# ---------------- attachments ----------------
+
+_prepared_lock = threading.Lock()
+_prepared: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+
+def prepare_attachment(path: str, max_bytes: int, oversize: str = "gzip") -> Dict:
+    """
+    'path' as an email attachment, within 'max_bytes':
+      {"attachments": [...] or None, "mode": "file" | "gzip" | "summary",
+       "filename", "size", "sent_size"}
+    Too big -> gzipped if oversize="gzip" and that fits, else summary-only
+    (attachments None). The file is read and compressed in chunks and never
+    held whole, so memory stays bounded by max_bytes whatever the report's
+    size. Results are cached per file version + limit: every recipient of a
+    run (and a replay of it) shares one encoded copy.
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns, max_bytes, oversize)
+    with _prepared_lock:
+        if key in _prepared:
+            _prepared.move_to_end(key)
+            return _prepared[key]
+
+    name = os.path.basename(path)
+    prepared = {"attachments": None, "mode": "summary", "filename": name,
+                "size": st.st_size, "sent_size": 0}
+    if st.st_size <= max_bytes:
+        with open(path, "rb") as f:
+            prepared.update(attachments=[{"filename": name, "content": _encode(f)}],
+                            mode="file", sent_size=st.st_size)
+    elif oversize == "gzip" and not name.lower().endswith(".gz"):
+        with tempfile.TemporaryFile() as tmp:
+            with open(path, "rb") as src, gzip.GzipFile(filename=name, mode="wb", fileobj=tmp) as gz:
+                shutil.copyfileobj(src, gz, ENCODE_CHUNK)
+            packed = tmp.tell()
+            if packed <= max_bytes:
+                tmp.seek(0)
+                prepared.update(attachments=[{"filename": name + ".gz", "content": _encode(tmp)}],
+                                mode="gzip", filename=name + ".gz", sent_size=packed)
+
+    with _prepared_lock:
+        _prepared[key] = prepared
+        while len(_prepared) > PREPARED_KEEP:
+            _prepared.popitem(last=False)
+    return prepared
+
+
+def _encode(f) -> str:
+    """Base64 of a file object, ENCODE_CHUNK bytes at a time."""
+    parts = []
+    while True:
+        chunk = f.read(ENCODE_CHUNK)
+        if not chunk:
+            break
+        parts.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(parts)
+
+
+def _backoff(attempt: int, backoff_s: float) -> float:
+    return min(BACKOFF_MAX_S, backoff_s * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5)
+
+
+def _with_retries(call, retries: int, backoff_s: float) -> tuple:
+    """Run call() until it succeeds or fails for good -> (value, error, attempts)."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return call(), None, attempt
+        except TransientError as e:
+            if attempt > retries:
+                return None, e, attempt
+            time.sleep(_backoff(attempt, backoff_s))
+        except Exception as e:
+            return None, e, attempt
+
+
+def _result(message: Dict, msg_id, error, attempts: int) -> Dict:
+    return {
+        "to": message["to"],
+        "ok": error is None,
+        "id": msg_id,
+        "error": None if error is None else str(error),
+        "attempts": attempts,
+    }
+
+
+def send_all(messages: List[Dict], transport: Transport | None = None, workers: int = MAX_WORKERS,
+             retries: int = RETRIES, backoff_s: float = BACKOFF_S) -> List[Dict]:
+    """
+    Deliver every message and return one result per message, in order:
+      {"to", "ok", "id", "error", "attempts"}
+    Uses the transport's batch call for messages without attachments,
+    else up to 'workers' concurrent single sends. Transient failures are
+    retried with exponential backoff; a batch that fails for good falls
+    back to single sends so each recipient gets its own result.
+    """
+    transport = transport or get_transport()
+    if not messages:
+        return []
+    results: List[Dict | None] = [None] * len(messages)
+
+    def send_one(i: int) -> None:
+        msg_id, error, attempts = _with_retries(lambda: transport.send(messages[i]), retries, backoff_s)
+        results[i] = _result(messages[i], msg_id, error, attempts)
+
+    def send_chunk(idx: List[int]) -> None:
+        chunk = [messages[i] for i in idx]
+        ids, error, attempts = _with_retries(lambda: transport.send_batch(chunk), retries, backoff_s)
+        if error is None and len(ids) == len(idx):
+            for i, msg_id in zip(idx, ids):
+                results[i] = _result(messages[i], msg_id, None, attempts)
+        else:
+            for i in idx:
+                send_one(i)
+
+    batchable = [i for i, m in enumerate(messages) if not m.get("attachments")]
+    chunks, singles = [], list(range(len(messages)))
+    if transport.supports_batch and len(batchable) > 1:
+        chunks = [batchable[k:k + BATCH_MAX] for k in range(0, len(batchable), BATCH_MAX)]
+        singles = [i for i, m in enumerate(messages) if m.get("attachments")]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(messages))),
+                            thread_name_prefix="mail") as pool:
+        futures = [pool.submit(send_chunk, c) for c in chunks]
+        futures += [pool.submit(send_one, i) for i in singles]
+        for f in futures:
+            f.result()
+    return results
+
+
+# ---------------- offline stub ----------------
+
+class StubServer:
+    """
+    Local Resend-compatible HTTP endpoint (/emails, /emails/batch) with
+    configurable latency and random transient failures (503/429).
+    Records every accepted message in .received.
+    """
+
+    def __init__(self, latency_s: float = 0.0, failure_rate: float = 0.0,
+                 port: int = 0, seed: int | None = None) -> None:
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.received: List[Dict] = []
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                time.sleep(stub.latency_s)
+                with stub._lock:
+                    stub.requests += 1
+                    fail = stub._rng.random() < stub.failure_rate
+                    if fail:
+                        stub.failures += 1
+                    elif self.path == "/emails/batch":
+                        stub.received.extend(body)
+                    elif self.path == "/emails":
+                        stub.received.append(body)
+                if fail:
+                    self._reply(stub._rng.choice((429, 503)), {"message": "try again"})
+                elif self.path == "/emails/batch":
+                    self._reply(200, {"data": [{"id": uuid.uuid4().hex} for _ in body]})
+                elif self.path == "/emails":
+                    self._reply(200, {"id": uuid.uuid4().hex})
+                else:
+                    self._reply(404, {"message": "not found"})
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mail-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ---------------- benchmark ----------------
+
+def _bench(n: int = 100, latency_s: float = 0.05, failure_rate: float = 0.1) -> None:
+    """python mailer.py [n] [latency_s] [failure_rate] -- fan-out strategies against StubServer."""
+    attachment = [{"filename": "report.pdf", "content": "JVBERi0xLjQK" * 100}]
+    with StubServer(latency_s=latency_s, failure_rate=failure_rate, seed=1) as stub:
+        transport = HttpTransport(stub.url)
+        runs = (
+            ("sequential", 1, attachment),
+            (f"pool x{MAX_WORKERS}", MAX_WORKERS, attachment),
+            ("batch", MAX_WORKERS, None),
+        )
+        for label, workers, att in runs:
+            msgs = [message_for(f"user{i}@example.com", "Bench", "<p>hi</p>", att) for i in range(n)]
+            before = stub.requests
+            t0 = time.perf_counter()
+            res = send_all(msgs, transport, workers=workers, backoff_s=0.01)
+            dt = time.perf_counter() - t0
+            ok = sum(r["ok"] for r in res)
+            retried = sum(r["attempts"] - 1 for r in res if r["attempts"] > 1)
+            print(f"{label:>12}: {n} messages in {dt:.2f}s ({n / dt:.0f}/s)  "
+                  f"ok={ok} failed={n - ok} retries={retried} requests={stub.requests - before}")
+
+
+def _bench_attachment(size_mb: int = 64, max_mb: int = 10) -> None:
+    """python mailer.py attach [size_mb] [max_mb] -- peak memory of preparing one report attachment."""
+    import tracemalloc
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.pdf")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(512 * 1024) + bytes(512 * 1024))  # compresses ~2:1
+
+        def whole_file():
+            with open(path, "rb") as f:
+                return base64.b64encode(f.read()).decode()
+
+        runs = (
+            ("whole file", whole_file),
+            ("prepared", lambda: prepare_attachment(path, max_mb * 1024 * 1024, "gzip")),
+            ("prepared (cached)", lambda: prepare_attachment(path, max_mb * 1024 * 1024, "gzip")),
+        )
+        for label, fn in runs:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            out = fn()
+            dt = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            mode = out["mode"] if isinstance(out, dict) else "file"
+            print(f"{label:>18}: {size_mb} MB report -> {mode:<7} in {dt:.2f}s, peak {peak / 2**20:.1f} MB")
+            del out
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["attach"]:
+        _bench_attachment(*(int(a) for a in sys.argv[2:4]))
+    else:
+        args = sys.argv[1:4]
+        _bench(*(f(a) for f, a in zip((int, float, float), args)))
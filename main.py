@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import tkinter as tk
 from tkinter import ttk
@@ -10,6 +11,9 @@ if sys.platform.startswith("win"):
     except Exception:
         pass
 
+import config
+import scheduler
+import storage
 from tab1 import TabOne
 from tab2 import TabTwo
 from tab3 import TabThree
@@ -21,7 +25,18 @@ class App(tk.Tk):
         self.title("Python Tabs App")
         self._set_default_size(900, 600)
         self._configure_style()
+        # Saved settings/folders and schedules/recipients first, so the tabs show them
+        config.load()
+        scheduler.restore()
         self._build_ui()
+        # Retention rules are applied off the UI thread
+        storage.start_compaction(config.get_retention)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self) -> None:
+        # Give scheduled jobs a few seconds to finish; cut-short sends stay in the outbox
+        scheduler.shutdown()
+        self.destroy()
 
     def _set_default_size(self, width: int, height: int) -> None:
         # Center the window
@@ -63,5 +78,7 @@ class App(tk.Tk):
 
 
 if __name__ == "__main__":
+    # Needed for the PDF export process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
@@ -0,0 +1,155 @@
+# pipeline.py
+# Headless report run, as used by scheduled jobs: rescan folders -> build
+# the report with the same layout code as the Analysis tab (report.py) ->
+# archive it -> send it. Needs no Tk window; every stage is timed.
+from __future__ import annotations
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import digest
+import report
+import report_cache
+import scan
+import storage
+
+_EXTENSIONS = {"pdf": ".pdf", "csv": ".csv", "jsonl": ".jsonl", "html": ".html"}
+
+
+def export(out_path: str, rows: List[dict], kind: str = "pdf", options: Dict | None = None) -> List[str]:
+    """Write the report in the given format; returns the file(s) written."""
+    if options and options.get("summary"):
+        report.export_summary_pdf(out_path, rows, top_n=options["top_n"], appendix=options["appendix"])
+    elif kind == "csv":
+        report.export_csv(out_path, rows)
+    elif kind == "jsonl":
+        report.export_jsonl(out_path, rows)
+    elif kind == "html":
+        report.export_html(out_path, rows)
+    elif len(rows) >= report.PARALLEL_MIN_ROWS:
+        # big PDFs render in parallel shards, which may come back as numbered parts
+        return report.export_pdf_sharded(out_path, rows)
+    else:
+        report.export_pdf(out_path, rows)
+    return [out_path]
+
+
+def report_filename(title: str, kind: str = "pdf", options: Dict | None = None) -> str:
+    ext = _EXTENSIONS.get(kind, ".pdf")
+    if kind == "html" and options and options.get("gzip"):
+        ext += ".gz"
+    return f"{title} {datetime.now():%Y-%m-%d %H%M}{ext}"
+
+
+def run(folders: List[str], kind: str = "pdf", options: Dict | None = None,
+        send: Callable[[List[str], str], list] | None = None) -> Dict:
+    """
+    One full run for 'folders'. send(paths, title) delivers the archived
+    report and returns per-recipient results (skipped if None).
+
+    Returns {"rows", "paths", "title", "reused", "send_results",
+             "timings": {"scan", "export", "archive", "send", "total"}} (seconds).
+    Identical rows + settings reuse the archived report (report_cache).
+    """
+    timings = {}
+    t_start = t = time.perf_counter()
+
+    rows = scan.scan_folders(folders, use_cache=False)  # emailed: no stale sizes
+    timings["scan"] = time.perf_counter() - t
+    if not rows:
+        raise ValueError("No folders to scan")
+    title = os.path.basename(rows[0].get("file_name") or "report")
+
+    paths, reused = _build(rows, folders, title, kind, options, timings)
+
+    send_results = []
+    t = time.perf_counter()
+    if send is not None:
+        send_results = send(paths, title)
+    timings["send"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - t_start
+
+    return {
+        "rows": len(rows),
+        "paths": paths,
+        "title": title,
+        "reused": reused,
+        "send_results": send_results,
+        "timings": timings,
+    }
+
+
+def run_digest(folders: List[str], previous: Dict | None,
+               send: Callable[[List[dict], List[str], str], list] | None = None,
+               attach: bool = False, min_pct: float = digest.MIN_CHANGE_PCT,
+               min_bytes: int = digest.MIN_CHANGE_BYTES) -> Dict:
+    """
+    Change-only run: rescan, diff against 'previous' (the digest.snapshot
+    stored after the last digest went out). If nothing changed nothing is
+    built or sent. Otherwise send(changes, paths, title) is called, with
+    paths = the archived full report when attach=True, else [].
+
+    Returns {"rows", "changes", "snapshot", "paths", "title", "reused",
+             "send_results", "timings"}.
+    """
+    timings = {}
+    t_start = t = time.perf_counter()
+    rows = scan.scan_folders(folders, use_cache=False)  # emailed: no stale sizes
+    if not rows:
+        raise ValueError("No folders to scan")
+    title = os.path.basename(rows[0].get("file_name") or "report")
+    changes = digest.diff(previous, rows, min_pct=min_pct, min_bytes=min_bytes)
+    timings["scan"] = time.perf_counter() - t
+
+    paths, reused, send_results = [], False, []
+    timings["export"] = timings["archive"] = timings["send"] = 0.0
+    if changes:
+        if attach:
+            paths, reused = _build(rows, folders, title, "pdf", None, timings)
+        t = time.perf_counter()
+        if send is not None:
+            send_results = send(changes, paths, title)
+        timings["send"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - t_start
+
+    return {
+        "rows": len(rows),
+        "changes": changes,
+        "snapshot": digest.snapshot(rows),
+        "paths": paths,
+        "title": title,
+        "reused": reused,
+        "send_results": send_results,
+        "timings": timings,
+    }
+
+
+def _build(rows: List[dict], folders: List[str], title: str, kind: str,
+           options: Dict | None, timings: Dict) -> tuple[List[str], bool]:
+    """Export + archive (or reuse an identical archived report) -> (paths, reused)."""
+    t = time.perf_counter()
+    key = report_cache.report_key(rows, kind, options)
+    paths = report_cache.lookup(key)
+    timings["export"] = timings["archive"] = 0.0
+    if paths is not None:
+        timings["export"] = time.perf_counter() - t  # cache lookup only
+        return paths, True
+
+    # build next to the archive so handing the files over is a rename
+    storage.ensure_repo()
+    with tempfile.TemporaryDirectory(prefix="run-", dir=str(storage.META_DIR)) as tmp:
+        written = export(os.path.join(tmp, report_filename(title, kind, options)), rows, kind, options)
+        timings["export"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        paths = [storage.save_report_copy(p, title_hint=title, move=True, folders=folders)
+                 for p in written]
+        report_cache.remember(key, paths)
+        timings["archive"] = time.perf_counter() - t
+    return paths, False
+
+
+def format_timings(timings: Dict) -> str:
+    return "  ".join(f"{stage} {secs:.2f}s" for stage, secs in timings.items())
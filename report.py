@@ -0,0 +1,731 @@
+# report.py
+# Report layout and exporters. No Tk imports here, so this module is safe to
+# load inside worker processes and background threads.
+from __future__ import annotations
+import csv
+import gzip
+import heapq
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Optional: merge shard PDFs into one file (pip install pypdf)
+try:
+    from pypdf import PdfWriter
+    _MERGE_AVAILABLE = True
+except Exception:
+    _MERGE_AVAILABLE = False
+
+HEADERS = [
+    "File path",
+    "File size",
+    "Last modified",
+    "Last worked on by",
+    "File name",
+    "File neglect time",
+    "File state",
+]
+# Column proportions (sum = 1.00): path,size,modified,worked,name,neglect,state
+REL = [0.30, 0.08, 0.13, 0.13, 0.18, 0.12, 0.06]
+LINE_H = 6.0
+
+# Below this many rows the process pool costs more than it saves
+PARALLEL_MIN_ROWS = 2000
+
+
+# ---------------- helpers ----------------
+
+def sanitize(s) -> str:
+    if s is None: return ""
+    s = str(s).replace("—","-").replace("–","-").replace("•","*")
+    return s.encode("ascii","ignore").decode("ascii")
+
+
+def human_size(n) -> str:
+    if n in (None, "", "—"):
+        return "-"
+    try: n = int(n)
+    except Exception: return "-"
+    units = ["B","KB","MB","GB","TB"]; i = 0; f = float(n)
+    while f >= 1024 and i < len(units)-1:
+        f /= 1024.0; i += 1
+    return f"{f:.1f} {units[i]}"
+
+
+def row_values(r: dict) -> list:
+    """Map a preview row onto the 7 PDF columns (same order as HEADERS)."""
+    return [
+        r.get("file_path", ""),
+        human_size(r.get("file_size", None)),
+        r.get("last_modified", ""),
+        r.get("last_worked_by", "—"),
+        r.get("file_name", ""),
+        r.get("file_neglect_time", "—"),
+        r.get("file_state", ""),  # color key only
+    ]
+
+
+# ---------------- PDF layout ----------------
+
+class PdfLayout:
+    """
+    Vector PDF table (fpdf2):
+    - No MultiCell; manual wrap with explicit (x,y) drawing to prevent overlaps.
+    - Two-pass per header & row: measure -> draw borders -> paint text.
+    - 'File state' as a color badge (no text).
+
+    Pagination depends only on row heights, so a shard of rows rendered by
+    another process produces exactly the same pages as the serial export.
+    """
+    def __init__(self) -> None:
+        from fpdf import FPDF  # pip install fpdf2
+
+        pdf = FPDF(orientation="L", unit="mm", format="A4")
+        pdf.set_margins(10, 12, 10)
+        pdf.set_auto_page_break(auto=True, margin=12)
+        self.pdf = pdf
+        printable_w = pdf.w - pdf.l_margin - pdf.r_margin
+        self.col_w = [printable_w * r for r in REL]
+        self._header_h = None
+        self._break_pending = False  # last row passed page_limit
+
+    # -------- geometry (shared with the shard planner) --------
+    @property
+    def page_top(self) -> float:
+        return self.pdf.t_margin
+
+    @property
+    def page_limit(self) -> float:
+        """A new page starts once the cursor passes this y."""
+        return self.pdf.h - self.pdf.b_margin - 12
+
+    @property
+    def page_bottom(self) -> float:
+        """Rows must not cross this y (fpdf's auto page break trigger)."""
+        return self.pdf.h - self.pdf.b_margin
+
+    # -------- measuring --------
+    def wrap_lines(self, text: str, width: float, *, font_bold=False) -> list[str]:
+        """Return a list of wrapped lines that fit within 'width' without drawing."""
+        pdf = self.pdf
+        text = sanitize(text)
+        pdf.set_font("Helvetica", style=("B" if font_bold else ""), size=(11 if font_bold else 10))
+        if not text:
+            return [""]
+        lines = []
+        cur = ""
+        cur_w = 0.0
+        max_w = max(1e-3, width)
+
+        for ch in text:
+            if ch == "\n":
+                lines.append(cur); cur = ""; cur_w = 0.0
+                continue
+            w = pdf.get_string_width(ch)
+            if cur_w + w > max_w and cur:
+                lines.append(cur)
+                cur, cur_w = ch, w
+            else:
+                cur += ch; cur_w += w
+        lines.append(cur)
+        return lines
+
+    def measure_block_height(self, text, w, *, font_bold=False) -> float:
+        """Height needed to draw 'text' in width 'w' using our manual wrapping."""
+        lines = self.wrap_lines(text, w, font_bold=font_bold)
+        return max(LINE_H, len(lines) * LINE_H)
+
+    def header_height(self) -> float:
+        if self._header_h is None:
+            self._header_h = max(self.measure_block_height(h, self.col_w[i], font_bold=True)
+                                 for i, h in enumerate(HEADERS))
+        return self._header_h
+
+    def row_height(self, vals: list) -> float:
+        # wrap path & name; others single line
+        vals = [sanitize(v) for v in vals]
+        return max(
+            self.measure_block_height(vals[0], self.col_w[0]),  # path
+            self.measure_block_height(vals[4], self.col_w[4]),  # name
+            LINE_H,
+        )
+
+    # -------- drawing --------
+    def draw_text_block(self, x, y, w, h, text, *, font_bold=False, align="L"):
+        """Draw wrapped text inside a box (x,y,w,h) without borders."""
+        pdf = self.pdf
+        lines = self.wrap_lines(text, w, font_bold=font_bold)
+        pdf.set_font("Helvetica", style=("B" if font_bold else ""), size=(11 if font_bold else 10))
+        for i, line in enumerate(lines):
+            yy = y + i*LINE_H
+            if yy + LINE_H > y + h:  # avoid drawing outside the cell
+                break
+            pdf.set_xy(x, yy)
+            pdf.cell(w, LINE_H, line, border=0, align=align)
+
+    def draw_state_badge(self, x, y, w, h, state):
+        pdf = self.pdf
+        s = (state or "").lower()
+        if s == "green": pdf.set_fill_color(16,185,129)   # #10B981
+        elif s == "amber": pdf.set_fill_color(245,158,11) # #F59E0B
+        elif s == "red": pdf.set_fill_color(239,68,68)    # #EF4444
+        else: pdf.set_fill_color(229,231,235)             # neutral
+        # outer border
+        pdf.rect(x, y, w, h, style="D")
+        # inner fill
+        inset = 1.2
+        pdf.rect(x+inset, y+inset, max(0.1, w-2*inset), max(0.1, h-2*inset), style="F")
+
+    def add_page(self, header: bool = True) -> None:
+        self.pdf.add_page()
+        self._break_pending = False
+        if header:
+            self.add_header()
+
+    # -------- free text & small tables (summary report) --------
+    def add_heading(self, text: str, *, size: int = 13, gap: float = 2.0) -> None:
+        """Bold one-line heading at the left margin; starts a page if needed."""
+        pdf = self.pdf
+        h = size * 0.6
+        if pdf.get_y() + h + gap > self.page_limit:
+            self.add_page(header=False)
+        pdf.set_font("Helvetica", style="B", size=size)
+        pdf.set_xy(pdf.l_margin, pdf.get_y() + gap)
+        pdf.cell(0, h, sanitize(text), border=0, align="L")
+        pdf.set_xy(pdf.l_margin, pdf.get_y() + h + 1)
+        pdf.set_font("Helvetica", size=10)
+
+    def add_text(self, text: str) -> None:
+        pdf = self.pdf
+        pdf.set_font("Helvetica", size=10)
+        pdf.set_x(pdf.l_margin)
+        pdf.cell(0, LINE_H, sanitize(text), border=0, align="L")
+        pdf.set_xy(pdf.l_margin, pdf.get_y() + LINE_H)
+
+    def add_grid(self, headers: list[str], rows: list[list], widths: list[float]) -> None:
+        """Single-line bordered grid (no wrapping); widths are in mm."""
+        pdf = self.pdf
+        for i, vals in enumerate([headers] + rows):
+            if pdf.get_y() + LINE_H > self.page_bottom:
+                self.add_page(header=False)
+            pdf.set_font("Helvetica", style=("B" if i == 0 else ""), size=10)
+            pdf.set_x(pdf.l_margin)
+            y0 = pdf.get_y()
+            for j, (v, w) in enumerate(zip(vals, widths)):
+                pdf.cell(w, LINE_H, sanitize(v), border=1, align=("L" if j == 0 else "R"))
+            pdf.set_xy(pdf.l_margin, y0 + LINE_H)
+        pdf.set_font("Helvetica", size=10)
+
+    def start_table(self) -> None:
+        """Begin a 7-column table below the cursor (new page if no room)."""
+        pdf = self.pdf
+        if pdf.get_y() + self.header_height() + 2 * LINE_H > self.page_bottom:
+            self.add_page()
+        else:
+            pdf.set_x(pdf.l_margin)
+            self.add_header()
+        self._break_pending = False
+
+    # -------- header (measure -> border -> text) --------
+    def add_header(self) -> None:
+        pdf, col_w = self.pdf, self.col_w
+        x0, y0 = pdf.get_x(), pdf.get_y()
+        row_h = self.header_height()
+        # borders
+        x = x0
+        for w in col_w:
+            pdf.rect(x, y0, w, row_h)
+            x += w
+        # text
+        x = x0
+        for i, htxt in enumerate(HEADERS):
+            self.draw_text_block(x, y0, col_w[i], row_h, htxt, font_bold=True, align="L")
+            x += col_w[i]
+        # move
+        pdf.set_xy(x0, y0 + row_h)
+        pdf.set_font("Helvetica", size=10)
+
+    # -------- row (measure -> border -> text) --------
+    def add_row(self, vals: list) -> None:
+        pdf, col_w = self.pdf, self.col_w
+        vals = [sanitize(v) for v in vals]
+        row_h = self.row_height(vals)
+
+        # new page if the previous row filled this one, or if this row would
+        # cross the bottom margin (unless it already sits right under a header)
+        y = pdf.get_y()
+        if self._break_pending or (y + row_h > self.page_bottom and y > self.page_top + self.header_height()):
+            self.add_page()
+        x0, y0 = pdf.get_x(), pdf.get_y()
+
+        # borders for full row
+        x = x0
+        for w in col_w:
+            pdf.rect(x, y0, w, row_h)
+            x += w
+
+        # text cells
+        x = x0
+        self.draw_text_block(x, y0, col_w[0], row_h, vals[0]); x += col_w[0]              # path
+        pdf.set_xy(x, y0); pdf.cell(col_w[1], LINE_H, vals[1], 0, 0, "R"); x += col_w[1]  # size
+        pdf.set_xy(x, y0); pdf.cell(col_w[2], LINE_H, vals[2], 0, 0, "L"); x += col_w[2]  # modified
+        pdf.set_xy(x, y0); pdf.cell(col_w[3], LINE_H, vals[3], 0, 0, "L"); x += col_w[3]  # worked by
+        self.draw_text_block(x, y0, col_w[4], row_h, vals[4]); x += col_w[4]                  # name
+        pdf.set_xy(x, y0); pdf.cell(col_w[5], LINE_H, vals[5], 0, 0, "L");                     # neglect
+        # state badge
+        self.draw_state_badge(x + col_w[5], y0, col_w[6], row_h, vals[6])
+
+        # advance
+        pdf.set_xy(x0, y0 + row_h)
+        self._break_pending = pdf.get_y() > self.page_limit
+
+    def output(self, out_path: str) -> None:
+        self.pdf.output(out_path)
+
+
+def export_pdf(out_path: str, rows: list[dict]) -> None:
+    """Serial vector PDF export: one header per page, all rows in order."""
+    layout = PdfLayout()
+    layout.add_page()
+    for r in rows:
+        layout.add_row(row_values(r))
+    layout.output(out_path)
+
+
+# ---------------- sharded PDF export ----------------
+
+def _measure_rows(chunk: list[list]) -> list[float]:
+    """Worker: row heights for a chunk of row values."""
+    layout = PdfLayout()
+    return [layout.row_height(vals) for vals in chunk]
+
+
+def _render_shard(out_path: str, chunk: list[list]) -> str:
+    """Worker: render a contiguous run of whole pages into its own PDF."""
+    layout = PdfLayout()
+    layout.add_page()
+    for vals in chunk:
+        layout.add_row(vals)
+    layout.output(out_path)
+    return out_path
+
+
+def _plan_pages(heights: list[float]) -> list[int]:
+    """
+    Replay add_row's pagination on measured heights only.
+    Returns the index of the first row of every page.
+    """
+    layout = PdfLayout()
+    top = layout.page_top + layout.header_height()
+    starts = [0]
+    y = top
+    pending = False
+    for i, row_h in enumerate(heights):
+        if pending or (y + row_h > layout.page_bottom and y > top):
+            starts.append(i)
+            y = top
+        y += row_h
+        pending = y > layout.page_limit
+    return starts
+
+
+def _chunks(seq: list, n: int) -> list[list]:
+    size = max(1, -(-len(seq) // n))
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+def part_path(out_path: str, part: int, total: int) -> str:
+    p = Path(out_path)
+    return str(p.with_name(f"{p.stem} (part {part} of {total}){p.suffix}"))
+
+
+def export_pdf_sharded(out_path: str, rows: list[dict], workers: int | None = None,
+                       multipart: bool = False) -> list[str]:
+    """
+    Parallel PDF export for very large reports.
+
+    Rows are measured in a process pool, split on page boundaries into
+    contiguous shards, and every shard is rendered by its own process with
+    the same header/row layout as export_pdf(). The shards are then merged
+    into out_path (needs pypdf) or, when multipart=True or pypdf is missing,
+    written next to it as "<name> (part i of N).pdf".
+
+    Returns the list of files written.
+    """
+    workers = workers or os.cpu_count() or 1
+    vals = [row_values(r) for r in rows]
+    if workers <= 1 or len(vals) < 2:
+        export_pdf(out_path, rows)
+        return [out_path]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        heights = []
+        for part in pool.map(_measure_rows, _chunks(vals, workers * 4)):
+            heights.extend(part)
+
+        # group whole pages into one contiguous shard per worker
+        starts = _plan_pages(heights)
+        pages_per_shard = max(1, -(-len(starts) // workers))
+        bounds = starts[::pages_per_shard] + [len(vals)]
+        shards = [vals[a:b] for a, b in zip(bounds, bounds[1:])]
+
+        if multipart or not _MERGE_AVAILABLE:
+            paths = [part_path(out_path, i + 1, len(shards)) for i in range(len(shards))]
+            return list(pool.map(_render_shard, paths, shards))
+
+        with tempfile.TemporaryDirectory(prefix="filepulse-") as tmp:
+            paths = [os.path.join(tmp, f"shard-{i:04d}.pdf") for i in range(len(shards))]
+            writer = PdfWriter()
+            for path in pool.map(_render_shard, paths, shards):
+                writer.append(path)
+            with open(out_path, "wb") as f:
+                writer.write(f)
+            writer.close()
+    return [out_path]
+
+
+# ---------------- summary report ----------------
+
+STATES = ("green", "amber", "red")
+SUMMARY_TOP_N = 25
+
+
+def _int_or(v, default: int) -> int:
+    try:
+        return int(v)
+    except Exception:
+        return default
+
+
+def _newest(ts, r: dict):
+    """max(ts, the row's last change), ignoring unknown dates."""
+    t = r.get("last_modified_ts")
+    return t if isinstance(t, (int, float)) and (ts is None or t > ts) else ts
+
+
+def as_of(ts) -> str:
+    """
+    Date line for a report: the newest folder change it covers. Identical
+    rows reuse an archived report (report_cache), so the time a file was
+    written would go stale; this only changes when the rows do.
+    """
+    if ts is None:
+        return "As of: no known changes"
+    return f"As of latest change {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}"
+
+
+def summarize(rows, top_n: int = SUMMARY_TOP_N) -> dict:
+    """
+    One pass over 'rows' for per-state totals and the newest change, plus
+    partial selection (heapq.nlargest, O(n log N)) for the N largest and N
+    most neglected. Unknown sizes/neglect sort last; an unknown state
+    counts as "unknown".
+    """
+    totals = {s: {"count": 0, "bytes": 0} for s in STATES + ("unknown",)}
+    newest_ts = None
+    for r in rows:
+        state = (r.get("file_state") or "").lower()
+        t = totals[state if state in totals else "unknown"]
+        t["count"] += 1
+        t["bytes"] += max(0, _int_or(r.get("file_size"), 0))
+        newest_ts = _newest(newest_ts, r)
+    return {
+        "totals": totals,
+        "count": sum(t["count"] for t in totals.values()),
+        "bytes": sum(t["bytes"] for t in totals.values()),
+        "newest_ts": newest_ts,
+        "largest": heapq.nlargest(top_n, rows, key=lambda r: _int_or(r.get("file_size"), -1)),
+        "most_neglected": heapq.nlargest(top_n, rows, key=lambda r: _int_or(r.get("neglect_seconds"), -1)),
+    }
+
+
+def export_summary_pdf(out_path: str, rows: list[dict], top_n: int = SUMMARY_TOP_N,
+                       appendix: bool = False) -> None:
+    """
+    Short PDF: per-state totals, the top-N largest and top-N most neglected
+    folders (same row layout as the full report), and optionally the full
+    table as an appendix. Without the appendix its size depends on N only.
+    """
+    s = summarize(rows, top_n)
+    layout = PdfLayout()
+    layout.add_page(header=False)
+
+    layout.add_heading("FolderPulse summary", size=16, gap=0)
+    layout.add_text(f"{as_of(s['newest_ts'])} - "
+                    f"{s['count']} folders, {human_size(s['bytes'])} total")
+
+    layout.add_heading("Totals by state")
+    grid = [[state.capitalize(), str(t["count"]), human_size(t["bytes"])]
+            for state, t in s["totals"].items() if t["count"] or state != "unknown"]
+    grid.append(["All", str(s["count"]), human_size(s["bytes"])])
+    layout.add_grid(["State", "Folders", "Total size"], grid, [50, 30, 40])
+
+    for title, picked in ((f"Top {len(s['largest'])} largest folders", s["largest"]),
+                          (f"Top {len(s['most_neglected'])} most neglected folders", s["most_neglected"])):
+        layout.add_heading(title)
+        layout.start_table()
+        for r in picked:
+            layout.add_row(row_values(r))
+
+    if appendix:
+        layout.add_page(header=False)
+        layout.add_heading("Appendix: all folders", gap=0)
+        layout.start_table()
+        for r in rows:
+            layout.add_row(row_values(r))
+
+    layout.output(out_path)
+
+
+# ---------------- CSV / JSON Lines ----------------
+
+# Raw, machine-readable columns (no humanized sizes or durations)
+RAW_FIELDS = ("path", "name", "bytes", "mtime", "neglect_seconds", "state")
+
+
+def raw_record(r: dict) -> dict:
+    """Preview row -> raw record: bytes, epoch mtime, neglect seconds, state."""
+    return {
+        "path": r.get("file_path", ""),
+        "name": r.get("file_name", ""),
+        "bytes": r.get("file_size"),
+        "mtime": r.get("last_modified_ts"),
+        "neglect_seconds": r.get("neglect_seconds"),
+        "state": r.get("file_state", ""),
+    }
+
+
+def export_csv(out_path: str, rows) -> int:
+    """
+    Stream rows to CSV, one line per row (constant memory; 'rows' may be any
+    iterable). Empty cells mean unknown. Returns the number of rows written.
+    """
+    n = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(RAW_FIELDS)
+        for r in rows:
+            rec = raw_record(r)
+            w.writerow(["" if rec[k] is None else rec[k] for k in RAW_FIELDS])
+            n += 1
+    return n
+
+
+def export_jsonl(out_path: str, rows) -> int:
+    """
+    Stream rows as JSON Lines: one compact object per line, null for unknown.
+    Returns the number of rows written.
+    """
+    n = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(raw_record(r), ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            n += 1
+    return n
+
+
+# ---------------- standalone HTML ----------------
+
+# state -> (background, foreground, label); shared with the on-screen preview
+HTML_BADGES = {
+    "green": ("#10B981", "#ffffff", "GREEN"),
+    "amber": ("#F59E0B", "#000000", "AMBER"),
+    "red": ("#EF4444", "#ffffff", "RED"),
+}
+HTML_BADGE_NONE = ("#e5e7eb", "#111827", "—")
+HTML_PAGE_SIZE = 100
+
+
+def html_css(theme: str = "light") -> str:
+    """Table stylesheet used by FilePreview and export_html."""
+    bg = "#ffffff" if theme == "light" else "#0f1014"
+    text = "#000000" if theme == "light" else "#e9ecf1"
+    muted = "#444444" if theme == "light" else "#9aa3ad"
+    border = "#e5e7eb" if theme == "light" else "#262b35"
+    header_bg = "#ffffff" if theme == "light" else "#151922"
+    return f"""* {{ box-sizing: border-box; }}
+html, body {{ height:100%; margin:0; background:{bg}; color:{text};
+  font-family:-apple-system, Segoe UI, Roboto, Arial, sans-serif; }}
+.wrapper {{ height:100%; padding:16px; }}
+.table-wrap {{
+  width:100%; height:100%;
+  background:{bg}; border:1px solid {border}; border-radius:12px;
+}}
+table {{
+  border-collapse:separate; border-spacing:0;
+  background:{bg}; color:{text};
+  min-width: 1300px;
+  width: max(100%, 1300px); /* triggers HtmlFrame's horizontal scrollbar */
+}}
+thead th {{
+  position: sticky; top: 0; z-index: 1;
+  text-align:left; padding:12px; font-weight:700; font-size:14px;
+  background:{header_bg}; color:{text}; border-bottom:1px solid {border};
+  white-space:nowrap;
+}}
+tbody td {{
+  padding:10px 12px; font-size:13px; border-bottom:1px solid {border};
+  vertical-align: middle; background:{bg}; color:{text}; white-space:nowrap;
+}}
+.badge {{ display:inline-block; padding:4px 10px; border-radius:999px;
+  font-size:12px; font-weight:700; letter-spacing:0.3px; }}
+td.path {{ font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; }}
+td.size {{ text-align:right; }}
+td.ts, td.user, td.neglect {{ color:{muted}; }}
+td.name {{ font-weight:600; }}
+td.empty {{ color:{muted}; text-align:center; padding:18px; white-space:normal; }}
+.pager {{ display:flex; gap:8px; align-items:center; padding:0 0 12px 0; color:{muted}; font-size:13px; }}
+.pager button {{ padding:4px 10px; }}
+.pager input {{ padding:4px 8px; min-width:240px; }}"""
+
+
+# Client-side paging: only one page of <tr> exists in the DOM at a time.
+_HTML_SCRIPT = """
+const ROWS = JSON.parse(document.getElementById('rows').textContent);
+const BADGES = JSON.parse(document.getElementById('badges').textContent);
+document.getElementById('asof').textContent = JSON.parse(document.getElementById('asof-text').textContent);
+let page = 0, view = ROWS;
+const $ = (id) => document.getElementById(id);
+const esc = (s) => String(s == null ? '' : s).replace(/[&<>"']/g,
+  (c) => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c]));
+function size(n) {
+  if (n == null) return '—';
+  const u = ['B','KB','MB','GB','TB']; let i = 0, f = n;
+  while (f >= 1024 && i < u.length - 1) { f /= 1024; i++; }
+  return f.toFixed(1) + ' ' + u[i];
+}
+function badge(s) {
+  const b = BADGES[(s || '').toLowerCase()] || BADGES[''];
+  return `<span class='badge' style='background:${b[0]};color:${b[1]};'>${b[2]}</span>`;
+}
+function draw() {
+  const per = parseInt($('per').value, 10);
+  const pages = Math.max(1, Math.ceil(view.length / per));
+  page = Math.min(Math.max(0, page), pages - 1);
+  const out = [];
+  for (const r of view.slice(page * per, page * per + per)) {
+    out.push(`<tr><td class='path'>${esc(r[0])}</td><td class='size'>${size(r[1])}</td>` +
+      `<td class='ts'>${esc(r[2])}</td><td class='user'>${esc(r[3])}</td>` +
+      `<td class='name'>${esc(r[4])}</td><td class='neglect'>${esc(r[5])}</td>` +
+      `<td class='state'>${badge(r[6])}</td></tr>`);
+  }
+  $('body').innerHTML = out.join('') ||
+    "<tr><td class='empty' colspan='7'>No matching folders.</td></tr>";
+  $('info').textContent = `Page ${page + 1} of ${pages} (${view.length} folders)`;
+}
+$('prev').onclick = () => { page--; draw(); };
+$('next').onclick = () => { page++; draw(); };
+$('per').onchange = () => { page = 0; draw(); };
+$('filter').oninput = () => {
+  const q = $('filter').value.toLowerCase();
+  view = q ? ROWS.filter((r) => (r[0] + ' ' + r[4] + ' ' + r[6]).toLowerCase().includes(q)) : ROWS;
+  page = 0; draw();
+};
+draw();
+"""
+
+
+def export_html(out_path: str, rows, theme: str = "light", compress: bool | None = None) -> int:
+    """
+    Self-contained HTML report: rows are embedded once as compact JSON arrays
+    and paged client-side, so the file stays small and opens fast even for
+    huge reports. Rows are streamed to disk; 'compress' (default: out_path
+    ends with .gz) gzips the output. Returns the number of rows written.
+    """
+    if compress is None:
+        compress = out_path.lower().endswith(".gz")
+    badges = dict(HTML_BADGES, **{"": HTML_BADGE_NONE})
+    opener = gzip.open if compress else open
+    n, newest_ts = 0, None
+    with opener(out_path, "wt", encoding="utf-8") as f:
+        f.write(f"""<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>FolderPulse report</title>
+<style>
+{html_css(theme)}
+</style>
+</head>
+<body>
+  <div class="wrapper">
+    <div class="pager">
+      <button id="prev">&larr;</button><button id="next">&rarr;</button>
+      <span id="info"></span>
+      <select id="per"><option>50</option><option selected>{HTML_PAGE_SIZE}</option><option>500</option></select>
+      <input id="filter" placeholder="Filter by path, name or state">
+      <span id="asof"></span>
+    </div>
+    <div class="table-wrap">
+      <table>
+        <thead>
+          <tr>{"".join(f"<th>{h}</th>" for h in HEADERS)}</tr>
+        </thead>
+        <tbody id="body"></tbody>
+      </table>
+    </div>
+  </div>
+<script id="badges" type="application/json">{json.dumps(badges, ensure_ascii=False)}</script>
+<script id="rows" type="application/json">[""")
+        for r in rows:
+            vals = [
+                r.get("file_path", ""),
+                r.get("file_size"),
+                r.get("last_modified", ""),
+                r.get("last_worked_by", "—"),
+                r.get("file_name", ""),
+                r.get("file_neglect_time", "—"),
+                r.get("file_state", ""),
+            ]
+            if not isinstance(vals[1], int):
+                vals[1] = None
+            line = json.dumps(vals, ensure_ascii=False, separators=(",", ":"))
+            f.write(("," if n else "") + line.replace("</", "<\\/"))
+            n += 1
+            newest_ts = _newest(newest_ts, r)
+        # known only once the rows are streamed; the script puts it in the pager
+        f.write(f"""]</script>
+<script id="asof-text" type="application/json">{json.dumps(as_of(newest_ts))}</script>
+<script>{_HTML_SCRIPT}</script>
+</body>
+</html>""")
+    return n
+
+
+# ---------------- benchmark ----------------
+
+def _bench(n_rows: int = 20000) -> None:
+    """python report.py [rows] -- serial vs sharded export timings."""
+    rows = [{
+        "file_path": f"C:\\Projects\\client-{i % 97}\\archive\\{i:06d}\\deliverables",
+        "file_size": i * 7919,
+        "last_modified": "2024-01-01 12:00:00",
+        "last_worked_by": "—",
+        "file_name": f"deliverables-{i:06d}",
+        "file_neglect_time": f"{i % 40}d 3h",
+        "file_state": ("green", "amber", "red")[i % 3],
+    } for i in range(n_rows)]
+
+    with tempfile.TemporaryDirectory(prefix="filepulse-bench-") as tmp:
+        t0 = time.perf_counter()
+        export_pdf(os.path.join(tmp, "serial.pdf"), rows)
+        serial = time.perf_counter() - t0
+        print(f"rows={n_rows}  serial: {serial:.2f}s")
+
+        cores = os.cpu_count() or 1
+        counts = sorted({w for w in (2, 4, 8, cores) if 1 < w <= cores})
+        for w in counts:
+            t0 = time.perf_counter()
+            export_pdf_sharded(os.path.join(tmp, f"sharded-{w}.pdf"), rows, workers=w)
+            dt = time.perf_counter() - t0
+            print(f"rows={n_rows}  workers={w}: {dt:.2f}s  speedup x{serial / dt:.2f}")
+
+
+if __name__ == "__main__":
+    import sys
+    _bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,194 @@
+# report_cache.py
+# Content-hash cache of archived reports. Identical inputs (the stable row
+# fields + thresholds + format) map to a report already in the archive, so
+# "Generate" and scheduled runs can reuse it instead of laying out and
+# archiving again. python report_cache.py checks that keys hold still.
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import config
+import storage
+
+# Lives next to the Reports folder: ~/Documents/FilePulse/report_cache.json
+CACHE_FILE = storage.APP_DIR.parent / "report_cache.json"
+
+MAX_ENTRIES = 200             # size bound (least recently used goes first)
+MAX_AGE_S = 30 * 86400        # entries older than this are dropped
+
+_lock = threading.Lock()
+_entries: Dict[str, Dict] | None = None   # key -> {"paths", "ts", "used"}
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# ---------------- keys ----------------
+
+def _stable_fields(r: Dict) -> list:
+    """
+    The row fields that only change when the folder does. Neglect time
+    grows every second and is left out (its effect is in the state), so
+    a reused report shows neglect as of when it was built.
+    """
+    return [
+        r.get("file_path", ""),
+        r.get("file_name", ""),
+        r.get("file_size"),
+        r.get("last_modified_ts"),
+        r.get("last_worked_by", "—"),
+        r.get("file_state", ""),
+    ]
+
+
+def report_key(rows: List[Dict], kind: str = "pdf", options: Dict | None = None) -> str:
+    """
+    Hash of the report's inputs: the stable row fields (path, name, size,
+    last change, state), the thresholds, the format and any layout options
+    (e.g. summary mode). Rescanning an unchanged tree gives the same key.
+    """
+    h = hashlib.sha256()
+    head = {"kind": kind, "options": options or {}, "thresholds": config.get_thresholds()}
+    h.update(json.dumps(head, sort_keys=True).encode())
+    for r in rows:
+        h.update(json.dumps(_stable_fields(r), separators=(",", ":"), default=str).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+# ---------------- persistence ----------------
+
+def _load() -> Dict[str, Dict]:
+    global _entries
+    if _entries is None:
+        try:
+            _entries = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        except Exception:
+            _entries = {}
+    return _entries
+
+
+def _save() -> None:
+    storage.atomic_write_text(CACHE_FILE, json.dumps(_entries))
+
+
+def _evict(entries: Dict[str, Dict]) -> bool:
+    """Drop expired entries, then least recently used ones over MAX_ENTRIES."""
+    cutoff = time.time() - MAX_AGE_S
+    dead = [k for k, e in entries.items() if e.get("ts", 0) < cutoff]
+    over = len(entries) - len(dead) - MAX_ENTRIES
+    if over > 0:
+        alive = sorted((e.get("used", 0), k) for k, e in entries.items() if k not in dead)
+        dead += [k for _, k in alive[:over]]
+    for k in dead:
+        del entries[k]
+    _stats["evictions"] += len(dead)
+    return bool(dead)
+
+
+# ---------------- public API ----------------
+
+def lookup(key: str) -> List[str] | None:
+    """
+    Archived report file(s) for 'key', or None on a miss.
+    Entries whose files were deleted from the archive count as misses.
+    """
+    with _lock:
+        entries = _load()
+        changed = _evict(entries)
+        e = entries.get(key)
+        if e and all(Path(p).exists() for p in e["paths"]):
+            _stats["hits"] += 1
+            e["used"] = time.time()
+            _save()
+            return list(e["paths"])
+        if e:
+            del entries[key]
+            changed = True
+        _stats["misses"] += 1
+        if changed:
+            _save()
+        return None
+
+
+def remember(key: str, archived_paths: List[str]) -> None:
+    """Record the archived copies produced for 'key'."""
+    now = time.time()
+    with _lock:
+        entries = _load()
+        entries[key] = {"paths": list(archived_paths), "ts": now, "used": now}
+        _evict(entries)
+        _save()
+
+
+def stats() -> Dict:
+    """Hit/miss/eviction counters for this session plus the current entry count."""
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "entries": len(_load()),
+            "hit_rate": (_stats["hits"] / total) if total else 0.0,
+        }
+
+
+def clear() -> None:
+    global _entries
+    with _lock:
+        _entries = {}
+        _save()
+
+
+# ---------------- check ----------------
+
+def _check() -> None:
+    """python report_cache.py -- two scans of an unchanged tree 61 s apart share a key."""
+    import os
+    import tempfile
+    from datetime import datetime, timedelta
+    import scan
+
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(seconds=61)
+
+    formats = [("pdf", None), ("pdf", {"summary": True, "top_n": 5, "appendix": False}),
+               ("csv", None), ("jsonl", None), ("html", {"gzip": False})]
+    with tempfile.TemporaryDirectory(prefix="filepulse-key-") as tmp:
+        folders = []
+        for i in range(3):
+            folder = os.path.join(tmp, f"folder{i}")
+            os.makedirs(folder)
+            with open(os.path.join(folder, "data.bin"), "wb") as f:
+                f.write(b"x" * (1000 * (i + 1)))
+            folders.append(folder)
+        first = [scan.folder_row(f) for f in folders]
+        real, scan.datetime = scan.datetime, Later
+        try:
+            later = [scan.folder_row(f) for f in folders]
+        finally:
+            scan.datetime = real
+        with open(os.path.join(folders[0], "data.bin"), "ab") as f:
+            f.write(b"more")
+        grown = [scan.folder_row(f) for f in folders]
+
+    bad = []
+    if [r["neglect_seconds"] for r in first] == [r["neglect_seconds"] for r in later]:
+        bad.append("the second scan did not see time pass")
+    for kind, options in formats:
+        if report_key(first, kind, options) != report_key(later, kind, options):
+            bad.append(f"{kind} {options}: key changed 61 s later with nothing changed")
+        if report_key(first, kind, options) == report_key(grown, kind, options):
+            bad.append(f"{kind} {options}: key did not change when a folder grew")
+    for line in bad:
+        print(f"FAILED {line}")
+    if bad:
+        raise SystemExit(1)
+    print(f"report keys ok ({len(formats)} formats)")
+
+
+if __name__ == "__main__":
+    _check()
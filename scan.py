@@ -0,0 +1,234 @@
+# scan.py
+# Folder scanning (no UI): one report row per folder -- size, last change,
+# neglect time and traffic-light state. Used by the Analysis tab and by
+# scheduled runs.
+#
+# Folder sizes can come from a per-directory cache (use_cache=True): each
+# directory's direct file bytes and subdirectories are reused while its
+# mtime is unchanged (creating, deleting or renaming an entry bumps it).
+# In-place edits (appending to or overwriting a file) do NOT bump it and
+# are only caught once an entry is older than FULL_RESCAN_S, so rows that
+# get shown as current, exported, archived or emailed are measured
+# (use_cache=False, the default); measuring refreshes the cache too.
+#
+# The last rows themselves are kept too (ROWS_FILE), so the Analysis tab
+# can show them at startup before revalidating in the background.
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import config
+import storage
+
+# Lives next to the Reports folder: ~/Documents/FilePulse/scan_cache.json
+CACHE_FILE = storage.APP_DIR.parent / "scan_cache.json"
+FULL_RESCAN_S = 24 * 3600
+ROWS_FILE = storage.APP_DIR.parent / "last_rows.json"
+
+_lock = threading.Lock()
+_dirs: Dict[str, list] | None = None   # dir -> [mtime_ns, direct file bytes, [subdirs], checked_ts]
+_dirty = False
+_rows_lock = threading.Lock()
+
+
+# ---------------- rows ----------------
+
+def folder_row(folder: str, use_cache: bool = False) -> dict:
+    try:
+        st = os.stat(folder)
+        last_modified_ts = st.st_mtime
+        last_modified_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_modified_ts))
+    except OSError:
+        last_modified_ts = None
+        last_modified_str = "—"
+
+    total_size = folder_size_bytes(folder, use_cache=use_cache)
+
+    neglect_seconds = None
+    neglect_str = "—"
+    if last_modified_ts is not None:
+        now_ts = datetime.now(timezone.utc).timestamp()
+        neglect_seconds = max(0, int(now_ts - last_modified_ts))
+        neglect_str = format_duration(neglect_seconds)
+
+    state = compute_state(neglect_seconds)
+
+    return {
+        "file_path": folder,
+        "file_size": total_size,
+        "last_modified": last_modified_str,
+        "last_modified_ts": last_modified_ts,
+        "last_worked_by": "—",
+        "file_name": os.path.basename(folder) or folder,
+        "file_neglect_time": neglect_str,
+        "neglect_seconds": neglect_seconds,
+        "file_state": state,
+    }
+
+
+def scan_folders(folders: List[str], use_cache: bool = False) -> List[dict]:
+    """Rows for 'folders' (duplicates dropped), then persist the size cache."""
+    rows, seen = [], set()
+    for folder in folders:
+        folder = os.path.normpath(folder)
+        if folder in seen:
+            continue
+        seen.add(folder)
+        rows.append(folder_row(folder, use_cache=use_cache))
+    save_cache()
+    remember_rows(rows)
+    return rows
+
+
+def cached_rows(folders: List[str]) -> List[dict]:
+    """
+    Last known rows for 'folders' (no folder access), with neglect time
+    and state brought up to date. Folders never scanned are left out.
+    """
+    try:
+        saved = json.loads(ROWS_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    now_ts = datetime.now(timezone.utc).timestamp()
+    rows = []
+    for folder in folders:
+        row = saved.get(os.path.normpath(folder))
+        if row is None:
+            continue
+        if row.get("last_modified_ts") is not None:
+            row["neglect_seconds"] = max(0, int(now_ts - row["last_modified_ts"]))
+            row["file_neglect_time"] = format_duration(row["neglect_seconds"])
+        row["file_state"] = compute_state(row.get("neglect_seconds"))
+        rows.append(row)
+    return rows
+
+
+def remember_rows(rows: List[dict]) -> None:
+    """Store rows for cached_rows() (merged by folder path)."""
+    if not rows:
+        return
+    with _rows_lock:
+        try:
+            saved = json.loads(ROWS_FILE.read_text(encoding="utf-8"))
+        except Exception:
+            saved = {}
+        saved.update({r["file_path"]: r for r in rows})
+        storage.atomic_write_text(ROWS_FILE, json.dumps(saved))
+
+
+def compute_state(neglect_seconds: int | None) -> str:
+    if neglect_seconds is None:
+        return "red"
+    days = neglect_seconds // 86400
+    g, a, r = config.get_thresholds()
+    if days <= g:
+        return "green"
+    elif days <= a:
+        return "amber"
+    else:
+        return "red"
+
+
+def format_duration(seconds: int) -> str:
+    if seconds <= 0:
+        return "0s"
+    parts = []
+    days, rem = divmod(seconds, 86400)
+    if days:
+        parts.append(f"{days}d")
+    hours, rem = divmod(rem, 3600)
+    if hours:
+        parts.append(f"{hours}h")
+    minutes, rem = divmod(rem, 60)
+    if minutes:
+        parts.append(f"{minutes}m")
+    if not parts:
+        parts.append(f"{rem}s")
+    return " ".join(parts)
+
+
+# ---------------- sizes ----------------
+
+def _load() -> Dict[str, list]:
+    global _dirs
+    if _dirs is None:
+        try:
+            _dirs = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        except Exception:
+            _dirs = {}
+    return _dirs
+
+
+def save_cache() -> None:
+    """Write the directory cache if it changed (atomic)."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        cache = _load()
+        # entries this old get rescanned anyway; dropping them forgets deleted dirs
+        cutoff = time.time() - 2 * FULL_RESCAN_S
+        for d in [d for d, e in cache.items() if e[3] < cutoff]:
+            del cache[d]
+        data = json.dumps(cache)
+        _dirty = False
+    storage.atomic_write_text(CACHE_FILE, data)
+
+
+def _scan_dir(path: str, mtime_ns: int) -> list:
+    files, subdirs = 0, []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        files += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+            except OSError:
+                pass
+    return [mtime_ns, files, subdirs, time.time()]
+
+
+def folder_size_bytes(folder: str, use_cache: bool = False) -> int:
+    """
+    Total bytes under 'folder' (symlinks not followed; unreadable parts
+    count 0). use_cache=True may miss in-place edits (see the top).
+    """
+    global _dirty
+    total = 0
+    fresh_after = time.time() - FULL_RESCAN_S
+    with _lock:
+        cache = _load()
+    stack = [folder]
+    while stack:
+        cur = stack.pop()
+        try:
+            mtime_ns = os.stat(cur, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            continue
+        entry = cache.get(cur) if use_cache else None
+        if entry is None or entry[0] != mtime_ns or entry[3] < fresh_after:
+            try:
+                entry = _scan_dir(cur, mtime_ns)
+            except OSError:
+                continue
+            with _lock:
+                cache[cur] = entry
+                _dirty = True
+        total += entry[1]
+        stack.extend(entry[2])
+    return total
+
+
+def clear_cache() -> None:
+    global _dirs, _dirty
+    with _lock:
+        _dirs, _dirty = {}, True
+    save_cache()
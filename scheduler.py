@@ -1,30 +1,70 @@
 # scheduler.py
+import heapq
+import html
+import itertools
+import json
 import os
 import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-import resend
+import config
+import cron
+import digest
+import jobstore
+import mailer
+import pipeline
+import report
 import storage
 
 # ========== Configuration ==========
-# Load API key from .env file
-from dotenv import load_dotenv
-load_dotenv()
+# Mail settings (.env: MAIL_TRANSPORT, RESEND_API_KEY, SMTP_*) are read by
+# mailer on first send, not at import.
 
-RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
+# Global state
+_email_recipients = []
 
-if not RESEND_API_KEY:
-    print("WARNING: RESEND_API_KEY not found in .env file!")
-    print("Please create a .env file with: RESEND_API_KEY=your_key_here")
+# Job engine: named schedules + a min-heap of (next_run_ts, seq, name, version).
+# Rescheduling or removing a job bumps its version; stale heap entries are
+# skipped when they reach the top.
+DEFAULT_SCHEDULE = "default"   # the schedule driven by start_scheduler()
+JOB_WORKERS = 4                # due jobs run concurrently, one run per job at a time
+MAX_WAIT_S = 60                # re-check at least this often (clock changes, sleep)
 
-resend.api_key = RESEND_API_KEY
+# Missed runs (app closed, machine asleep): "once" = run once as soon as
+# possible, "skip" = wait for the next regular run. A run is "missed" when
+# it starts more than MISFIRE_GRACE_S late.
+CATCH_UP_POLICIES = ("once", "skip")
+MISFIRE_GRACE_S = 300
+REPLAY_WORKERS = 4             # concurrent sends when replaying the outbox
+OUTBOX_REPLAY_S = 15 * 60      # the engine retries undelivered emails this often
 
-# Global state
-_email_recipients = []
-_scheduler_thread = None
-_scheduler_running = False
-_scheduler_info = {}
+# What a run emails: "full" = the whole report every time, "digest" = only
+# folders that changed since the last digest (nothing changed -> no email).
+EMAIL_MODES = ("full", "digest")
+
+_cv = threading.Condition()
+_jobs = {}                     # name -> schedule dict
+_heap = []
+_seq = itertools.count()
+_engine_thread = None
+_engine_stopping = False
+_pool = None
+# Orders jobstore writes (file write + fsync), which never happen under _cv.
+# Lock order: _store_lock, then _cv.
+_store_lock = threading.Lock()
+
+# Metrics: per-schedule counters and latencies, readable with get_metrics()
+# and flushed to METRICS_FILE by the engine at most every METRICS_FLUSH_S.
+METRICS_FILE = storage.APP_DIR.parent / "scheduler_metrics.json"
+METRICS_FLUSH_S = 30
+
+_metrics = {}                  # name -> counters (kept across reschedules)
+_metrics_dirty = False
+_next_flush = 0.0
+_queued = 0                    # runs handed to the pool, not started yet
+_next_replay = time.time() + OUTBOX_REPLAY_S   # restore() replays once at startup
 
 
 # ========== Email Recipients Management ==========
@@ -34,57 +74,273 @@ def get_email_recipients() -> list:
 
 
 def set_email_recipients(emails: list) -> None:
-    """Set the list of email recipients."""
+    """Set the list of email recipients (persisted)."""
     global _email_recipients
     _email_recipients = [e.strip() for e in emails if e.strip()]
+    jobstore.set_recipients(_email_recipients)
+
+
+# ========== Schedules ==========
+def add_schedule(name: str, start_date, start_time: str, frequency: str,
+                 recipients: list = None, folders: list = None, catch_up: str = "once",
+                 mode: str = "full", digest_attach: bool = False) -> dict:
+    """
+    Add (or replace) a named schedule and make sure the engine is running.
+    Schedules are persisted and come back with restore().
+
+    Args:
+        name: unique schedule name
+        start_date: datetime.date of the first run
+        start_time: String in format "HH:MM" (24-hour)
+        frequency: one of cron.FREQUENCIES, or a cron expression
+            ("0 8 * * mon-fri"; start_date/start_time then only set when
+            it begins)
+        recipients: email list for this schedule (None = the shared recipients)
+        folders: folders each run rescans and reports on (None = the folders
+            of the newest archived report)
+        catch_up: what to do about missed runs, one of CATCH_UP_POLICIES
+        mode: what each run emails, one of EMAIL_MODES
+        digest_attach: digest mode only -- also attach the full report
+    """
+    if catch_up not in CATCH_UP_POLICIES:
+        raise ValueError(f"catch_up must be one of {', '.join(CATCH_UP_POLICIES)}")
+    if mode not in EMAIL_MODES:
+        raise ValueError(f"mode must be one of {', '.join(EMAIL_MODES)}")
+    anchor = _anchor(start_date, start_time)
+    rule = cron.schedule_for(frequency, anchor)  # ValueError for a bad frequency / expression
+    # If the start time is in the past, the next run follows the rule
+    first = cron.first_fire(rule, anchor, datetime.now())
+
+    _install({
+        "name": name,
+        "start_date": start_date,
+        "start_time": start_time,
+        "frequency": frequency,
+        "recipients": list(recipients) if recipients is not None else None,
+        "folders": list(folders) if folders else [],
+        "catch_up": catch_up,
+        "mode": mode,
+        "digest_attach": bool(digest_attach),
+        "rule": rule,
+        "next_run": first,
+    })
+    return schedule_info(name)
+
+
+def _anchor(start_date, start_time: str) -> datetime:
+    hour, minute = map(int, start_time.split(":"))
+    return datetime.combine(start_date, datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+def _install(job: dict) -> None:
+    """Register a schedule (replacing one with the same name), persist it, run the engine."""
+    with _cv:
+        old = _jobs.get(job["name"])
+        job.update({
+            "version": (old["version"] + 1) if old else 0,
+            "running": False,
+            "last_run": old["last_run"] if old else None,
+            "last_error": None,
+            "last_timings": old["last_timings"] if old else {},
+        })
+        job.setdefault("last_success", old.get("last_success") if old else None)
+        _jobs[job["name"]] = job
+        _push(job)
+        _start_engine()
+    _persist(job)
+
+
+def _persist(job: dict, *fields: str) -> None:
+    """
+    Save a schedule -- or just 'fields' of it -- to the jobstore, unless it
+    was replaced or removed meanwhile. Call without holding _cv.
+    """
+    with _store_lock:
+        with _cv:
+            if _jobs.get(job["name"]) is not job:
+                return
+            record = {
+                "start_date": job["start_date"].isoformat(),
+                "start_time": job["start_time"],
+                "frequency": job["frequency"],
+                "recipients": job["recipients"],
+                "folders": job["folders"],
+                "catch_up": job["catch_up"],
+                "mode": job["mode"],
+                "digest_attach": job["digest_attach"],
+                "next_run": job["next_run"].isoformat(timespec="seconds"),
+                "last_success": job.get("last_success"),
+            }
+        try:
+            if fields:
+                jobstore.update_schedule(job["name"], **{k: record[k] for k in fields})
+            else:
+                jobstore.put_schedule(job["name"], record)
+        except Exception as e:
+            print(f"Could not save schedule '{job['name']}': {e}")
+
+
+def remove_schedule(name: str) -> bool:
+    """Remove a named schedule; True if it existed. A run in progress finishes."""
+    with _store_lock:
+        with _cv:
+            job = _jobs.pop(name, None)
+            if job is None:
+                return False
+            job["version"] += 1  # invalidates its heap entry
+            _metrics.pop(name, None)
+            _mark_dirty()
+            _cv.notify()
+        jobstore.delete_schedule(name)
+    return True
+
+
+def list_schedules() -> list:
+    """All schedules, soonest first."""
+    with _cv:
+        names = sorted(_jobs, key=lambda n: _jobs[n]["next_run"])
+        return [schedule_info(n) for n in names]
+
+
+def schedule_info(name: str) -> dict:
+    """Public view of one schedule (next_run as "YYYY-MM-DD HH:MM:SS"), or {}."""
+    with _cv:
+        job = _jobs.get(name)
+        if job is None:
+            return {}
+        info = {k: v for k, v in job.items() if k not in ("version", "rule", "future")}
+        info["next_run"] = job["next_run"].strftime("%Y-%m-%d %H:%M:%S")
+        if job["last_run"] is not None:
+            info["last_run"] = job["last_run"].strftime("%Y-%m-%d %H:%M:%S")
+        return info
 
 
 # ========== Scheduler Control ==========
-def start_scheduler(start_date, start_time: str, frequency: str) -> None:
+def start_scheduler(start_date, start_time: str, frequency: str, catch_up: str = "once",
+                    mode: str = "full", digest_attach: bool = False) -> None:
     """
     Start the scheduler with given parameters.
+    (Compatibility wrapper: (re)creates the "default" schedule, which
+    sends to the shared recipient list.)
     
     Args:
         start_date: datetime.date object from DateEntry
         start_time: String in format "HH:MM" (24-hour)
         frequency: One of the frequency options
+        catch_up: missed-run policy, one of CATCH_UP_POLICIES
+        mode: "full" report or change-only "digest" (see EMAIL_MODES)
+        digest_attach: attach the full report to digests
     """
-    global _scheduler_thread, _scheduler_running, _scheduler_info
-    
-    if _scheduler_running:
-        stop_scheduler()
-    
-    _scheduler_info = {
-        "start_date": start_date,
-        "start_time": start_time,
-        "frequency": frequency,
-        "next_run": None
-    }
-    
-    _scheduler_running = True
-    _scheduler_thread = threading.Thread(target=_scheduler_loop, daemon=True)
-    _scheduler_thread.start()
+    add_schedule(DEFAULT_SCHEDULE, start_date, start_time, frequency, catch_up=catch_up,
+                 mode=mode, digest_attach=digest_attach)
+
+
+def restore() -> None:
+    """
+    Load persisted recipients and schedules (call once at startup). Runs
+    missed while the app was closed follow each schedule's catch-up
+    policy; undelivered emails are replayed on a background thread (and
+    by the engine every OUTBOX_REPLAY_S after that).
+    """
+    global _email_recipients
+    _email_recipients = jobstore.get_recipients()
+    now = datetime.now()
+    for name, rec in jobstore.get_schedules().items():
+        try:
+            start_date = date.fromisoformat(rec["start_date"])
+            next_run = datetime.fromisoformat(rec["next_run"])
+            rule = cron.schedule_for(rec["frequency"], _anchor(start_date, rec["start_time"]))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Ignoring stored schedule '{name}': {e}")
+            continue
+        catch_up = rec.get("catch_up") if rec.get("catch_up") in CATCH_UP_POLICIES else "once"
+        if next_run < now:
+            if catch_up == "once":
+                next_run = now
+            else:
+                next_run = rule.next_fire(now)
+            print(f"Schedule '{name}' missed its run at {rec['next_run']}; "
+                  f"{'running it now' if catch_up == 'once' else 'skipped'}")
+        _install({
+            "name": name,
+            "start_date": start_date,
+            "start_time": rec["start_time"],
+            "frequency": rec["frequency"],
+            "recipients": rec.get("recipients"),
+            "folders": rec.get("folders") or [],
+            "catch_up": catch_up,
+            "mode": rec.get("mode") if rec.get("mode") in EMAIL_MODES else "full",
+            "digest_attach": bool(rec.get("digest_attach")),
+            "rule": rule,
+            "next_run": next_run,
+            "last_success": rec.get("last_success"),
+        })
+    threading.Thread(target=replay_outbox, name="outbox-replay", daemon=True).start()
 
 
 def stop_scheduler() -> None:
-    """Stop the scheduler."""
-    global _scheduler_running
-    _scheduler_running = False
+    """Stop the scheduler (removes the "default" schedule)."""
+    remove_schedule(DEFAULT_SCHEDULE)
 
 
 def is_scheduler_running() -> bool:
     """Check if scheduler is currently running."""
-    return _scheduler_running
+    with _cv:
+        return DEFAULT_SCHEDULE in _jobs
 
 
 def get_scheduler_info() -> dict:
     """Get current scheduler configuration and status."""
-    return _scheduler_info.copy()
+    return schedule_info(DEFAULT_SCHEDULE)
+
+
+def shutdown(timeout: float = 5.0) -> None:
+    """
+    Stop the engine thread, give running jobs up to 'timeout' seconds in
+    all, drop runs that have not started and close pooled mail
+    connections. Never blocks longer than that: sends cut short are in the
+    outbox and replayed on the next start. Schedules are kept; the next
+    add_schedule starts a fresh engine.
+    """
+    global _engine_thread, _engine_stopping, _pool, _metrics_dirty, _queued
+    deadline = time.monotonic() + timeout
+    with _cv:
+        thread, pool = _engine_thread, _pool
+        _engine_stopping = True
+        _cv.notify_all()
+    if thread is not None:
+        thread.join(timeout)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        with _cv:
+            for job in _jobs.values():
+                future = job.get("future")
+                if job["running"] and future is not None and future.cancelled():
+                    job["running"] = False
+                    _queued -= 1
+            while any(j["running"] for j in _jobs.values()):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    print("Scheduler shutdown: leaving running jobs to finish in the background")
+                    break
+                _cv.wait(left)
+    mailer.close_transport()
+    with _cv:
+        dirty, _metrics_dirty = _metrics_dirty, False
+    if dirty:
+        _flush_metrics()
+    with _cv:
+        if _engine_thread is thread:
+            _engine_thread, _pool = None, None
+            _engine_stopping = False
 
 
 # ========== Email Sending ==========
-def send_test_email(recipients: list) -> None:
-    """Send a test email to verify configuration."""
+def send_test_email(recipients: list) -> list:
+    """
+    Send a test email to verify configuration.
+    Returns per-recipient results (see mailer.send_all); raises if any failed.
+    """
     if not recipients:
         raise ValueError("No recipients specified")
     
@@ -100,36 +356,46 @@ def send_test_email(recipients: list) -> None:
     </html>
     """.format(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     
-    for recipient in recipients:
-        try:
-            resend.Emails.send({
-                "from": "onboarding@resend.dev",
-                "to": recipient,
-                "subject": "FilePulse - Test Email",
-                "html": html_content
-            })
-        except Exception as e:
-            raise Exception(f"Failed to send to {recipient}: {e}")
+    results = mailer.send_all(
+        [mailer.message_for(r, "FilePulse - Test Email", html_content) for r in recipients]
+    )
+    failed = [r for r in results if not r["ok"]]
+    if failed:
+        raise Exception("Failed to send to " + "; ".join(f"{r['to']}: {r['error']}" for r in failed))
+    return results
 
 
-def send_report_email(recipients: list, report_path: str, report_title: str) -> None:
-    """Send the latest report via email."""
+def send_report_email(recipients: list, report_path, report_title: str) -> list:
+    """
+    Send the latest report via email (all recipients concurrently).
+    report_path is one file or a list of them (the parts of a sharded
+    export), all attached to the same email.
+    Returns per-recipient results: {"to", "ok", "id", "error", "attempts"}.
+    """
     if not recipients:
         raise ValueError("No recipients specified")
     
-    if not os.path.exists(report_path):
-        raise FileNotFoundError(f"Report not found: {report_path}")
-    
-    # Read PDF as base64 for attachment
-    import base64
-    with open(report_path, "rb") as f:
-        pdf_data = base64.b64encode(f.read()).decode()
-    
+    results = mailer.send_all(_report_messages(recipients, _as_paths(report_path), report_title))
+    for r in results:
+        if not r["ok"]:
+            print(f"Failed to send email to {r['to']} after {r['attempts']} attempt(s): {r['error']}")
+    return results
+
+
+def _report_messages(recipients: list, report_paths: list, report_title: str) -> list:
+    """One report email per recipient with every part attached, all sharing one encoded copy (see _prepare)."""
+    prepared = [_prepare(p) for p in report_paths]
+    attachments = [a for p in prepared for a in p["attachments"] or []]
+    if len(prepared) == 1:
+        note = _attachment_note(prepared[0], "The latest FilePulse report")
+    else:
+        note = " ".join([f"The latest FilePulse report comes in {len(prepared)} parts."] +
+                        [_attachment_note(p, p["filename"]) for p in prepared if p["mode"] != "file"])
     html_content = """
     <html>
     <body style="font-family: Arial, sans-serif; padding: 20px;">
         <h2 style="color: #2563eb;">FilePulse - Scheduled Report</h2>
-        <p>Please find attached the latest FilePulse report.</p>
+        <p>{}</p>
         <div style="background: #f3f4f6; padding: 15px; border-radius: 8px; margin: 20px 0;">
             <p style="margin: 5px 0;"><strong>Report:</strong> {}</p>
             <p style="margin: 5px 0;"><strong>Generated:</strong> {}</p>
@@ -139,129 +405,437 @@ def send_report_email(recipients: list, report_path: str, report_title: str) ->
         <p style="color: #666; font-size: 12px;">Automated email from FilePulse</p>
     </body>
     </html>
-    """.format(report_title, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    
-    filename = os.path.basename(report_path)
+    """.format(note, report_title, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     
-    for recipient in recipients:
-        try:
-            resend.Emails.send({
-                "from": "onboarding@resend.dev",
-                "to": recipient,
-                "subject": f"FilePulse Report - {report_title}",
-                "html": html_content,
-                "attachments": [{
-                    "filename": filename,
-                    "content": pdf_data
-                }]
-            })
-        except Exception as e:
-            print(f"Failed to send email to {recipient}: {e}")
+    return [
+        mailer.message_for(r, f"FilePulse Report - {report_title}", html_content, attachments or None)
+        for r in recipients
+    ]
 
 
-# ========== Scheduler Loop ==========
-def _scheduler_loop() -> None:
-    """Background thread that runs the scheduler."""
-    global _scheduler_info
-    
-    # Calculate first run time
-    start_date = _scheduler_info["start_date"]
-    start_time = _scheduler_info["start_time"]
-    frequency = _scheduler_info["frequency"]
-    
-    # Parse start time
-    hour, minute = map(int, start_time.split(":"))
-    
-    # Combine date and time
-    next_run = datetime.combine(start_date, datetime.min.time())
-    next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    
-    # If the start time is in the past, calculate next run based on frequency
-    now = datetime.now()
-    if next_run < now:
-        next_run = _calculate_next_run(now, frequency, hour, minute)
-    
-    _scheduler_info["next_run"] = next_run.strftime("%Y-%m-%d %H:%M:%S")
-    
-    while _scheduler_running:
-        now = datetime.now()
-        
-        if now >= next_run:
-            # Time to send email
-            try:
-                _send_scheduled_email()
-            except Exception as e:
-                print(f"Scheduled email failed: {e}")
-            
-            # Calculate next run
-            next_run = _calculate_next_run(now, frequency, hour, minute)
-            _scheduler_info["next_run"] = next_run.strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Sleep for 30 seconds before checking again
-        time.sleep(30)
+def _attachment_note(prepared: dict, what: str) -> str:
+    """How one prepared report file made it into the email."""
+    if prepared["mode"] == "file":
+        return "Please find attached the latest FilePulse report."
+    if prepared["mode"] == "gzip":
+        return (f"{what} is attached compressed ({prepared['filename']}, "
+                f"{report.human_size(prepared['sent_size'])}).")
+    return (f"{what} is too large to attach ({report.human_size(prepared['size'])}); "
+            f"it is kept in the FilePulse archive as {html.escape(prepared['filename'])}.")
 
 
-def _calculate_next_run(current_time: datetime, frequency: str, hour: int, minute: int) -> datetime:
-    """Calculate the next run time based on frequency."""
-    next_run = current_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    
-    if frequency == "Hourly":
-        next_run = current_time + timedelta(hours=1)
-        next_run = next_run.replace(minute=minute, second=0, microsecond=0)
-    elif frequency == "Daily":
-        next_run = current_time + timedelta(days=1)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Every 2 days":
-        next_run = current_time + timedelta(days=2)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Every 3 days":
-        next_run = current_time + timedelta(days=3)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Weekly":
-        next_run = current_time + timedelta(weeks=1)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Fortnightly":
-        next_run = current_time + timedelta(weeks=2)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Monthly":
-        # Add one month
-        if current_time.month == 12:
-            next_run = current_time.replace(year=current_time.year + 1, month=1, hour=hour, minute=minute, second=0, microsecond=0)
+def _as_paths(report_path) -> list:
+    """One path, a list of them or None -> list of paths."""
+    if not report_path:
+        return []
+    return [report_path] if isinstance(report_path, str) else list(report_path)
+
+
+def _prepare(report_path: str) -> dict:
+    """
+    The report as an attachment within the configured size limit (encoded
+    once and cached by the mailer, so recipients and replays share it).
+    """
+    if not os.path.exists(report_path):
+        raise FileNotFoundError(f"Report not found: {report_path}")
+    limits = config.get_attachment_limits()
+    return mailer.prepare_attachment(report_path, limits["max_mb"] * 1024 * 1024, limits["oversize"])
+
+
+def _digest_attachments(report_paths: list = None) -> list:
+    """
+    Attachments for a digest: every part of the report if given, still
+    archived and within the limit (parts over it are left out).
+    """
+    if not report_paths or not all(os.path.exists(p) for p in report_paths):
+        return None
+    return [a for p in report_paths for a in _prepare(p)["attachments"] or []] or None
+
+
+def _digest_messages(recipients: list, subject: str, html_content: str, report_paths: list = None) -> list:
+    """One digest email per recipient, all sharing one encoded copy of the attachments."""
+    attachments = _digest_attachments(report_paths)
+    return [mailer.message_for(r, subject, html_content, attachments) for r in recipients]
+
+
+# ========== Outbox ==========
+def _send_tracked(recipients: list, report_paths: list, report_title: str, schedule: str = None,
+                  subject: str = None, html_content: str = None) -> list:
+    """
+    Send the report -- every part of it -- (or, with html_content, a
+    digest) to every recipient, recorded in the outbox first so failures
+    are replayed later.
+    """
+    extra = {"subject": subject, "html": html_content} if html_content is not None else {}
+    ids = jobstore.add_pending([
+        {"schedule": schedule, "to": r, "paths": report_paths, "title": report_title, **extra}
+        for r in recipients
+    ])
+    try:
+        if html_content is not None:
+            results = mailer.send_all(_digest_messages(recipients, subject, html_content, report_paths))
         else:
-            next_run = current_time.replace(month=current_time.month + 1, hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Every 6 months":
-        # Add 6 months
-        new_month = current_time.month + 6
-        new_year = current_time.year
-        if new_month > 12:
-            new_month -= 12
-            new_year += 1
-        next_run = current_time.replace(year=new_year, month=new_month, hour=hour, minute=minute, second=0, microsecond=0)
-    elif frequency == "Yearly":
-        next_run = current_time.replace(year=current_time.year + 1, hour=hour, minute=minute, second=0, microsecond=0)
-    
-    return next_run
+            results = send_report_email(recipients, report_paths, report_title)
+    except Exception as e:
+        jobstore.release(ids, str(e))  # e.g. mail not configured: leave them to a replay
+        raise
+    _record_sends(schedule, results)
+    for e in jobstore.resolve(ids, results):
+        print(f"Giving up on report email to {e['to']} after {e['attempts']} attempts: {e['last_error']}")
+    return results
 
 
-def _send_scheduled_email() -> None:
-    """Send email with the latest report."""
-    if not _email_recipients:
-        print("No email recipients configured")
+def replay_outbox() -> dict:
+    """
+    Retry every undelivered email (REPLAY_WORKERS at a time) -- at
+    startup (restore) and every OUTBOX_REPLAY_S from the engine. Sends
+    still in flight are left alone (jobstore.claim_pending). Report
+    emails whose report left the archive are dropped; digests go out
+    without the attachment. Returns counters.
+    """
+    entries = jobstore.claim_pending()
+    if not entries:
+        return {"sent": 0, "failed": 0, "dropped": 0}
+    try:
+        return _replay(entries)
+    except Exception as e:
+        jobstore.release([entry["id"] for entry in entries], str(e))
+        raise
+
+
+def _replay(entries: list) -> dict:
+    """Send claimed outbox entries, grouped per report / digest."""
+    groups = {}
+    for e in entries:
+        paths = tuple(e.get("paths") or _as_paths(e.get("path")))  # "path": entries from before sharding
+        groups.setdefault((paths, e["title"], e.get("subject"), e.get("html")), []).append(e)
+    ids, schedules, messages, gone = [], [], [], []
+    for (paths, title, subject, html_content), group in groups.items():
+        recipients = [e["to"] for e in group]
+        if html_content is not None:
+            messages += _digest_messages(recipients, subject, html_content, list(paths))
+        elif paths and all(os.path.exists(p) for p in paths):
+            messages += _report_messages(recipients, list(paths), title)
+        else:
+            gone += [e["id"] for e in group]
+            continue
+        ids += [e["id"] for e in group]
+        schedules += [e.get("schedule") for e in group]
+    if gone:
+        jobstore.drop(gone)
+
+    results = mailer.send_all(messages, workers=REPLAY_WORKERS) if messages else []
+    given_up = jobstore.resolve(ids, results)
+    by_schedule = {}
+    for name, r in zip(schedules, results):
+        by_schedule.setdefault(name, []).append(r)
+    for name, group in by_schedule.items():
+        _record_sends(name, group)
+    sent = sum(r["ok"] for r in results)
+    counters = {"sent": sent, "failed": len(results) - sent, "dropped": len(gone) + len(given_up)}
+    print(f"Outbox replay: {counters}")
+    return counters
+
+
+# ========== Job Engine ==========
+def _push(job: dict) -> None:
+    """Queue a job's next run (caller holds _cv) and wake the engine."""
+    heapq.heappush(_heap, (job["next_run"].timestamp(), next(_seq), job["name"], job["version"]))
+    _cv.notify()
+
+
+def _start_engine() -> None:
+    """Start the engine thread unless it is already running (caller holds _cv)."""
+    global _engine_thread, _pool
+    if _engine_thread is not None and _engine_thread.is_alive():
         return
-    
-    # Get latest report from storage
-    reports = storage.list_reports()
-    if not reports:
-        print("No reports available to send")
+    _pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    _engine_thread = threading.Thread(target=_engine_loop, name="scheduler", daemon=True)
+    _engine_thread.start()
+
+
+def _engine_loop() -> None:
+    """
+    Background thread: sleep until the earliest job is due (or the heap
+    changes), then hand it to the worker pool and queue its next run.
+    Also hands metrics flushes and outbox replays to the pool.
+    """
+    global _next_replay
+    with _cv:
+        while not _engine_stopping:
+            # drop entries of removed / rescheduled jobs
+            while _heap and _is_stale(_heap[0]):
+                heapq.heappop(_heap)
+            _maybe_flush()
+            if time.time() >= _next_replay:
+                # failed sends are retried during the session, not only at the next start
+                _next_replay = time.time() + OUTBOX_REPLAY_S
+                _pool.submit(_replay_quietly)
+            if not _heap:
+                _wait(None)
+                continue
+            delay = _heap[0][0] - time.time()
+            if delay > 0:
+                _wait(delay)
+                continue
+
+            due, _, name, _ = heapq.heappop(_heap)
+            job = _jobs[name]
+            try:
+                _dispatch(job, due)
+            except Exception as e:
+                # one broken schedule must not stop the engine; it stays
+                # off the heap until it is changed or the app restarts
+                job["last_error"] = f"Could not schedule: {e}"
+                _mark_dirty()
+                print(f"Schedule '{name}' could not be scheduled; paused: {e}")
+
+
+def _dispatch(job: dict, due: float) -> None:
+    """Engine thread: queue a due job's next run and start this one (caller holds _cv)."""
+    global _queued
+    name = job["name"]
+    job["next_run"] = job["rule"].next_fire(datetime.now())
+    _push(job)
+    _pool.submit(_persist, job, "next_run")  # file write + fsync: not under _cv
+    if time.time() - due > MISFIRE_GRACE_S and job["catch_up"] == "skip":
+        print(f"Schedule '{name}' missed its run (machine asleep?); skipped")
+        _job_metrics(name)["skipped"] += 1
+        _mark_dirty()
         return
-    
-    latest_report = reports[0]  # Already sorted newest-first
-    report_path = latest_report.get("path")
-    report_title = latest_report.get("title", "Report")
-    
-    if not report_path or not os.path.exists(report_path):
-        print(f"Report file not found: {report_path}")
+    if job["running"]:
+        print(f"Schedule '{name}' is still running; skipped this run")
+        _job_metrics(name)["skipped"] += 1
+        _mark_dirty()
         return
+    job["running"] = True
+    _queued += 1
+    job["future"] = _pool.submit(_run_job, job, due)
+
+
+def _replay_quietly() -> None:
+    """Worker thread: the engine's periodic outbox replay."""
+    try:
+        if jobstore.pending_count():
+            replay_outbox()
+    except Exception as e:
+        print(f"Outbox replay failed: {e}")
+
+
+def _wait(delay: float | None) -> None:
+    """Sleep on _cv (caller holds it) until 'delay' passes, or a metrics flush or outbox replay is due."""
+    timeout = _next_replay - time.time()
+    if delay is not None:
+        timeout = min(timeout, delay, MAX_WAIT_S)
+    if _metrics_dirty:
+        timeout = min(timeout, _next_flush - time.time())
+    _cv.wait(max(0.0, timeout))
+
+
+def _is_stale(entry: tuple) -> bool:
+    job = _jobs.get(entry[2])
+    return job is None or job["version"] != entry[3]
+
+
+def _run_job(job: dict, due: float) -> None:
+    """Worker thread: one run of a schedule (due = when it should have started)."""
+    global _queued
+    with _cv:
+        _queued -= 1
+        m = _job_metrics(job["name"])
+        m["last_drift_s"] = round(time.time() - due, 3)
+        m["max_drift_s"] = max(m["max_drift_s"], m["last_drift_s"])
+    t0 = time.perf_counter()
+    error, timings = None, {}
+    try:
+        result = _send_scheduled_email(job["recipients"], job["folders"], job["name"],
+                                       mode=job["mode"], attach=job["digest_attach"])
+        timings = (result or {}).get("timings", {})
+    except Exception as e:
+        error = str(e)
+        print(f"Scheduled email '{job['name']}' failed: {e}")
+    with _cv:
+        job["running"] = False
+        job["last_run"] = datetime.now()
+        job["last_error"] = error
+        job["last_timings"] = timings
+        m["runs"] += 1
+        m["failures"] += error is not None
+        m["last_duration_s"] = round(time.perf_counter() - t0, 3)
+        m["last_stages"] = {k: round(v, 3) for k, v in timings.items() if k != "total"}
+        for stage, secs in m["last_stages"].items():
+            m["_stage_sums"][stage] = m["_stage_sums"].get(stage, 0.0) + secs
+        m["_timed_runs"] += bool(timings)
+        _mark_dirty()
+        if error is None:
+            job["last_success"] = job["last_run"].isoformat(timespec="seconds")
+        _cv.notify_all()  # shutdown() may be waiting for this run
+    if error is None:
+        _persist(job, "last_success")
+
+
+# ========== Metrics ==========
+def get_metrics() -> dict:
+    """
+    Snapshot of scheduler health, cheap enough to poll from the UI:
+      {"updated", "engine_running", "queued_runs", "running", "outbox",
+       "jobs": {name: {"next_run", "last_run", "last_error", "runs",
+                       "failures", "skipped", "last_duration_s",
+                       "last_stages", "avg_stages", "sent", "send_failed",
+                       "retries", "last_drift_s", "max_drift_s"}}}
+    Stages are seconds for scan/export/archive/send; drift is how late a
+    run started (engine wake-up + waiting for a free worker).
+    """
+    with _cv:
+        jobs = {}
+        for name, job in _jobs.items():
+            m = _job_metrics(name)
+            info = {k: v for k, v in m.items() if not k.startswith("_")}
+            info["last_stages"] = dict(m["last_stages"])
+            info["avg_stages"] = {k: round(v / m["_timed_runs"], 3)
+                                  for k, v in m["_stage_sums"].items()} if m["_timed_runs"] else {}
+            info["next_run"] = job["next_run"].strftime("%Y-%m-%d %H:%M:%S")
+            info["last_run"] = job["last_run"].strftime("%Y-%m-%d %H:%M:%S") if job["last_run"] else None
+            info["last_error"] = job["last_error"]
+            jobs[name] = info
+        snapshot = {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "engine_running": _engine_thread is not None and _engine_thread.is_alive(),
+            "queued_runs": _queued,
+            "running": sorted(n for n, j in _jobs.items() if j["running"]),
+            "jobs": jobs,
+        }
+    snapshot["outbox"] = jobstore.pending_count()
+    return snapshot
+
+
+def _job_metrics(name: str) -> dict:
+    """Counters of one schedule (caller holds _cv)."""
+    m = _metrics.get(name)
+    if m is None:
+        m = _metrics[name] = {
+            "runs": 0, "failures": 0, "skipped": 0,
+            "last_duration_s": None, "last_stages": {},
+            "sent": 0, "send_failed": 0, "retries": 0,
+            "last_drift_s": None, "max_drift_s": 0.0,
+            "_stage_sums": {}, "_timed_runs": 0,
+        }
+    return m
+
+
+def _record_sends(schedule: str, results: list) -> None:
+    """Count per-recipient send results against a schedule (if it still exists)."""
+    name = schedule or DEFAULT_SCHEDULE
+    with _cv:
+        if name not in _jobs:
+            return
+        m = _job_metrics(name)
+        for r in results:
+            m["sent" if r["ok"] else "send_failed"] += 1
+            m["retries"] += r["attempts"] - 1
+        _mark_dirty()
+
+
+def _mark_dirty() -> None:
+    """Metrics changed: have the engine flush them (caller holds _cv)."""
+    global _metrics_dirty
+    if not _metrics_dirty:
+        _metrics_dirty = True
+        _cv.notify()
+
+
+def _maybe_flush() -> None:
+    """Engine thread: queue a metrics file write if one is due (caller holds _cv)."""
+    global _metrics_dirty, _next_flush
+    if _metrics_dirty and time.time() >= _next_flush:
+        _metrics_dirty = False
+        _next_flush = time.time() + METRICS_FLUSH_S
+        _pool.submit(_flush_metrics)
+
+
+def _flush_metrics() -> None:
+    try:
+        storage.atomic_write_text(METRICS_FILE, json.dumps(get_metrics(), indent=1))
+    except Exception as e:
+        print(f"Could not write scheduler metrics: {e}")
+
+
+def _send_scheduled_email(recipients: list = None, folders: list = None, schedule: str = None,
+                          mode: str = "full", attach: bool = False) -> dict:
+    """
+    One scheduled run: rescan the folders, build + archive a fresh report
+    and email it (see pipeline.run). Returns the pipeline result.
+    Without any known folders, the newest archived report is sent as is.
+    mode="digest" emails only what changed (see _send_digest).
+    """
+    recipients = _email_recipients if recipients is None else recipients
+    if not recipients:
+        print("No email recipients configured")
+        return None
     
-    send_report_email(_email_recipients, report_path, report_title)
-    print(f"Scheduled email sent to {len(_email_recipients)} recipient(s)")
\ No newline at end of file
+    if not folders:
+        latest_report = storage.latest_report()
+        folders = (latest_report or {}).get("folders") or []
+    if mode == "digest":
+        return _send_digest(recipients, folders, schedule, attach)
+    if folders:
+        result = pipeline.run(
+            folders, send=lambda paths, title: _send_tracked(recipients, paths, title, schedule)
+        )
+        print(f"Scheduled run ({result['rows']} folder(s){', reused report' if result['reused'] else ''}): "
+              f"{pipeline.format_timings(result['timings'])}")
+        results = result["send_results"]
+    else:
+        # Get latest report from storage
+        latest_report = storage.latest_report()
+        if not latest_report:
+            print("No reports available to send")
+            return None
+        
+        report_path = latest_report.get("path")
+        report_title = latest_report.get("title", "Report")
+        
+        if not report_path or not os.path.exists(report_path):
+            print(f"Report file not found: {report_path}")
+            return None
+        
+        results = _send_tracked(recipients, [report_path], report_title, schedule)
+        result = {"send_results": results, "timings": {}}
+
+    sent = sum(r["ok"] for r in results)
+    print(f"Scheduled email sent to {sent}/{len(recipients)} recipient(s)")
+    if not sent:
+        raise Exception("Report could not be delivered to any recipient")
+    return result
+
+
+def _send_digest(recipients: list, folders: list, schedule: str = None, attach: bool = False) -> dict:
+    """
+    Change-only run: rescan and compare with the scan this schedule last
+    reported (jobstore); email just the changed folders, or nothing at all.
+    The baseline moves forward only once a digest reached someone.
+    """
+    if not folders:
+        print("No folders known for the digest")
+        return None
+    key = schedule or DEFAULT_SCHEDULE
+
+    def send(changes, paths, title):
+        attached = _digest_attachments(paths) is not None
+        html_content = digest.render_html(changes, title, attached=attached)
+        subject = f"FilePulse Changes - {title} ({len(changes)} folder(s))"
+        return _send_tracked(recipients, paths, title, schedule,
+                             subject=subject, html_content=html_content)
+
+    result = pipeline.run_digest(folders, jobstore.get_scan(key), send=send, attach=attach)
+    if not result["changes"]:
+        print(f"Digest: no changes in {result['rows']} folder(s); nothing sent")
+        return result
+
+    sent = sum(r["ok"] for r in result["send_results"])
+    print(f"Digest of {len(result['changes'])} change(s) sent to {sent}/{len(recipients)} recipient(s): "
+          f"{pipeline.format_timings(result['timings'])}")
+    if not sent:
+        raise Exception("Digest could not be delivered to any recipient")
+    jobstore.put_scan(key, result["snapshot"])
+    return result
@@ -0,0 +1,314 @@
+# smtp_transport.py
+# SMTP backend for mailer: sends through a relay over a small pool of
+# authenticated connections that stay open across recipients and runs
+# (connect + TLS + AUTH once, not per message). SmtpStubServer is a local
+# stand-in relay for offline checks and the benchmark
+# (python smtp_transport.py).
+from __future__ import annotations
+import base64
+import mimetypes
+import queue
+import smtplib
+import socketserver
+import ssl
+import threading
+import time
+import uuid
+from email import message_from_bytes
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import make_msgid
+from typing import Dict, List
+
+import mailer
+
+POOL_SIZE = 4              # open connections per transport (extra senders wait)
+NOOP_AFTER_S = 15          # idle longer than this: check the connection with NOOP first
+IDLE_TIMEOUT_S = 120       # idle longer than this: reconnect (relays drop idle clients)
+SECURITY_MODES = ("starttls", "ssl", "none")
+
+
+# ---------------- transport ----------------
+
+class SmtpTransport(mailer.Transport):
+    """
+    Sends each message with one SMTP transaction over pooled connections.
+    4xx replies and dropped connections are transient (retried by
+    mailer.send_all); 5xx replies are final. pooled=False opens a fresh
+    connection per message (for comparison).
+    """
+    name = "smtp"
+    supports_batch = False
+
+    def __init__(self, host: str, port: int = 587, username: str | None = None,
+                 password: str | None = None, security: str = "starttls",
+                 from_address: str | None = None, pool_size: int = POOL_SIZE,
+                 pooled: bool = True, timeout: float = 30.0) -> None:
+        if security not in SECURITY_MODES:
+            raise ValueError(f"security must be one of {', '.join(SECURITY_MODES)}")
+        self.host, self.port = host, int(port)
+        self.username, self.password = username, password
+        self.security = security
+        self.from_address = from_address
+        self.pooled = pooled
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle: "queue.LifoQueue[tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+
+    def send(self, message: Dict) -> str:
+        mime = _to_mime(message, self.from_address)
+        data = mime.as_bytes()
+        conn = self._acquire()
+        try:
+            conn.sendmail(mime["From"], [message["to"]], data)
+        except smtplib.SMTPRecipientsRefused as e:
+            self._release(conn)
+            code, reply = next(iter(e.recipients.values()))
+            raise _classify(code, reply)
+        except smtplib.SMTPResponseException as e:
+            self._release(conn)
+            raise _classify(e.smtp_code, e.smtp_error)
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            self._discard(conn)
+            raise mailer.TransientError(f"SMTP connection lost: {e}")
+        except BaseException:
+            self._discard(conn)
+            raise
+        self._release(conn)
+        return mime["Message-ID"]
+
+    def send_batch(self, messages: List[Dict]) -> List[str]:
+        """SMTP has no batch call: one transaction each (send_all fans out instead)."""
+        return [self.send(m) for m in messages]
+
+    def close(self) -> None:
+        """
+        Close idle pooled connections. Ones in use go back to the pool when
+        released (the transport stays usable); a later close() or
+        IDLE_TIMEOUT_S takes care of them.
+        """
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit(conn)
+
+    # --- pool ---
+
+    def _acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                idle = time.monotonic() - last_used
+                if idle > IDLE_TIMEOUT_S:
+                    _quit(conn)
+                elif idle > NOOP_AFTER_S and not _alive(conn):
+                    _quit(conn)
+                else:
+                    return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: smtplib.SMTP) -> None:
+        if self.pooled:
+            try:
+                conn.rset()  # clean state for the next transaction
+                self._idle.put((conn, time.monotonic()))
+            except (smtplib.SMTPException, OSError):
+                _quit(conn)
+        else:
+            _quit(conn)
+        self._slots.release()
+
+    def _discard(self, conn: smtplib.SMTP) -> None:
+        _quit(conn)
+        self._slots.release()
+
+    def _connect(self) -> smtplib.SMTP:
+        try:
+            if self.security == "ssl":
+                conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                        context=ssl.create_default_context())
+            else:
+                conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                if self.security == "starttls":
+                    conn.starttls(context=ssl.create_default_context())
+            if self.username:
+                conn.login(self.username, self.password or "")
+        except smtplib.SMTPAuthenticationError as e:
+            raise RuntimeError(f"SMTP login failed: {e.smtp_code} {_text(e.smtp_error)}")
+        except smtplib.SMTPResponseException as e:
+            raise _classify(e.smtp_code, e.smtp_error)
+        except (smtplib.SMTPException, OSError) as e:
+            raise mailer.TransientError(f"SMTP connect to {self.host}:{self.port} failed: {e}")
+        return conn
+
+
+def _classify(code: int, reply) -> Exception:
+    msg = f"SMTP {code}: {_text(reply)}"
+    return mailer.TransientError(msg) if 400 <= code < 500 else RuntimeError(msg)
+
+
+def _text(reply) -> str:
+    return reply.decode("utf-8", "replace") if isinstance(reply, bytes) else str(reply)
+
+
+def _alive(conn: smtplib.SMTP) -> bool:
+    try:
+        return conn.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def _quit(conn: smtplib.SMTP) -> None:
+    try:
+        conn.quit()
+    except (smtplib.SMTPException, OSError):
+        conn.close()
+
+
+def _to_mime(message: Dict, from_address: str | None = None) -> MIMEMultipart:
+    """mailer message dict -> MIME; attachment content is already base64 and is used as is."""
+    mime = MIMEMultipart("mixed")
+    mime["From"] = from_address or message["from"]
+    mime["To"] = message["to"]
+    mime["Subject"] = message["subject"]
+    mime["Message-ID"] = make_msgid(domain="filepulse")
+    mime.attach(MIMEText(message["html"], "html", "utf-8"))
+    for att in message.get("attachments") or []:
+        ctype = mimetypes.guess_type(att["filename"])[0] or "application/octet-stream"
+        part = MIMEBase(*ctype.split("/", 1))
+        content = att["content"]
+        part.set_payload("\n".join(content[i:i + 76] for i in range(0, len(content), 76)))
+        part["Content-Transfer-Encoding"] = "base64"
+        part.add_header("Content-Disposition", "attachment", filename=att["filename"])
+        mime.attach(part)
+    return mime
+
+
+# ---------------- offline stand-in ----------------
+
+class SmtpStubServer:
+    """
+    Minimal local SMTP relay (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET,
+    NOOP, QUIT) for tests and benchmarks. connect_latency_s models the
+    handshake (TLS + AUTH) cost, latency_s the per-message relay time;
+    failure_rate rejects recipients with 451. Accepted messages land in
+    .received, connections are counted in .connections.
+    """
+
+    def __init__(self, latency_s: float = 0.0, connect_latency_s: float = 0.0,
+                 failure_rate: float = 0.0, port: int = 0, seed: int | None = None) -> None:
+        import random
+        self.latency_s = latency_s
+        self.connect_latency_s = connect_latency_s
+        self.failure_rate = failure_rate
+        self.received: List[Dict] = []
+        self.connections = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(line.encode("ascii") + b"\r\n")
+
+            def handle(self):
+                with stub._lock:
+                    stub.connections += 1
+                time.sleep(stub.connect_latency_s)
+                self.reply("220 filepulse-stub ESMTP")
+                sender, rcpts = None, []
+                for raw in self.rfile:
+                    line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                    verb = line[:4].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250-filepulse-stub\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+                    elif verb == "AUTH":
+                        self.reply("235 Authentication successful")
+                    elif verb == "MAIL":
+                        sender, rcpts = line.split(":", 1)[1].strip(" <>"), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        with stub._lock:
+                            fail = stub._rng.random() < stub.failure_rate
+                        if fail:
+                            self.reply("451 Try again later")
+                        else:
+                            rcpts.append(line.split(":", 1)[1].strip(" <>"))
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        chunks = []
+                        for data in self.rfile:
+                            if data in (b".\r\n", b".\n"):
+                                break
+                            chunks.append(data[1:] if data.startswith(b"..") else data)
+                        time.sleep(stub.latency_s)
+                        with stub._lock:
+                            stub.received.append({"from": sender, "to": rcpts,
+                                                  "message": message_from_bytes(b"".join(chunks))})
+                        self.reply(f"250 OK queued as {uuid.uuid4().hex[:12]}")
+                    elif verb in ("RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def address(self) -> tuple:
+        return self._server.server_address[:2]
+
+    def start(self) -> "SmtpStubServer":
+        threading.Thread(target=self._server.serve_forever, name="smtp-stub", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SmtpStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ---------------- benchmark ----------------
+
+def _bench(n: int = 200, connect_latency_s: float = 0.05, latency_s: float = 0.005) -> None:
+    """python smtp_transport.py [n] [connect_latency_s] [latency_s] -- per-message vs pooled connections."""
+    attachment = [{"filename": "report.pdf",
+                   "content": base64.b64encode(b"%PDF-1.4\n" * 2000).decode("ascii")}]
+    msgs = [mailer.message_for(f"user{i}@example.com", "Bench", "<p>hi</p>", attachment) for i in range(n)]
+    with SmtpStubServer(latency_s=latency_s, connect_latency_s=connect_latency_s) as stub:
+        host, port = stub.address
+        for label, pooled in (("per-message", False), (f"pooled x{POOL_SIZE}", True)):
+            transport = SmtpTransport(host, port, username="bench", password="bench",
+                                      security="none", pooled=pooled)
+            before_conn, before_msgs = stub.connections, len(stub.received)
+            t0 = time.perf_counter()
+            res = mailer.send_all(msgs, transport, backoff_s=0.01)
+            dt = time.perf_counter() - t0
+            transport.close()
+            ok = sum(r["ok"] for r in res)
+            print(f"{label:>12}: {n} messages in {dt:.2f}s ({n / dt:.0f}/s)  ok={ok} "
+                  f"delivered={len(stub.received) - before_msgs} connections={stub.connections - before_conn}")
+
+
+if __name__ == "__main__":
+    import sys
+    args = sys.argv[1:4]
+    _bench(*(f(a) for f, a in zip((int, float, float), args)))
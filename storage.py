@@ -1,41 +1,395 @@
 # storage.py
 from __future__ import annotations
+import gzip
+import hashlib
 import json
 import os
 import shutil
+import sqlite3
+import stat
+import sys
+import tempfile
+import threading
 import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 # App archive folder: ~/Documents/FilePulse/Reports
 APP_DIR = Path.home() / "Documents" / "FilePulse" / "Reports"
-INDEX = APP_DIR / "index.json"
+INDEX = APP_DIR / "index.json"             # legacy catalog, migrated on first use
+
+# Catalog: SQLite (WAL) with indexes on ts and path, so archiving and
+# deleting touch one row instead of rewriting the whole history.
+META_DIR = APP_DIR / ".filepulse"
+CATALOG = META_DIR / "catalog.db"
+LOCK_FILE = META_DIR / "archive.lock"        # cross-process archive lock
+# Content-addressed store: every distinct report body is kept once as
+# blobs/<sha256[:2]>/<sha256>; archive names are hardlinks to it.
+BLOB_DIR = META_DIR / "blobs"
+
+# Archivable report formats: file extension -> kind
+REPORT_KINDS = {
+    ".pdf": "pdf",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".html": "html",
+    ".html.gz": "html",
+    # compressed by the retention policy
+    ".pdf.gz": "pdf",
+    ".csv.gz": "csv",
+    ".jsonl.gz": "jsonl",
+}
 
 
 # ---------------- basics ----------------
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id            INTEGER PRIMARY KEY,
+    ts            INTEGER NOT NULL,      -- when archived (epoch seconds)
+    name          TEXT NOT NULL,         -- filename in archive folder
+    title         TEXT NOT NULL,
+    size          INTEGER NOT NULL,      -- bytes
+    path          TEXT NOT NULL UNIQUE,  -- absolute path to archived copy
+    original_name TEXT NOT NULL,         -- what the user chose when saving
+    kind          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_ts ON reports(ts);
+"""
+# Schema upgrades, applied in order; PRAGMA user_version = number applied
+_MIGRATIONS = [
+    # 1: content-addressed blobs (NULL for entries archived before dedup)
+    """
+    ALTER TABLE reports ADD COLUMN blob TEXT;
+    CREATE INDEX IF NOT EXISTS idx_reports_blob ON reports(blob);
+    """,
+    # 2: how the report body got into the blob store (see _store_blob)
+    """
+    ALTER TABLE reports ADD COLUMN ingest TEXT;
+    """,
+    # 3: small key/value store (e.g. last reconciled folder mtime)
+    """
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """,
+    # 4: search -- scanned source folders (one per line) + title/size indexes
+    """
+    ALTER TABLE reports ADD COLUMN folders TEXT;
+    CREATE INDEX IF NOT EXISTS idx_reports_title ON reports(title COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS idx_reports_size ON reports(size);
+    """,
+    # 5: change feed for live views (statement list: trigger bodies contain ';')
+    [
+        "CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY, op TEXT NOT NULL, "
+        "report_id INTEGER, path TEXT)",
+        "CREATE TRIGGER IF NOT EXISTS reports_changes_ai AFTER INSERT ON reports BEGIN "
+        "INSERT INTO changes (op, report_id, path) VALUES ('insert', new.id, new.path); END",
+        "CREATE TRIGGER IF NOT EXISTS reports_changes_ad AFTER DELETE ON reports BEGIN "
+        "INSERT INTO changes (op, report_id, path) VALUES ('delete', old.id, old.path); END",
+        "CREATE TRIGGER IF NOT EXISTS reports_changes_au AFTER UPDATE ON reports BEGIN "
+        "INSERT INTO changes (op, report_id, path) VALUES ('delete', old.id, old.path); "
+        "INSERT INTO changes (op, report_id, path) VALUES ('insert', new.id, new.path); END",
+    ],
+]
+CHANGES_KEEP = 10_000       # change feed rows kept; older cursors must reload
+CHANGES_BATCH_MAX = 500     # bigger bursts are cheaper to reload than to diff
+_COLUMNS = ("ts", "name", "title", "size", "path", "original_name", "kind", "blob", "ingest", "folders")
+
+# Substring search over title/folders: an FTS5 trigram index kept in sync
+# by triggers. Optional -- SQLite builds without FTS5 (or older than 3.34)
+# fall back to LIKE scans, see _where().
+_SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE reports_search USING fts5("
+    "title, folders, content='reports', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER reports_search_ai AFTER INSERT ON reports BEGIN "
+    "INSERT INTO reports_search (rowid, title, folders) VALUES (new.id, new.title, new.folders); END",
+    "CREATE TRIGGER reports_search_ad AFTER DELETE ON reports BEGIN "
+    "INSERT INTO reports_search (reports_search, rowid, title, folders) "
+    "VALUES ('delete', old.id, old.title, old.folders); END",
+    "CREATE TRIGGER reports_search_au AFTER UPDATE OF title, folders ON reports BEGIN "
+    "INSERT INTO reports_search (reports_search, rowid, title, folders) "
+    "VALUES ('delete', old.id, old.title, old.folders); "
+    "INSERT INTO reports_search (rowid, title, folders) VALUES (new.id, new.title, new.folders); END",
+    "INSERT INTO reports_search (reports_search) VALUES ('rebuild')",
+]
+_search_fts = False   # set by _ensure_search()
+
+_db_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+
+# list_reports() result cache; valid while (our write generation, SQLite's
+# data_version for commits by other processes) is unchanged
+_generation = 0
+_cache_version: tuple | None = None
+_list_cache: Dict[tuple, List[Dict]] = {}
+_LIST_CACHE_MAX = 64
+
+# Archive lock: serializes name reservation, blob create/free and deletes
+# across threads (RLock) and processes (OS file lock on LOCK_FILE)
+_archive_rlock = threading.RLock()
+_archive_depth = 0
+_lock_fh = None
+
+# Group commit: concurrent save_report_copy calls queue their catalog rows
+# and one leader writes the whole queue in a single transaction
+_group_cv = threading.Condition()
+_group_queue: List[Dict] = []
+_group_leader = False
+# Archive names linked by save_report_copy whose row is still queued above;
+# _reconcile must not take them for files added outside the app
+_inflight: set = set()
+
+
 def ensure_repo() -> Path:
     """
-    Ensure the archive folder and index.json exist.
+    Ensure the archive folder and its catalog exist.
     Returns the archive Path.
     """
-    APP_DIR.mkdir(parents=True, exist_ok=True)
-    if not INDEX.exists():
-        INDEX.write_text("[]", encoding="utf-8")
+    _db()
     return APP_DIR
 
 
-def _load_index() -> List[Dict]:
-    ensure_repo()
+def _db() -> sqlite3.Connection:
+    """
+    Shared catalog connection (opened once; callers hold _db_lock).
+    A legacy index.json is imported on first open.
+    """
+    global _conn
+    with _db_lock:
+        if _conn is None:
+            APP_DIR.mkdir(parents=True, exist_ok=True)
+            META_DIR.mkdir(exist_ok=True)
+            conn = sqlite3.connect(str(CATALOG), timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # INSERT OR REPLACE must fire the delete trigger for the rows it replaces
+            conn.execute("PRAGMA recursive_triggers=ON")
+            conn.executescript(_SCHEMA)
+            _upgrade_schema(conn)
+            _ensure_search(conn)
+            _migrate_index(conn)
+            if conn.execute("SELECT 1 FROM reports LIMIT 1").fetchone() is None:
+                _reconcile(conn, force=True)  # rebuild from files already on disk
+            _conn = conn
+        return _conn
+
+
+@contextmanager
+def _write() -> Iterator[sqlite3.Connection]:
+    """One catalog write transaction; invalidates the listing cache on commit."""
+    global _generation
+    with _db_lock:
+        conn = _db()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+        _generation += 1
+
+
+# ---------------- locking & atomic writes ----------------
+
+def _os_lock(fh) -> None:
+    if sys.platform.startswith("win"):
+        import msvcrt
+        fh.seek(0)
+        while True:
+            try:
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.01)
+    else:
+        import fcntl
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+
+
+def _os_unlock(fh) -> None:
+    if sys.platform.startswith("win"):
+        import msvcrt
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def archive_lock() -> Iterator[None]:
+    """
+    Exclusive lock over the archive folder for this thread AND for other
+    FilePulse processes sharing it. Re-entrant within a thread.
+    """
+    global _archive_depth, _lock_fh
+    with _archive_rlock:
+        if _archive_depth == 0:
+            META_DIR.mkdir(parents=True, exist_ok=True)
+            _lock_fh = open(LOCK_FILE, "a+b")
+            _os_lock(_lock_fh)
+        _archive_depth += 1
+        try:
+            yield
+        finally:
+            _archive_depth -= 1
+            if _archive_depth == 0:
+                _os_unlock(_lock_fh)
+                _lock_fh.close()
+                _lock_fh = None
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write via temp file + fsync + rename: readers see the old or new file, never half."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
     try:
-        return json.loads(INDEX.read_text(encoding="utf-8"))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _insert_grouped(item: Dict) -> None:
+    """
+    Queue one catalog row and wait until it is committed. Whichever caller
+    finds no commit in progress becomes leader and flushes everything
+    queued so far in one transaction, repeating until the queue is empty.
+    """
+    global _group_leader
+    slot = {"item": item, "done": False, "error": None}
+    with _group_cv:
+        _group_queue.append(slot)
+        while _group_leader and not slot["done"]:
+            _group_cv.wait()
+        leader = not slot["done"]
+        if leader:
+            _group_leader = True
+    while leader:
+        with _group_cv:
+            batch = list(_group_queue)
+            _group_queue.clear()
+            if not batch:
+                _group_leader = False
+                _group_cv.notify_all()
+                break
+        error = None
+        try:
+            with _write() as conn:
+                _insert_items(conn, [b["item"] for b in batch])
+        except Exception as e:
+            error = e
+        with _group_cv:
+            for b in batch:
+                b["done"], b["error"] = True, error
+            _group_cv.notify_all()
+    if slot["error"] is not None:
+        raise slot["error"]
+
+
+def _upgrade_schema(conn: sqlite3.Connection) -> None:
+    """Apply pending _MIGRATIONS (re-checked under the write lock)."""
+    for i, script in enumerate(_MIGRATIONS, start=1):
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= i:
+            continue
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < i:
+                for stmt in (script if isinstance(script, list) else script.split(";")):
+                    if stmt.strip():
+                        conn.execute(stmt)
+                conn.execute(f"PRAGMA user_version = {i}")
+
+
+def _ensure_search(conn: sqlite3.Connection) -> None:
+    """Create (and fill) the FTS5 search index if this SQLite supports it."""
+    global _search_fts
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'reports_search'").fetchone() is None:
+                for stmt in _SEARCH_SCHEMA:
+                    conn.execute(stmt)
+        conn.execute("SELECT 1 FROM reports_search WHERE reports_search MATCH 'abc' LIMIT 1")
+        _search_fts = True
+    except sqlite3.OperationalError:
+        _search_fts = False
+
+
+def _migrate_index(conn: sqlite3.Connection) -> None:
+    """Import a legacy index.json into the catalog, then rename it out of the way."""
+    if not INDEX.exists():
+        return
+    try:
+        items = json.loads(INDEX.read_text(encoding="utf-8"))
     except Exception:
-        return []
+        items = []
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _insert_items(conn, [it for it in items if isinstance(it, dict) and it.get("path")])
+    try:
+        os.replace(INDEX, INDEX.with_name(INDEX.name + ".migrated"))
+    except FileNotFoundError:
+        pass  # another instance migrated it first (the import is idempotent)
 
 
-def _save_index(items: List[Dict]) -> None:
-    ensure_repo()
-    INDEX.write_text(json.dumps(items, indent=2), encoding="utf-8")
+def _insert_items(conn: sqlite3.Connection, items: List[Dict]) -> None:
+    """Batch insert; an existing entry for the same path is replaced."""
+    conn.executemany(
+        f"INSERT OR REPLACE INTO reports ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+        [_item_values(it) for it in items],
+    )
+
+
+def _item_values(it: Dict) -> tuple:
+    name = it.get("name") or Path(it["path"]).name
+    return (
+        int(it.get("ts", 0)),
+        name,
+        it.get("title") or _report_stem(name),
+        int(it.get("size", 0)),
+        str(it["path"]),
+        it.get("original_name") or name,
+        it.get("kind") or report_kind(name) or "pdf",
+        it.get("blob"),
+        it.get("ingest"),
+        "\n".join(it.get("folders") or []) or None,
+    )
+
+
+def _row_item(row: sqlite3.Row) -> Dict:
+    it = {k: row[k] for k in _COLUMNS}
+    it["folders"] = it["folders"].split("\n") if it["folders"] else []
+    return it
+
+
+def _report_ext(name: str) -> str:
+    """Longest known report extension of 'name' ('.html.gz' before '.gz'), or ''."""
+    low = name.lower()
+    for ext in sorted(REPORT_KINDS, key=len, reverse=True):
+        if low.endswith(ext) and len(low) > len(ext):
+            return ext
+    return ""
+
+
+def _report_stem(name: str) -> str:
+    """Filename without its report extension ('a.html.gz' -> 'a')."""
+    ext = _report_ext(name)
+    return name[:-len(ext)] if ext else Path(name).stem
+
+
+def report_kind(name: str) -> str | None:
+    """Kind of report for a filename ('pdf', 'csv', ...), or None if not a report."""
+    return REPORT_KINDS.get(_report_ext(name))
 
 
 # ---------------- saving ----------------
@@ -51,9 +405,12 @@ def _unique_dest(preferred_name: str) -> Path:
     # Basic sanitize (the source file should already be valid on disk)
     base = "".join(c for c in preferred_name if c not in '\\/:*?"<>|').strip() or "report.pdf"
 
-    # Split name and extension
+    # Split name and extension (keep compound ones like '.html.gz' together)
+    known = len(_report_ext(base))
     dot = base.rfind(".")
-    if dot <= 0:  # no ext or hidden file with no ext
+    if known:
+        stem, ext = base[:-known], base[-known:]
+    elif dot <= 0:  # no ext or hidden file with no ext
         stem, ext = base, ""
     else:
         stem, ext = base[:dot], base[dot:]
@@ -66,75 +423,342 @@ def _unique_dest(preferred_name: str) -> Path:
     return candidate
 
 
-def save_report_copy(src_pdf_path: str, title_hint: str | None = None) -> str:
+def _hash_file(path: Path) -> str:
+    """Streaming SHA-256 of a file (1 MiB chunks)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------- fast copy ----------------
+
+_FICLONE = 0x40049409  # Linux ioctl: share extents (btrfs, XFS, ...)
+
+
+def _copy_reflink(src: Path, dst: Path) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink not supported here")
+    import fcntl
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+
+
+def _copy_kernel(src: Path, dst: Path, call) -> None:
+    """Drive an in-kernel copy loop: call(fd_in, fd_out, offset, remaining) -> bytes."""
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        size = os.fstat(fs.fileno()).st_size
+        off = 0
+        while off < size:
+            n = call(fs.fileno(), fd.fileno(), off, size - off)
+            if n <= 0:
+                raise OSError("in-kernel copy made no progress")
+            off += n
+
+
+def _copy_file_range(src: Path, dst: Path) -> None:
+    _copy_kernel(src, dst, lambda i, o, off, n: os.copy_file_range(i, o, n, off))
+
+
+def _copy_sendfile(src: Path, dst: Path) -> None:
+    if not sys.platform.startswith("linux"):  # file->file sendfile is Linux-only
+        raise OSError("sendfile to a file not supported here")
+    _copy_kernel(src, dst, lambda i, o, off, n: os.sendfile(o, i, off, n))
+
+
+def _copy_userspace(src: Path, dst: Path) -> None:
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        shutil.copyfileobj(fs, fd, 1 << 20)
+
+
+# cheapest first; each raises (and leaves dst to be removed) if unsupported
+_COPY_STRATEGIES = (
+    ("reflink", _copy_reflink),
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _copy_sendfile),
+    ("copy", _copy_userspace),
+)
+
+
+def _fast_copy(src: Path, dst: Path) -> str:
+    """
+    Create dst with src's bytes using the cheapest strategy that works and
+    return its name.
     """
-    Copy an existing PDF into the archive using the SAME filename
-    the user saved. If a clash occurs, auto-dedupe with ' (2)', ' (3)', ...
+    for name, copy in _COPY_STRATEGIES[:-1]:
+        try:
+            copy(src, dst)
+            return name
+        except (OSError, AttributeError, ImportError):
+            try:
+                dst.unlink()
+            except OSError:
+                pass
+    _copy_userspace(src, dst)
+    return "copy"
+
+
+# ---------------- blob store ----------------
 
-    Also appends a record to index.json.
+def _blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / digest
+
+
+def _store_blob(src: Path, move: bool = False) -> tuple[str, str]:
+    """
+    Put src's content into the blob store (once) and return
+    (digest, ingest strategy) -- "dedup" if the blob already existed.
+    Blobs are written via temp file + rename and made read-only, so the
+    archive names linked to them cannot be edited in place.
+
+    move=True hands src over to the archive: it is renamed into the store
+    (or removed, if the content is already there) instead of copied. A
+    src with other hardlinks is still copied, so no outside name ends up
+    sharing -- or changing the mode of -- a blob's inode.
+    """
+    digest = _hash_file(src)
+    blob = _blob_path(digest)
+    if blob.exists():
+        if move:
+            os.unlink(src)
+        return digest, "dedup"
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    tmp = blob.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+    strategy = None
+    if move and os.stat(src).st_nlink == 1:
+        try:
+            os.replace(src, tmp)
+            strategy = "move"
+        except OSError:
+            pass  # other filesystem
+    if strategy is None:
+        strategy = _fast_copy(src, tmp)
+        if move:
+            os.unlink(src)
+    os.chmod(tmp, stat.S_IREAD)
+    os.replace(tmp, blob)
+    return digest, strategy
+
+
+def _link_blob(digest: str, dst: Path) -> None:
+    """Expose a blob under its archive name: hardlink, else a plain copy."""
+    try:
+        os.link(_blob_path(digest), dst)
+    except OSError:
+        shutil.copyfile(_blob_path(digest), dst)
+
+
+def _unlink(p: Path, blob: str | None = None) -> bool:
+    """
+    Remove a (possibly read-only) file; True if it existed. Archive names
+    share their blob's inode, so the mode is never touched on POSIX
+    (unlinking only needs the directory writable). Windows refuses to
+    delete read-only files, and the read-only bit belongs to the inode,
+    not the name: there it is cleared for the unlink and set again on
+    the surviving links (via 'blob', the digest p is linked to).
+    """
+    try:
+        p.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+    except PermissionError:
+        if os.name != "nt":
+            raise
+    os.chmod(p, stat.S_IWRITE | stat.S_IREAD)
+    try:
+        p.unlink()
+    except OSError:
+        os.chmod(p, stat.S_IREAD)
+        raise
+    if blob:
+        try:
+            os.chmod(_blob_path(blob), stat.S_IREAD)
+        except FileNotFoundError:
+            pass
+    return True
+
+
+def _drop_unused_blobs(conn: sqlite3.Connection, digests) -> None:
+    """
+    Refcount check: delete blobs no catalog entry points at any more.
+    A blob that still has other hardlinks belongs to an archive name whose
+    catalog row is about to be committed, so it is kept.
+    """
+    for d in {d for d in digests if d}:
+        if conn.execute("SELECT 1 FROM reports WHERE blob = ? LIMIT 1", (d,)).fetchone() is None:
+            try:
+                blob = _blob_path(d)
+                if os.stat(blob).st_nlink <= 1:
+                    _unlink(blob)
+            except OSError:
+                pass
+
+
+def save_report_copy(src_path: str, title_hint: str | None = None, move: bool = False,
+                     folders: List[str] | None = None) -> str:
+    """
+    Copy an existing report (PDF, CSV, JSON Lines or HTML) into the archive using
+    the SAME filename the user saved. If a clash occurs, auto-dedupe with
+    ' (2)', ' (3)', ...
+
+    Identical content is stored once in the blob store; the archive name
+    is a hardlink to it. New content is ingested with the cheapest copy
+    that works (reflink, in-kernel copy, userspace copy), recorded as
+    "ingest" on the catalog entry. move=True hands src over instead: it
+    is renamed into the archive (ingest "move") and is gone afterwards --
+    for freshly generated files only the caller was going to delete.
+    'folders' (the scanned source folders) are stored for search.
 
     Returns the absolute path to the archived copy.
     """
     ensure_repo()
-    src = Path(src_pdf_path)
+    src = Path(src_path)
     if not src.exists():
-        raise FileNotFoundError(f"Source PDF not found: {src_pdf_path}")
+        raise FileNotFoundError(f"Source report not found: {src_path}")
 
-    dst = _unique_dest(src.name)
-    shutil.copy2(src, dst)
+    with archive_lock():
+        digest, strategy = _store_blob(src, move=move)
+        dst = _unique_dest(src.name)
+        _link_blob(digest, dst)
+        _inflight.add(dst.name)
 
     item = {
         "ts": int(time.time()),           # when archived (epoch seconds)
         "name": dst.name,                 # filename in archive folder
-        "title": (title_hint or src.stem),
+        "title": (title_hint or _report_stem(src.name)),
         "size": dst.stat().st_size,       # bytes
         "path": str(dst),                 # absolute path to archived copy
         "original_name": src.name,        # what the user chose when saving
+        "kind": report_kind(dst.name) or "pdf",
+        "blob": digest,                   # content hash in BLOB_DIR
+        "ingest": strategy,               # dedup / move / reflink / ... / copy
+        "folders": list(folders or []),   # source folders the report covers
     }
-    items = _load_index()
-    items.append(item)
-    _save_index(items)
+    try:
+        _insert_grouped(item)
+    finally:
+        _inflight.discard(dst.name)
     return str(dst)
 
 
 # ---------------- listing ----------------
 
-def list_reports() -> List[Dict]:
+# sort key -> SQL ordering; prefix with "-" for descending
+_SORTS = {
+    "ts": "ts",
+    "title": "title COLLATE NOCASE",
+    "name": "name COLLATE NOCASE",
+    "size": "size",
+}
+
+
+def _like(column: str, text: str) -> tuple[str, str]:
+    esc = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{column} LIKE ? ESCAPE '\\'", f"%{esc}%"
+
+
+def _where(filters: Dict | None, ordered: bool = False) -> tuple[str, list]:
     """
-    Return all archived reports sorted newest-first.
-    If the index is empty/corrupt, reconstruct quickly from files in the folder.
+    SQL WHERE clause for list filters:
+      kind, title / folder (case-insensitive substring), since / until
+      (epoch ts, until exclusive), min_size / max_size (bytes).
+
+    Substring filters of 3+ characters become one lookup in the FTS5
+    trigram index; shorter ones (or no FTS5) scan with LIKE. ordered=True
+    (a sorted, LIMITed listing) probes the match set while walking the
+    sort index, so it stops at LIMIT instead of sorting every match.
     """
-    ensure_repo()
-    items = _load_index()
+    clauses, params, phrases = [], [], []
+    for key, val in (filters or {}).items():
+        if val in (None, ""):
+            continue
+        if key == "kind":
+            clauses.append("kind = ?"); params.append(val)
+        elif key in ("title", "folder"):
+            column, text = ("title" if key == "title" else "folders"), str(val)
+            if _search_fts and len(text) >= 3:
+                phrase = text.replace('"', '""')
+                phrases.append(f'{column} : "{phrase}"')
+            else:
+                sql, arg = _like(column, text)
+                clauses.append(sql); params.append(arg)
+        elif key == "since":
+            clauses.append("ts >= ?"); params.append(int(val))
+        elif key == "until":
+            clauses.append("ts < ?"); params.append(int(val))
+        elif key == "min_size":
+            clauses.append("size >= ?"); params.append(int(val))
+        elif key == "max_size":
+            clauses.append("size <= ?"); params.append(int(val))
+        else:
+            raise ValueError(f"Unknown report filter: {key}")
+    if phrases:
+        probe = "+id" if ordered else "id"
+        clauses.append(f"{probe} IN (SELECT rowid FROM reports_search WHERE reports_search MATCH ?)")
+        params.append(" AND ".join(phrases))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
 
-    if not items:
-        # Rebuild from existing PDFs if any (best-effort)
-        for p in APP_DIR.glob("*.pdf"):
-            try:
-                st = p.stat()
-            except OSError:
-                continue
-            items.append({
-                "ts": int(st.st_mtime),
-                "name": p.name,
-                "title": p.stem,
-                "size": st.st_size,
-                "path": str(p),
-                "original_name": p.name,
-            })
-        _save_index(items)
 
-    items.sort(key=lambda x: x.get("ts", 0), reverse=True)
-    return items
+def _cached(key: tuple, query) -> List[Dict]:
+    """Serve 'key' from the listing cache, running query(conn) on a miss."""
+    global _cache_version
+    with _db_lock:
+        conn = _db()
+        version = (_generation, conn.execute("PRAGMA data_version").fetchone()[0])
+        if version != _cache_version or len(_list_cache) >= _LIST_CACHE_MAX:
+            _list_cache.clear()
+            _cache_version = version
+        items = _list_cache.get(key)
+        if items is None:
+            items = _list_cache[key] = query(conn)
+    return [dict(it) for it in items]
+
+
+def list_reports(offset: int = 0, limit: int | None = None, sort: str = "-ts",
+                 filters: Dict | None = None) -> List[Dict]:
+    """
+    Return archived reports, newest-first by default.
+
+    offset/limit page through the result; sort is one of ts, title, name,
+    size (prefix "-" for descending); filters see _where(). Results are
+    cached in-process until the catalog changes.
+    """
+    col = _SORTS.get(sort.lstrip("-"))
+    if col is None:
+        raise ValueError(f"Unknown report sort: {sort}")
+    order = "DESC" if sort.startswith("-") else "ASC"
+    where, params = _where(filters, ordered=True)
+    sql = (f"SELECT * FROM reports{where} ORDER BY {col} {order}, id {order} "
+           f"LIMIT ? OFFSET ?")
+    args = params + [-1 if limit is None else int(limit), int(offset)]
+    key = ("list", sql, tuple(args))
+    return _cached(key, lambda conn: [_row_item(r) for r in conn.execute(sql, args)])
+
+
+def count_reports(filters: Dict | None = None) -> int:
+    """Number of reports matching 'filters' (for paging)."""
+    where, params = _where(filters)
+    sql = f"SELECT COUNT(*) AS n FROM reports{where}"
+    key = ("count", sql, tuple(params))
+    return _cached(key, lambda conn: [{"n": conn.execute(sql, params).fetchone()["n"]}])[0]["n"]
+
+
+def latest_report() -> Dict | None:
+    """Newest archived report, or None (one indexed row, no full listing)."""
+    items = list_reports(limit=1)
+    return items[0] if items else None
 
 
 # ---------------- optional helpers ----------------
 
 def delete_report(path_or_name: str) -> bool:
     """
-    Delete a report both from disk and index.json.
+    Delete a report both from disk and the catalog.
     Accepts either the absolute path or the filename inside APP_DIR.
-    Returns True if something was deleted.
+    Returns True if something was deleted; a file that can't be removed
+    keeps its catalog row (False).
     """
     ensure_repo()
     # Resolve path
@@ -142,19 +766,404 @@ def delete_report(path_or_name: str) -> bool:
     if not p.is_absolute():
         p = APP_DIR / path_or_name
 
-    deleted = False
-    try:
-        if p.exists():
-            p.unlink()
-            deleted = True
-    except Exception:
-        pass
+    with archive_lock():
+        with _db_lock:
+            row = _db().execute("SELECT blob FROM reports WHERE path = ?", (str(p),)).fetchone()
+        try:
+            deleted = _unlink(p, row["blob"] if row is not None else None)
+        except OSError as e:
+            # keep the row: the file is still there and would be re-added as external
+            print(f"Couldn't delete {p}: {e}")
+            return False
 
-    # Update index
-    items = _load_index()
-    new_items = [it for it in items if Path(it.get("path", "")) != p]
-    if len(new_items) != len(items):
-        _save_index(new_items)
-        deleted = True
+        # Update catalog (indexed on path), then free the blob if now unused
+        with _write() as conn:
+            row = conn.execute("SELECT blob FROM reports WHERE path = ?", (str(p),)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM reports WHERE path = ?", (str(p),))
+                _drop_unused_blobs(conn, [row["blob"]])
+                deleted = True
 
     return deleted
+
+
+# ---------------- reconciliation ----------------
+
+def _dir_stamp() -> str:
+    return str(os.stat(APP_DIR).st_mtime_ns)
+
+
+def _reconcile(conn: sqlite3.Connection, force: bool = False) -> Dict:
+    """
+    Diff APP_DIR against the catalog in one scandir pass and apply the
+    difference in one transaction. Skipped while the folder's mtime
+    (changed by any create/delete/rename inside it) matches the last run.
+    """
+    stamp = _dir_stamp()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+    if not force and row is not None and row["value"] == stamp:
+        return {"scanned": False, "added": 0, "updated": 0, "removed": 0}
+
+    on_disk = {}
+    with os.scandir(APP_DIR) as it:
+        for entry in it:
+            kind = report_kind(entry.name)
+            if kind is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()  # cached by scandir on Windows
+            except OSError:
+                continue
+            on_disk[entry.name] = (st, kind)
+
+    known = {}
+    for r in conn.execute("SELECT id, name, path, size, blob FROM reports"):
+        p = Path(r["path"])
+        if p.parent == APP_DIR:
+            known[p.name] = r
+
+    added = []
+    for name, (st, kind) in on_disk.items():
+        if name not in known and name not in _inflight:
+            added.append({
+                "ts": int(st.st_mtime),
+                "name": name,
+                "title": _report_stem(name),
+                "size": st.st_size,
+                "path": str(APP_DIR / name),
+                "original_name": name,
+                "kind": kind,
+                "ingest": "external",  # found on disk, not archived by the app
+            })
+    updated = [(on_disk[n][0].st_size, r["id"]) for n, r in known.items()
+               if n in on_disk and on_disk[n][0].st_size != r["size"]]
+    removed = [r for n, r in known.items() if n not in on_disk]
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if added:
+            _insert_items(conn, added)
+        if updated:
+            conn.executemany("UPDATE reports SET size = ? WHERE id = ?", updated)
+        if removed:
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(r["id"],) for r in removed])
+            _drop_unused_blobs(conn, [r["blob"] for r in removed])
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)", (stamp,))
+        conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                     (CHANGES_KEEP,))
+    return {"scanned": True, "added": len(added), "updated": len(updated), "removed": len(removed)}
+
+
+def reconcile(force: bool = False) -> Dict:
+    """
+    Bring the catalog in line with files added, changed or deleted outside
+    the app. Costs one stat() when nothing changed, so it is safe to call
+    on every refresh. Returns counters.
+    """
+    global _generation
+    ensure_repo()
+    with archive_lock(), _db_lock:
+        res = _reconcile(_db(), force=force)
+        if res["added"] or res["updated"] or res["removed"]:
+            _generation += 1
+    return res
+
+
+# ---------------- change feed ----------------
+
+def change_cursor() -> int:
+    """Position of the newest catalog change (pass to changes_since later)."""
+    with _db_lock:
+        return _db().execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+
+def changes_since(cursor: int, filters: Dict | None = None) -> Dict:
+    """
+    Catalog changes after 'cursor', from any thread or process, collapsed
+    to their net effect for a view showing 'filters' (see _where()):
+      added   -- current entries that were inserted/updated and match
+      removed -- paths that left the view (deleted, renamed, no longer match)
+      cursor  -- pass this next time
+      reset   -- True if the feed no longer reaches back to 'cursor' (or
+                 the burst is huge): reload the view instead
+    """
+    with _db_lock:
+        conn = _db()
+        rows = conn.execute(
+            "SELECT seq, op, report_id, path FROM changes WHERE seq > ? ORDER BY seq", (cursor,)
+        ).fetchall()
+        oldest = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+        if not rows:
+            return {"cursor": cursor, "added": [], "removed": [], "reset": False}
+        new_cursor = rows[-1]["seq"]
+        if (oldest is not None and oldest > cursor + 1) or len(rows) > CHANGES_BATCH_MAX:
+            return {"cursor": new_cursor, "added": [], "removed": [], "reset": True}
+
+        removed = {r["path"] for r in rows if r["op"] == "delete"}
+        ids = sorted({r["report_id"] for r in rows if r["op"] == "insert"})
+        added = []
+        if ids:
+            marks = ", ".join("?" * len(ids))
+            present = conn.execute(f"SELECT id, path FROM reports WHERE id IN ({marks})", ids).fetchall()
+            where, params = _where(filters)
+            where = (where + " AND " if where else " WHERE ") + f"id IN ({marks})"
+            added = [_row_item(r) for r in conn.execute(f"SELECT * FROM reports{where}", params + ids)]
+            removed |= {r["path"] for r in present}  # present but filtered out
+        removed -= {it["path"] for it in added}
+    return {"cursor": new_cursor, "added": added, "removed": sorted(removed), "reset": False}
+
+
+# ---------------- retention ----------------
+
+_compaction_lock = threading.Lock()
+_compaction_wake = threading.Event()
+_compaction_thread: threading.Thread | None = None
+
+
+def _bucket(ts: int, every: str) -> tuple:
+    d = datetime.fromtimestamp(ts).date()
+    return tuple(d.isocalendar()[:2]) if every == "week" else (d.year, d.month, d.day)
+
+
+def plan_retention(items: List[Dict], policy: Dict, now: float | None = None) -> tuple[List[Dict], List[Dict]]:
+    """
+    Decide what a retention policy (see config.get_retention) removes and
+    compresses. 'items' must be newest-first. Returns (to_delete, to_compress).
+
+    - only the newest keep_last reports are kept (0 = no limit)
+    - reports older than max_age_days are deleted
+    - reports older than thin_after_days keep only the newest per day/week
+    - surviving reports older than compress_after_days are gzipped
+    """
+    now = time.time() if now is None else now
+    keep_last = int(policy.get("keep_last") or 0)
+    max_age = int(policy.get("max_age_days") or 0)
+    thin_after = int(policy.get("thin_after_days") or 0)
+    every = policy.get("thin_every") or "day"
+    compress_after = int(policy.get("compress_after_days") or 0)
+
+    to_delete, to_compress, buckets = [], [], set()
+    for i, it in enumerate(items):
+        age_days = (now - it["ts"]) / 86400
+        drop = False
+        if thin_after and age_days > thin_after:
+            b = _bucket(it["ts"], every)
+            drop = b in buckets
+            buckets.add(b)
+        if max_age and age_days > max_age:
+            drop = True
+        if keep_last and i >= keep_last:
+            drop = True
+        if drop:
+            to_delete.append(it)
+        elif (compress_after and age_days > compress_after
+              and not it["name"].lower().endswith(".gz")):
+            to_compress.append(it)
+    return to_delete, to_compress
+
+
+def _gzip_entry(it: Dict) -> Dict:
+    """Gzip one archived report into a new blob + '<name>.gz'; returns new fields."""
+    src = _blob_path(it["blob"]) if it.get("blob") else Path(it["path"])
+    if not src.exists():
+        src = Path(it["path"])
+    fd, tmp = tempfile.mkstemp(prefix="gz-", dir=str(META_DIR))
+    os.close(fd)
+    try:
+        # fixed header (no name/mtime) so equal reports still dedup once gzipped
+        with open(src, "rb") as fi, open(tmp, "wb") as raw, \
+                gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as fo:
+            shutil.copyfileobj(fi, fo, 1 << 20)
+        digest, strategy = _store_blob(Path(tmp), move=True)
+    finally:
+        try:
+            os.unlink(tmp)  # only left over if gzip or the store failed
+        except FileNotFoundError:
+            pass
+    dst = _unique_dest(it["name"] + ".gz")
+    _link_blob(digest, dst)
+    return {"name": dst.name, "path": str(dst), "size": dst.stat().st_size,
+            "blob": digest, "ingest": "gzip"}
+
+
+def apply_retention(policy: Dict, now: float | None = None) -> Dict:
+    """
+    Apply a retention policy to the whole archive. File work happens first;
+    the catalog is then updated in ONE transaction. Returns counters.
+    """
+    if not any(policy.get(k) for k in ("keep_last", "max_age_days", "thin_after_days",
+                                       "compress_after_days")):
+        return {"deleted": 0, "compressed": 0, "freed_bytes": 0}
+
+    with _compaction_lock, archive_lock():
+        with _db_lock:
+            items = [dict(r) for r in _db().execute(
+                "SELECT id, ts, name, path, size, blob FROM reports ORDER BY ts DESC, id DESC")]
+        to_delete, to_compress = plan_retention(items, policy, now)
+        if not to_delete and not to_compress:
+            return {"deleted": 0, "compressed": 0, "freed_bytes": 0}
+
+        updates = []
+        for it in to_compress:
+            try:
+                updates.append((it, _gzip_entry(it)))
+            except OSError as e:
+                print(f"Couldn't compress {it['path']}: {e}")
+        # visible files go before the commit: a crash leaves catalog rows
+        # pointing at missing files, never unlisted files. One that can't
+        # be removed keeps its row as is (else reconcile re-adds it).
+        failed, kept = set(), []
+        for it in to_delete + [it for it, _ in updates]:
+            try:
+                _unlink(Path(it["path"]), it["blob"])
+            except OSError as e:
+                print(f"Couldn't remove {it['path']}: {e}")
+                failed.add(it["id"])
+        if failed:
+            to_delete = [it for it in to_delete if it["id"] not in failed]
+            kept = [n for it, n in updates if it["id"] in failed]  # their unused .gz copies
+            updates = [(it, n) for it, n in updates if it["id"] not in failed]
+            for n in kept:
+                try:
+                    _unlink(Path(n["path"]), n["blob"])
+                except OSError as e:
+                    print(f"Couldn't remove {n['path']}: {e}")
+
+        with _write() as conn:
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(it["id"],) for it in to_delete])
+            conn.executemany(
+                "UPDATE reports SET name = ?, path = ?, size = ?, blob = ?, ingest = ? WHERE id = ?",
+                [(n["name"], n["path"], n["size"], n["blob"], n["ingest"], it["id"]) for it, n in updates],
+            )
+            _drop_unused_blobs(conn, [it["blob"] for it in to_delete] + [it["blob"] for it, _ in updates]
+                               + [n["blob"] for n in kept])
+
+    freed = sum(it["size"] for it in to_delete) + sum(it["size"] - n["size"] for it, n in updates)
+    return {"deleted": len(to_delete), "compressed": len(updates), "freed_bytes": freed}
+
+
+def start_compaction(get_policy, interval_s: float = 6 * 3600, initial_delay_s: float = 60) -> None:
+    """
+    Run apply_retention(get_policy()) on a daemon thread every interval_s
+    (first pass after initial_delay_s). Never blocks the caller.
+    """
+    global _compaction_thread
+    if _compaction_thread is not None and _compaction_thread.is_alive():
+        return
+
+    def loop() -> None:
+        delay = initial_delay_s
+        while True:
+            _compaction_wake.wait(delay)
+            _compaction_wake.clear()
+            delay = interval_s
+            try:
+                res = apply_retention(get_policy())
+                if res["deleted"] or res["compressed"]:
+                    print(f"Archive compaction: {res}")
+            except Exception as e:
+                print(f"Archive compaction failed: {e}")
+
+    _compaction_thread = threading.Thread(target=loop, name="archive-compaction", daemon=True)
+    _compaction_thread.start()
+
+
+def request_compaction() -> None:
+    """Wake the compaction thread now (e.g. after the policy changed)."""
+    _compaction_wake.set()
+
+
+# ---------------- benchmark ----------------
+
+def _bench_ingest(size_mb: int = 256) -> None:
+    """python storage.py [MB] -- time each copy strategy on a large file."""
+    # temp dir on the archive's filesystem, so reflink results are representative
+    META_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="bench-", dir=str(META_DIR)) as tmp:
+        src = Path(tmp) / "big.pdf"
+        with open(src, "wb") as f:
+            block = os.urandom(1 << 20)
+            for _ in range(size_mb):
+                f.write(block)
+        t0 = time.perf_counter()
+        _hash_file(src)
+        print(f"{size_mb} MB  sha256: {time.perf_counter() - t0:.3f}s")
+        for name, copy in _COPY_STRATEGIES:
+            dst = Path(tmp) / f"{name}.pdf"
+            t0 = time.perf_counter()
+            try:
+                copy(src, dst)
+            except (OSError, AttributeError, ImportError) as e:
+                print(f"{size_mb} MB  {name}: unsupported ({e})")
+                continue
+            print(f"{size_mb} MB  {name}: {time.perf_counter() - t0:.3f}s")
+            dst.unlink()
+        print(f"auto-selected: {_fast_copy(src, Path(tmp) / 'auto.pdf')}")
+
+
+def _use_archive(root: Path) -> None:
+    """Point this process at another archive folder (benchmarks / stress runs)."""
+    global APP_DIR, INDEX, META_DIR, CATALOG, LOCK_FILE, BLOB_DIR, _conn
+    APP_DIR = Path(root)
+    INDEX = APP_DIR / "index.json"
+    META_DIR = APP_DIR / ".filepulse"
+    CATALOG = META_DIR / "catalog.db"
+    LOCK_FILE = META_DIR / "archive.lock"
+    BLOB_DIR = META_DIR / "blobs"
+    _conn = None
+
+
+def _stress_worker(args: tuple) -> int:
+    root, proc, threads, per_thread = args
+    _use_archive(Path(root))
+    src_dir = Path(root) / f"src-{proc}"
+    src_dir.mkdir(parents=True, exist_ok=True)
+
+    def archive(t: int) -> None:
+        for i in range(per_thread):
+            src = src_dir / f"report-{t}-{i}.pdf"
+            # every 4th body repeats across workers to exercise dedup/refcounts
+            body = f"shared {i}" if i % 4 == 0 else f"unique {proc}-{t}-{i}"
+            src.write_text(body)
+            save_report_copy(str(src), title_hint=f"p{proc}")
+
+    pool = [threading.Thread(target=archive, args=(t,)) for t in range(threads)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    return threads * per_thread
+
+
+def _stress(procs: int = 4, threads: int = 8, per_thread: int = 25) -> None:
+    """
+    python storage.py stress [procs] [threads] [n] -- many concurrent
+    archivers in several processes; fails if any catalog entry is lost.
+    """
+    import multiprocessing
+    with tempfile.TemporaryDirectory(prefix="filepulse-stress-") as root:
+        t0 = time.perf_counter()
+        with multiprocessing.Pool(procs) as pool:
+            expected = sum(pool.map(_stress_worker, [(root, p, threads, per_thread) for p in range(procs)]))
+        dt = time.perf_counter() - t0
+
+        _use_archive(Path(root))
+        items = list_reports()
+        names = {it["name"] for it in items}
+        missing = [it["path"] for it in items if not Path(it["path"]).exists()]
+        blobs = {it["blob"] for it in items}
+        print(f"{expected} archived in {dt:.2f}s ({expected / dt:.0f}/s); "
+              f"catalog={len(items)} unique names={len(names)} blobs={len(blobs)} missing files={len(missing)}")
+        assert len(items) == expected == len(names), "catalog lost or duplicated entries"
+        assert not missing, "catalog points at missing files"
+        assert all(_blob_path(b).exists() for b in blobs), "referenced blob was freed"
+        print("OK")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "stress":
+        _stress(*(int(a) for a in sys.argv[2:5]))
+    else:
+        _bench_ingest(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -1,21 +1,35 @@
 import os
-import time
-from datetime import datetime, timezone
+import queue
+import shutil
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 import config
+import pipeline
+import report
+import report_cache
+import scan
 import storage
 from preview import FilePreview  # renders the table (HTML or Treeview)
 
 
 class TabOne(ttk.Frame):
+    POLL_MS = 100  # how often the background rescan is checked for results
+
     def __init__(self, parent) -> None:
         super().__init__(parent)
-        self._folders: list[str] = []   # selected folders
-        self._rows: list[dict] = []     # one row per folder
+        # Saved folders come back with their last known rows straight away;
+        # a full background rescan then brings them up to date (in-place
+        # edits included, which the directory cache would miss).
+        self._folders: list[str] = config.get_folders()    # selected folders
+        self._rows: list[dict] = scan.cached_rows(self._folders)  # one row per folder
+        self._results: queue.Queue = queue.Queue()   # rescan worker -> UI thread
+        self._refreshing = False
         self._build_ui()
         config.register_callback(lambda *_: self._recompute_states_and_render())
+        if self._folders:
+            self._revalidate()
 
     def _build_ui(self) -> None:
         # Toolbar
@@ -25,8 +39,13 @@ class TabOne(ttk.Frame):
         ttk.Button(bar, text="Add Folder", command=self._on_add_folder).pack(
             side="left", padx=(10, 8), pady=10
         )
+        ttk.Button(bar, text="Remove...", command=self._on_remove_folders).pack(side="left", padx=(0, 8))
+        ttk.Button(bar, text="Clear", command=self._on_clear_folders).pack(side="left", padx=(0, 8))
         self._count_var = tk.StringVar(value="Folders: 0")
         ttk.Label(bar, textvariable=self._count_var).pack(side="left", padx=(0, 10))
+        self._cache_var = tk.StringVar()
+        ttk.Label(bar, textvariable=self._cache_var, foreground="gray").pack(side="right", padx=10)
+        self._update_cache_status()
 
         # Body uses grid: preview fills row 0, generate row stays at bottom
         body = ttk.Frame(self)
@@ -39,10 +58,17 @@ class TabOne(ttk.Frame):
         self._preview = FilePreview(body, theme="light")
         self._preview.widget.grid(row=0, column=0, sticky="nsew", padx=10, pady=(0, 8))
 
-        # Generate button (always visible)
+        # Generate button (always visible) + PDF summary options
         btn_row = ttk.Frame(body)
         btn_row.grid(row=1, column=0, sticky="e", padx=10, pady=(0, 10))
-        ttk.Button(btn_row, text="Generate", command=self._on_generate).pack()
+        self._summary_var = tk.BooleanVar(value=False)
+        self._top_n_var = tk.StringVar(value=str(report.SUMMARY_TOP_N))
+        self._appendix_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_row, text="Summary PDF", variable=self._summary_var).pack(side="left")
+        ttk.Label(btn_row, text="Top N").pack(side="left", padx=(10, 4))
+        ttk.Spinbox(btn_row, from_=1, to=500, width=5, textvariable=self._top_n_var).pack(side="left")
+        ttk.Checkbutton(btn_row, text="Appendix", variable=self._appendix_var).pack(side="left", padx=(10, 0))
+        ttk.Button(btn_row, text="Generate", command=self._on_generate).pack(side="left", padx=(16, 0))
 
         self._render()
 
@@ -56,131 +82,182 @@ class TabOne(ttk.Frame):
             return
 
         self._folders.append(folder)
-        row = self._folder_row(folder)
+        config.set_folders(self._folders)
+        row = scan.folder_row(folder, use_cache=False)
+        scan.save_cache()
+        scan.remember_rows([row])
         if not any(r["file_path"] == row["file_path"] for r in self._rows):
             self._rows.append(row)
         self._render()
 
+    def _on_remove_folders(self) -> None:
+        """Pick tracked folders to stop tracking (the preview has no row selection)."""
+        if not self._folders:
+            messagebox.showinfo("No folders", "There are no folders to remove.")
+            return
+        win = tk.Toplevel(self)
+        win.title("Remove folders")
+        win.transient(self.winfo_toplevel())
+        listbox = tk.Listbox(win, selectmode="extended", width=70, height=min(15, len(self._folders)))
+        listbox.pack(fill="both", expand=True, padx=10, pady=(10, 6))
+        for folder in self._folders:
+            listbox.insert("end", folder)
+
+        def remove():
+            picked = [self._folders[i] for i in listbox.curselection()]
+            win.destroy()
+            self._remove_folders(picked)
+
+        buttons = ttk.Frame(win)
+        buttons.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Cancel", command=win.destroy).pack(side="right")
+        ttk.Button(buttons, text="Remove", command=remove).pack(side="right", padx=(0, 8))
+        win.grab_set()
+
+    def _on_clear_folders(self) -> None:
+        if not self._folders:
+            return
+        if messagebox.askyesno("Clear folders", f"Stop tracking all {len(self._folders)} folder(s)?"):
+            self._remove_folders(list(self._folders))
+
+    def _remove_folders(self, folders: list[str]) -> None:
+        if not folders:
+            return
+        gone = set(map(os.path.normpath, folders))
+        self._folders = [f for f in self._folders if os.path.normpath(f) not in gone]
+        config.set_folders(self._folders)
+        # a rescan still running drops them too: _poll_results keeps only tracked folders
+        self._rows = [r for r in self._rows if r["file_path"] not in gone]
+        self._render()
+
+    def _revalidate(self) -> None:
+        """Rescan the saved folders off the UI thread, measuring every file (no scan cache)."""
+        folders = list(self._folders)
+
+        def work():
+            try:
+                self._results.put((scan.scan_folders(folders, use_cache=False), None))
+            except Exception as e:
+                self._results.put(([], e))
+
+        self._refreshing = True
+        self._render()
+        threading.Thread(target=work, name="folder-rescan", daemon=True).start()
+        self.after(self.POLL_MS, self._poll_results)
+
+    def _poll_results(self) -> None:
+        try:
+            rows, error = self._results.get_nowait()
+        except queue.Empty:
+            self.after(self.POLL_MS, self._poll_results)
+            return
+        self._refreshing = False
+        if error is not None:
+            print(f"Couldn't refresh folders: {error}")
+        # folders added meanwhile keep the row they got when added
+        fresh = {r["file_path"]: r for r in rows}
+        current = {r["file_path"]: r for r in self._rows}
+        current.update(fresh)
+        self._rows = [current[f] for f in map(os.path.normpath, self._folders) if f in current]
+        self._render()
+
     def _on_generate(self) -> None:
         if not self._rows:
             messagebox.showinfo("Nothing to export", "Please add at least one folder.")
             return
-        # Let the user pick their own save path
+        if self._refreshing:
+            # restored rows may be out of date until the rescan lands
+            messagebox.showinfo("Refreshing", "Folder sizes are still being refreshed.\n"
+                                              "Please try again in a moment.")
+            return
+        # Let the user pick their own save path; the extension picks the format
         fpath = filedialog.asksaveasfilename(
-            title="Save PDF",
+            title="Save report",
             defaultextension=".pdf",
             initialfile="preview_report.pdf",
-            filetypes=[("PDF files", "*.pdf")],
+            filetypes=[
+                ("PDF files", "*.pdf"),
+                ("CSV files", "*.csv"),
+                ("JSON Lines files", "*.jsonl"),
+                ("HTML report", "*.html"),
+                ("Compressed HTML report", "*.html.gz"),
+            ],
         )
         if not fpath:
             return
+        kind = storage.report_kind(fpath) or "pdf"
+        if kind == "pdf":
+            options = self._summary_options()
+        elif kind == "html":
+            options = {"gzip": fpath.lower().endswith(".gz")}
+        else:
+            options = None
         try:
-            # 1) Write the chosen PDF
-            self._preview.export_pdf(fpath, self._rows)
+            # Same rows + thresholds as an archived report -> reuse it as-is
+            key = report_cache.report_key(self._rows, kind, options)
+            cached = report_cache.lookup(key)
+            if cached:
+                written = self._copy_cached(cached, fpath)
+                archived = cached
+            else:
+                # 1) Write the chosen file
+                written = self._export(fpath, kind, options)
 
-            # 2) Also archive a copy in ~/Documents/FilePulse/Reports
-            # use the first folder's name (or "report") as hint
-            title_hint = os.path.basename(self._rows[0].get("file_name") or "report")
-            archived = storage.save_report_copy(fpath, title_hint=title_hint)
+                # 2) Also archive a copy in ~/Documents/FilePulse/Reports
+                # use the first folder's name (or "report") as hint
+                title_hint = os.path.basename(self._rows[0].get("file_name") or "report")
+                archived = [storage.save_report_copy(p, title_hint=title_hint, folders=self._folders)
+                            for p in written]
+                report_cache.remember(key, archived)
 
             messagebox.showinfo(
                 "Saved",
-                f"PDF saved:\n{fpath}\n\nArchived copy:\n{archived}"
+                "Report saved:\n{}\n\n{}:\n{}".format(
+                    "\n".join(written),
+                    "Reused archived report (unchanged)" if cached else "Archived copy",
+                    "\n".join(archived),
+                )
             )
         except Exception as e:
-            messagebox.showerror("Export failed", f"Couldn't create PDF:\n{e}")
-    # --- helpers (unchanged) ---
-    def _folder_row(self, folder: str) -> dict:
+            messagebox.showerror("Export failed", f"Couldn't create report:\n{e}")
+        finally:
+            self._update_cache_status()
+
+    def _summary_options(self) -> dict | None:
+        """Summary-mode settings from the toolbar, or None for the full report."""
+        if not self._summary_var.get():
+            return None
         try:
-            st = os.stat(folder)
-            last_modified_ts = st.st_mtime
-            last_modified_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_modified_ts))
-        except OSError:
-            last_modified_ts = None
-            last_modified_str = "—"
-
-        total_size = self._folder_size_bytes(folder)
-
-        neglect_seconds = None
-        neglect_str = "—"
-        if last_modified_ts is not None:
-            now_ts = datetime.now(timezone.utc).timestamp()
-            neglect_seconds = max(0, int(now_ts - last_modified_ts))
-            neglect_str = _format_duration(neglect_seconds)
-
-        state = self._compute_state(neglect_seconds)
-
-        return {
-            "file_path": folder,
-            "file_size": total_size,
-            "last_modified": last_modified_str,
-            "last_worked_by": "—",
-            "file_name": os.path.basename(folder) or folder,
-            "file_neglect_time": neglect_str,
-            "neglect_seconds": neglect_seconds,
-            "file_state": state,
-        }
-
-    def _compute_state(self, neglect_seconds: int | None) -> str:
-        if neglect_seconds is None:
-            return "red"
-        days = neglect_seconds // 86400
-        g, a, r = config.get_thresholds()
-        if days <= g:
-            return "green"
-        elif days <= a:
-            return "amber"
+            top_n = max(1, int(self._top_n_var.get()))
+        except ValueError:
+            top_n = report.SUMMARY_TOP_N
+        return {"summary": True, "top_n": top_n, "appendix": bool(self._appendix_var.get())}
+
+    def _export(self, fpath: str, kind: str, options: dict | None = None) -> list[str]:
+        """Write the report in the given format; returns the file(s) written."""
+        # same export path as scheduled runs
+        return pipeline.export(fpath, self._rows, kind, options)
+
+    def _copy_cached(self, cached: list[str], fpath: str) -> list[str]:
+        """Copy a cached archived report (or its parts) to the user's chosen path."""
+        if len(cached) == 1:
+            targets = [fpath]
         else:
-            return "red"
+            targets = [report.part_path(fpath, i + 1, len(cached)) for i in range(len(cached))]
+        for src, dst in zip(cached, targets):
+            shutil.copyfile(src, dst)
+        return targets
+
+    def _update_cache_status(self) -> None:
+        st = report_cache.stats()
+        self._cache_var.set(f"Report cache: {st['hits']} hits / {st['misses']} misses")
 
     def _recompute_states_and_render(self) -> None:
         for r in self._rows:
-            r["file_state"] = self._compute_state(r.get("neglect_seconds"))
+            r["file_state"] = scan.compute_state(r.get("neglect_seconds"))
         self._render()
 
-    def _folder_size_bytes(self, folder: str) -> int | None:
-        total = 0
-        try:
-            stack = [folder]
-            while stack:
-                cur = stack.pop()
-                try:
-                    with os.scandir(cur) as it:
-                        for entry in it:
-                            try:
-                                if entry.is_dir(follow_symlinks=False):
-                                    stack.append(entry.path)
-                                elif entry.is_file(follow_symlinks=False):
-                                    try:
-                                        total += entry.stat(follow_symlinks=False).st_size
-                                    except OSError:
-                                        pass
-                            except OSError:
-                                pass
-                except OSError:
-                    pass
-            return total
-        except Exception:
-            return None
-
     def _render(self) -> None:
-        self._count_var.set(f"Folders: {len(self._folders)}")
+        self._count_var.set(f"Folders: {len(self._folders)}" + (" (refreshing...)" if self._refreshing else ""))
         self._preview.render(self._rows)
 
-
-def _format_duration(seconds: int) -> str:
-    if seconds <= 0:
-        return "0s"
-    parts = []
-    days, rem = divmod(seconds, 86400)
-    if days:
-        parts.append(f"{days}d")
-    hours, rem = divmod(rem, 3600)
-    if hours:
-        parts.append(f"{hours}h")
-    minutes, rem = divmod(rem, 60)
-    if minutes:
-        parts.append(f"{minutes}m")
-    if not parts:
-        parts.append(f"{rem}s")
-    return " ".join(parts)
@@ -1,24 +1,56 @@
 # tab2.py
 from __future__ import annotations
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 import subprocess
 import time
+from datetime import datetime, timedelta
 
 import storage
+from watcher import ArchiveWatcher
 
 
 class TabTwo(ttk.Frame):
     """
     Tab 2: List all archived reports (newest first) from ~/Documents/FilePulse/Reports.
-    Columns: Title, Saved at, Size, Path
+    Columns: Title, Type, Saved at, Size, Path
     Toolbar: Refresh, Open, Show in Folder
+    Search: title, source folder, date range, size range -- answered by the
+    catalog's indexes.
+
+    Nothing is loaded until the tab is first shown. Rows are then fetched
+    PAGE_SIZE at a time on a worker thread and appended as the user scrolls
+    near the end of the list, so startup never waits on the archive.
+
+    Once shown, the archive folder is watched: new, removed and replaced
+    reports are applied to the loaded rows in place (one UI update per
+    burst) instead of reloading the list.
     """
+    PAGE_SIZE = 200
+    SEARCH_DELAY_MS = 250   # debounce while typing
+    POLL_MS = 50            # how often worker results are picked up
+    PREFETCH_AT = 0.8       # fetch the next page once the view passes 80%
+
     def __init__(self, parent) -> None:
         super().__init__(parent)
+        self._filters: dict = {}
+        self._loaded = 0          # rows fetched for the current search
+        self._total = None        # rows matching self._filters (None = unknown yet)
+        self._search_job = None
+        self._query = 0           # bumped per search; older pages are dropped
+        self._fetching = False
+        self._started = False
+        self._results: queue.Queue = queue.Queue()   # worker/watcher -> UI thread
+        self._cursor = None       # change feed position of the loaded rows
+        self._changes_pending = False
+        self._syncing = False
+        self._ts: dict = {}       # path -> ts of rows in the tree (for ordering)
+        self._watcher = ArchiveWatcher(lambda: self._results.put(("changed",)))
         self._build_ui()
-        self._load_rows()
+        self.bind("<Map>", self._on_first_show)
 
     def _build_ui(self) -> None:
         bar = ttk.Frame(self)
@@ -28,35 +60,260 @@ class TabTwo(ttk.Frame):
         ttk.Button(bar, text="Open", command=self._open_selected).pack(side="left", padx=(8, 0))
         ttk.Button(bar, text="Show in Folder", command=self._reveal_selected).pack(side="left", padx=(8, 0))
 
+        # Search bar
+        search = ttk.Frame(self)
+        search.pack(fill="x", pady=(0, 6), padx=10)
+
+        self._title_q = tk.StringVar()
+        self._folder_q = tk.StringVar()
+        self._from_q = tk.StringVar()
+        self._to_q = tk.StringVar()
+        self._min_mb_q = tk.StringVar()
+        self._max_mb_q = tk.StringVar()
+
+        fields = (
+            ("Title:", self._title_q, 18),
+            ("Folder:", self._folder_q, 18),
+            ("From:", self._from_q, 11),
+            ("To:", self._to_q, 11),
+            ("Min MB:", self._min_mb_q, 6),
+            ("Max MB:", self._max_mb_q, 6),
+        )
+        for i, (label, var, width) in enumerate(fields):
+            ttk.Label(search, text=label).pack(side="left", padx=(0 if i == 0 else 8, 4))
+            entry = ttk.Entry(search, textvariable=var, width=width)
+            entry.pack(side="left")
+            entry.bind("<Return>", lambda _e: self._search_now())
+        # live search on the text fields; dates/sizes apply on Enter or Search
+        self._title_q.trace_add("write", lambda *_: self._schedule_search())
+        self._folder_q.trace_add("write", lambda *_: self._schedule_search())
+
+        ttk.Button(search, text="Search", command=self._search_now).pack(side="left", padx=(8, 0))
+        ttk.Button(search, text="Clear", command=self._clear_search).pack(side="left", padx=(8, 0))
+
         wrap = ttk.Frame(self)
         wrap.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
-        cols = ("title", "when", "size", "path")
+        cols = ("title", "kind", "when", "size", "path")
         self._tree = ttk.Treeview(wrap, columns=cols, show="headings", selectmode="browse")
         self._tree.pack(side="left", fill="both", expand=True)
 
-        sb = ttk.Scrollbar(wrap, orient="vertical", command=self._tree.yview)
-        sb.pack(side="right", fill="y")
-        self._tree.configure(yscrollcommand=sb.set)
+        self._vsb = ttk.Scrollbar(wrap, orient="vertical", command=self._tree.yview)
+        self._vsb.pack(side="right", fill="y")
+        self._tree.configure(yscrollcommand=self._on_yscroll)
 
         self._tree.heading("title", text="Title")
+        self._tree.heading("kind", text="Type")
         self._tree.heading("when", text="Saved at")
         self._tree.heading("size", text="Size")
         self._tree.heading("path", text="Path")
 
         self._tree.column("title", width=240, anchor="w")
+        self._tree.column("kind", width=60, anchor="center")
         self._tree.column("when", width=160, anchor="center")
         self._tree.column("size", width=100, anchor="e")
         self._tree.column("path", width=520, anchor="w")
 
-    def _load_rows(self) -> None:
+        # Status footer
+        foot = ttk.Frame(self)
+        foot.pack(fill="x", padx=10, pady=(0, 8))
+        self._count_var = tk.StringVar(value="")
+        ttk.Label(foot, textvariable=self._count_var).pack(side="left")
+
+    # ---------- search ----------
+    def _schedule_search(self) -> None:
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(self.SEARCH_DELAY_MS, self._search_now)
+
+    def _search_now(self) -> None:
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
         try:
-            items = storage.list_reports()
-        except Exception as e:
-            messagebox.showerror("Error", f"Couldn't load archive:\n{e}")
+            self._filters = self._read_filters()
+        except ValueError as e:
+            messagebox.showerror("Search", str(e))
             return
+        self._load_rows()
+
+    def _clear_search(self) -> None:
+        for var in (self._title_q, self._folder_q, self._from_q, self._to_q,
+                    self._min_mb_q, self._max_mb_q):
+            var.set("")
+        self._search_now()
+
+    def _read_filters(self) -> dict:
+        """Search bar -> storage filters. Dates are YYYY-MM-DD (To is inclusive)."""
+        def day(text: str, label: str) -> datetime | None:
+            text = text.strip()
+            if not text:
+                return None
+            try:
+                return datetime.strptime(text, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"{label} must be a date like 2024-01-31.")
+
+        def mb(text: str, label: str) -> int | None:
+            text = text.strip()
+            if not text:
+                return None
+            try:
+                return int(float(text) * 1024 * 1024)
+            except ValueError:
+                raise ValueError(f"{label} must be a number of MB.")
+
+        since = day(self._from_q.get(), "From")
+        until = day(self._to_q.get(), "To")
+        return {
+            "title": self._title_q.get().strip(),
+            "folder": self._folder_q.get().strip(),
+            "since": int(since.timestamp()) if since else None,
+            "until": int((until + timedelta(days=1)).timestamp()) if until else None,
+            "min_size": mb(self._min_mb_q.get(), "Min MB"),
+            "max_size": mb(self._max_mb_q.get(), "Max MB"),
+        }
+
+    # ---------- rows ----------
+    def _on_first_show(self, _event=None) -> None:
+        if self._started:
+            return
+        self._started = True
+        self._poll_results()
+        self._load_rows()
+        self._watcher.start()
+
+    def _load_rows(self) -> None:
+        """Restart the listing for the current search (first page)."""
+        if not self._started:
+            return  # loads on first show
+        self._query += 1
+        self._fetching = False
+        self._syncing = False
+        self._cursor = None
+        self._loaded = 0
+        self._total = None
+        self._ts.clear()
         self._tree.delete(*self._tree.get_children())
+        self._count_var.set("Loading...")
+        self._fetch_page()
 
+    def _fetch_page(self) -> None:
+        """Fetch the next page on a worker thread (at most one in flight)."""
+        if self._fetching:
+            return
+        self._fetching = True
+        query, offset, filters = self._query, self._loaded, dict(self._filters)
+
+        def work() -> None:
+            try:
+                total = cursor = None
+                if offset == 0:
+                    storage.reconcile()  # cheap no-op unless the folder changed
+                    cursor = storage.change_cursor()  # before reading: nothing slips through
+                    total = storage.count_reports(filters)
+                items = storage.list_reports(offset=offset, limit=self.PAGE_SIZE, filters=filters)
+                self._results.put(("page", query, total, cursor, items, None))
+            except Exception as e:
+                self._results.put(("page", query, None, None, [], e))
+
+        threading.Thread(target=work, name="archive-page", daemon=True).start()
+
+    def _fetch_changes(self) -> None:
+        """Read the catalog change feed since the loaded rows (worker thread)."""
+        if self._cursor is None or self._syncing:
+            self._changes_pending = True  # picked up after the page/sync in flight
+            return
+        self._changes_pending = False
+        self._syncing = True
+        query, cursor, filters = self._query, self._cursor, dict(self._filters)
+
+        def work() -> None:
+            try:
+                changes = storage.changes_since(cursor, filters)
+                changes["total"] = storage.count_reports(filters)
+                self._results.put(("changes", query, changes, None))
+            except Exception as e:
+                self._results.put(("changes", query, None, e))
+
+        threading.Thread(target=work, name="archive-sync", daemon=True).start()
+
+    def _poll_results(self) -> None:
+        """UI thread: apply pages and change batches handed over by workers."""
+        changed = False
+        try:
+            while True:
+                msg = self._results.get_nowait()
+                if msg[0] == "changed":
+                    changed = True  # several notifications -> one sync
+                elif msg[1] != self._query:
+                    continue  # search changed meanwhile
+                elif msg[0] == "page":
+                    self._on_page(*msg[2:])
+                else:
+                    self._on_changes(*msg[2:])
+        except queue.Empty:
+            pass
+        if changed or (self._changes_pending and self._cursor is not None and not self._syncing):
+            self._fetch_changes()
+        self.after(self.POLL_MS, self._poll_results)
+
+    def _on_page(self, total, cursor, items, error) -> None:
+        self._fetching = False
+        if error is not None:
+            self._count_var.set(f"Couldn't load archive: {error}")
+            return
+        if total is not None:
+            self._total = total
+        if cursor is not None:
+            self._cursor = cursor
+        self._append_rows(items)
+
+    def _on_changes(self, changes, error) -> None:
+        self._syncing = False
+        if error is not None:
+            print(f"Archive sync failed: {error}")
+            return
+        if changes["reset"]:
+            self._load_rows()
+            return
+        self._cursor = changes["cursor"]
+
+        for path in changes["removed"]:
+            if self._tree.exists(path):
+                self._tree.delete(path)
+                self._ts.pop(path, None)
+                self._loaded -= 1  # later pages move up by one
+        children = list(self._tree.get_children())
+        for it in sorted(changes["added"], key=lambda it: it["ts"]):
+            path = it["path"]
+            if self._tree.exists(path):
+                self._tree.item(path, values=self._row_values(it))  # replaced in place
+                continue
+            # position in the newest-first list; past the loaded rows it
+            # arrives with a later page instead
+            index = 0
+            while index < len(children) and self._ts.get(children[index], 0) > it["ts"]:
+                index += 1
+            if index == len(children) and self._more_available():
+                continue
+            self._tree.insert("", index, iid=path, values=self._row_values(it))
+            children.insert(index, path)
+            self._ts[path] = it["ts"]
+            self._loaded += 1
+        self._total = changes["total"]
+        self._update_count()
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        """Scrollbar update; near the end of what is loaded, fetch more."""
+        self._vsb.set(first, last)
+        if float(last) >= self.PREFETCH_AT and self._more_available():
+            self._fetch_page()
+
+    def _more_available(self) -> bool:
+        return self._total is not None and self._loaded < self._total
+
+    def _row_values(self, it: dict) -> tuple:
         def human_size(n):
             try:
                 n = int(n)
@@ -68,17 +325,37 @@ class TabTwo(ttk.Frame):
                 f /= 1024.0; i += 1
             return f"{f:.1f} {units[i]}"
 
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(it.get("ts", 0)))
+        size = human_size(it.get("size", 0))
+        kind = (it.get("kind") or "pdf").upper()
+        if it.get("name", "").lower().endswith(".gz") and kind != "HTML":
+            kind += ".GZ"
+        return (it.get("title",""), kind, when, size, it.get("path",""))
+
+    def _append_rows(self, items: list) -> None:
         for it in items:
-            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(it.get("ts", 0)))
-            size = human_size(it.get("size", 0))
-            self._tree.insert("", "end", values=(it.get("title",""), when, size, it.get("path","")))
+            path = it.get("path", "")
+            if self._tree.exists(path):
+                continue  # shifted into this page by a concurrent archive
+            self._tree.insert("", "end", iid=path, values=self._row_values(it))
+            self._ts[path] = it.get("ts", 0)
+
+        self._loaded += len(items)
+        if not items:
+            self._total = self._loaded  # archive shrank under us
+        self._update_count()
+        # a short first page may not fill the view, so no scroll event will come
+        if self._more_available() and float(self._tree.yview()[1]) >= self.PREFETCH_AT:
+            self._fetch_page()
+
+    def _update_count(self) -> None:
+        self._count_var.set(f"Showing {len(self._ts):,} of {self._total:,} reports")
 
     def _selected_path(self) -> str | None:
         sel = self._tree.selection()
         if not sel:
             return None
-        vals = self._tree.item(sel[0], "values")
-        return vals[3] if len(vals) >= 4 else None
+        return self._tree.set(sel[0], "path") or None
 
     def _open_selected(self) -> None:
         path = self._selected_path()
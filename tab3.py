@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry  # pip install tkcalendar
 import config
+import cron
 import scheduler  # new module for scheduling logic
 import storage
 
@@ -15,8 +16,13 @@ class TabThree(ttk.Frame):
       - Amber: G+1..A
       - Red:   A+1..R  (and beyond stays Red)
       - Email: Comma-separated recipient list
-      - Auto Scheduler: Date, Time, Frequency
+      - Auto Scheduler: Date, Time, Frequency (or cron expression), missed-run policy, full report or changes only
     """
+    CATCH_UP_LABELS = {"once": "Run it once when possible", "skip": "Skip it"}
+    MODE_LABELS = {"full": "Full report", "digest": "Changes only"}
+    OVERSIZE_LABELS = {"gzip": "Attach compressed", "summary": "Send summary only"}
+    METRICS_POLL_MS = 2000  # refresh of the scheduler status / metrics lines
+
     def __init__(self, parent) -> None:
         super().__init__(parent)
         self._build_ui()
@@ -105,6 +111,19 @@ class TabThree(ttk.Frame):
         ttk.Button(email_frame, text="Send Now", command=self._on_send_now).pack(side="left", padx=(8, 0))
         current_row += 1
 
+        # Attachment size limit and what to do with bigger reports
+        ttk.Label(wrap, text="Attachment limit (MB)").grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+        limit_frame = ttk.Frame(wrap)
+        limit_frame.grid(row=current_row, column=1, columnspan=2, sticky="w", pady=6)
+        self.attach_max_var = tk.StringVar()
+        ttk.Entry(limit_frame, textvariable=self.attach_max_var, width=10).pack(side="left")
+        ttk.Label(limit_frame, text="If larger").pack(side="left", padx=(12, 4))
+        self.oversize_var = tk.StringVar()
+        ttk.Combobox(limit_frame, textvariable=self.oversize_var, width=20, state="readonly",
+                     values=tuple(self.OVERSIZE_LABELS.values())).pack(side="left")
+        ttk.Button(limit_frame, text="Save", command=self._on_save_attachment_limits).pack(side="left", padx=(8, 0))
+        current_row += 1
+
         # Separator
         ttk.Separator(wrap, orient="horizontal").grid(row=current_row, column=0, columnspan=3, sticky="ew", pady=20, padx=16)
         current_row += 1
@@ -137,29 +156,48 @@ class TabThree(ttk.Frame):
         ttk.Label(time_frame, text="(24-hour format)").pack(side="left", padx=(8, 0))
         current_row += 1
 
-        # Frequency dropdown
+        # Frequency dropdown (editable: a cron expression works too)
         ttk.Label(wrap, text="Frequency").grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+        freq_frame = ttk.Frame(wrap)
+        freq_frame.grid(row=current_row, column=1, columnspan=2, sticky="w", pady=6)
         self.frequency_var = tk.StringVar()
-        frequency_combo = ttk.Combobox(wrap, textvariable=self.frequency_var, width=20, state="readonly")
-        frequency_combo['values'] = (
-            "Hourly",
-            "Daily", 
-            "Every 2 days",
-            "Every 3 days",
-            "Weekly",
-            "Fortnightly",
-            "Monthly",
-            "Every 6 months",
-            "Yearly"
-        )
+        frequency_combo = ttk.Combobox(freq_frame, textvariable=self.frequency_var, width=20,
+                                       values=cron.FREQUENCIES)
         frequency_combo.current(1)  # Default to "Daily"
-        frequency_combo.grid(row=current_row, column=1, sticky="w", pady=6)
+        frequency_combo.pack(side="left")
+        ttk.Label(freq_frame, text="or cron, e.g. 0 8 * * mon-fri", foreground="gray").pack(side="left", padx=(8, 0))
+        current_row += 1
+
+        # Missed runs (app closed / machine asleep)
+        ttk.Label(wrap, text="If a run is missed").grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+        self.catch_up_var = tk.StringVar(value=self.CATCH_UP_LABELS["once"])
+        ttk.Combobox(wrap, textvariable=self.catch_up_var, width=24, state="readonly",
+                     values=tuple(self.CATCH_UP_LABELS.values())).grid(row=current_row, column=1, sticky="w", pady=6)
+        current_row += 1
+
+        # Full report every run, or a digest of changed folders (no changes -> no email)
+        ttk.Label(wrap, text="Email").grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+        mode_frame = ttk.Frame(wrap)
+        mode_frame.grid(row=current_row, column=1, columnspan=2, sticky="w", pady=6)
+        self.mode_var = tk.StringVar(value=self.MODE_LABELS["full"])
+        ttk.Combobox(mode_frame, textvariable=self.mode_var, width=14, state="readonly",
+                     values=tuple(self.MODE_LABELS.values())).pack(side="left")
+        self.digest_attach_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(mode_frame, text="Attach full report", variable=self.digest_attach_var).pack(
+            side="left", padx=(8, 0))
         current_row += 1
 
         # Scheduler status
         self.scheduler_status_var = tk.StringVar(value="Status: Not scheduled")
         ttk.Label(wrap, textvariable=self.scheduler_status_var, foreground="gray").grid(
-            row=current_row, column=0, columnspan=3, sticky="w", pady=(8, 6), padx=16
+            row=current_row, column=0, columnspan=3, sticky="w", pady=(8, 0), padx=16
+        )
+        current_row += 1
+
+        # Last run / delivery metrics (scheduler.get_metrics, polled)
+        self.scheduler_metrics_var = tk.StringVar(value="")
+        ttk.Label(wrap, textvariable=self.scheduler_metrics_var, foreground="gray", justify="left").grid(
+            row=current_row, column=0, columnspan=3, sticky="w", pady=(2, 6), padx=16
         )
         current_row += 1
 
@@ -172,6 +210,40 @@ class TabThree(ttk.Frame):
         ttk.Button(btn_frame, text="Send Test Email", command=self._on_test_email).pack(side="left")
         current_row += 1
 
+        # Separator
+        ttk.Separator(wrap, orient="horizontal").grid(row=current_row, column=0, columnspan=3, sticky="ew", pady=20, padx=16)
+        current_row += 1
+
+        # ========== SECTION 4: Archive Retention ==========
+        ttk.Label(wrap, text="Archive Retention (0 = off)", font=("", 12, "bold")).grid(
+            row=current_row, column=0, columnspan=3, sticky="w", pady=(0, 10), padx=16
+        )
+        current_row += 1
+
+        self.retention_vars = {}
+        for key, label in [
+            ("keep_last", "Keep at most (newest reports)"),
+            ("max_age_days", "Delete reports older than (days)"),
+            ("thin_after_days", "Thin to one per period after (days)"),
+            ("compress_after_days", "Compress reports older than (days)"),
+        ]:
+            ttk.Label(wrap, text=label).grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+            var = tk.StringVar()
+            ttk.Entry(wrap, textvariable=var, width=10).grid(row=current_row, column=1, sticky="w")
+            self.retention_vars[key] = var
+            current_row += 1
+
+        ttk.Label(wrap, text="Thinning period").grid(row=current_row, column=0, sticky="w", pady=6, padx=16)
+        self.thin_every_var = tk.StringVar()
+        ttk.Combobox(wrap, textvariable=self.thin_every_var, values=("day", "week"), width=8,
+                     state="readonly").grid(row=current_row, column=1, sticky="w")
+        current_row += 1
+
+        ttk.Button(wrap, text="Save Retention", command=self._on_save_retention).grid(
+            row=current_row, column=0, sticky="w", pady=(6, 16), padx=16
+        )
+        current_row += 1
+
         # Layout tweaks
         for i in range(3):
             wrap.columnconfigure(i, weight=0)
@@ -188,13 +260,32 @@ class TabThree(ttk.Frame):
         self.green_var.set(str(g))
         self.amber_var.set(str(a))
         self.red_var.set(str(r))
+
+        # Load retention rules
+        rules = config.get_retention()
+        for key, var in self.retention_vars.items():
+            var.set(str(rules[key]))
+        self.thin_every_var.set(rules["thin_every"])
         
         # Load email config
         emails = scheduler.get_email_recipients()
         self.email_var.set(", ".join(emails))
+        limits = config.get_attachment_limits()
+        self.attach_max_var.set(str(limits["max_mb"]))
+        self.oversize_var.set(self.OVERSIZE_LABELS[limits["oversize"]])
         
-        # Update scheduler status
-        self._update_scheduler_status()
+        # Restored schedule (if any)
+        info = scheduler.get_scheduler_info()
+        if info:
+            self.frequency_var.set(info["frequency"])
+            self.hour_var.set(info["start_time"].split(":")[0])
+            self.minute_var.set(info["start_time"].split(":")[1])
+            self.catch_up_var.set(self.CATCH_UP_LABELS.get(info.get("catch_up"), self.catch_up_var.get()))
+            self.mode_var.set(self.MODE_LABELS.get(info.get("mode"), self.mode_var.get()))
+            self.digest_attach_var.set(bool(info.get("digest_attach")))
+
+        # Update scheduler status (and keep it fresh)
+        self._poll_scheduler_status()
 
     def _on_save_thresholds(self) -> None:
         try:
@@ -212,6 +303,27 @@ class TabThree(ttk.Frame):
         config.set_thresholds(g, a, r)
         messagebox.showinfo("Saved", f"Thresholds updated:\nGreen={g}, Amber={a}, Red={r}")
 
+    def _on_save_retention(self) -> None:
+        try:
+            rules = {key: int(var.get()) for key, var in self.retention_vars.items()}
+            config.set_retention(thin_every=self.thin_every_var.get(), **rules)
+        except Exception as e:
+            messagebox.showerror("Invalid retention", str(e))
+            return
+
+        # applied by the background compaction job, never on the UI thread
+        storage.request_compaction()
+        messagebox.showinfo("Saved", "Retention rules updated.\nThe archive will be compacted in the background.")
+
+    def _on_save_attachment_limits(self) -> None:
+        oversize = next((k for k, v in self.OVERSIZE_LABELS.items() if v == self.oversize_var.get()), "gzip")
+        try:
+            config.set_attachment_limits(max_mb=int(self.attach_max_var.get()), oversize=oversize)
+        except Exception as e:
+            messagebox.showerror("Invalid attachment limit", str(e))
+            return
+        messagebox.showinfo("Saved", f"Reports over {self.attach_max_var.get()} MB: {self.oversize_var.get().lower()}.")
+
     def _on_start_scheduler(self) -> None:
         # Save email recipients
         email_text = self.email_var.get().strip()
@@ -238,9 +350,12 @@ class TabThree(ttk.Frame):
         start_date = self.date_picker.get_date()
         start_time = f"{self.hour_var.get()}:{self.minute_var.get()}"
         frequency = self.frequency_var.get()
+        catch_up = next((k for k, v in self.CATCH_UP_LABELS.items() if v == self.catch_up_var.get()), "once")
+        mode = next((k for k, v in self.MODE_LABELS.items() if v == self.mode_var.get()), "full")
         
         try:
-            scheduler.start_scheduler(start_date, start_time, frequency)
+            scheduler.start_scheduler(start_date, start_time, frequency, catch_up=catch_up,
+                                      mode=mode, digest_attach=self.digest_attach_var.get())
             self._update_scheduler_status()
             messagebox.showinfo("Success", f"Scheduler started!\n\nFrequency: {frequency}\nRecipients: {len(emails)}")
         except Exception as e:
@@ -290,12 +405,11 @@ class TabThree(ttk.Frame):
         
         try:
             # Get latest report
-            reports = storage.list_reports()
-            if not reports:
+            latest_report = storage.latest_report()
+            if not latest_report:
                 messagebox.showerror("Error", "No reports available to send.\n\nPlease generate a report first from the Analysis tab.")
                 return
             
-            latest_report = reports[0]  # Already sorted newest-first
             report_path = latest_report.get("path")
             report_title = latest_report.get("title", "Report")
             
@@ -304,7 +418,16 @@ class TabThree(ttk.Frame):
                 return
             
             # Send the report
-            scheduler.send_report_email(emails, report_path, report_title)
+            results = scheduler.send_report_email(emails, report_path, report_title)
+            failed = [r for r in results if not r["ok"]]
+            if failed:
+                sent = [r["to"] for r in results if r["ok"]]
+                messagebox.showwarning(
+                    "Partly sent",
+                    f"Sent to: {', '.join(sent) or 'nobody'}\n\nFailed:\n"
+                    + "\n".join(f"{r['to']}: {r['error']}" for r in failed),
+                )
+                return
             messagebox.showinfo("Success", f"Report sent successfully!\n\nRecipients: {', '.join(emails)}\nReport: {report_title}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to send report:\n{e}")
@@ -315,4 +438,24 @@ class TabThree(ttk.Frame):
             status_text = f"Status: Running | Next run: {info.get('next_run', 'Unknown')} | Frequency: {info.get('frequency', 'Unknown')}"
             self.scheduler_status_var.set(status_text)
         else:
-            self.scheduler_status_var.set("Status: Not scheduled")
\ No newline at end of file
+            self.scheduler_status_var.set("Status: Not scheduled")
+
+        metrics = scheduler.get_metrics()
+        m = metrics["jobs"].get(scheduler.DEFAULT_SCHEDULE)
+        lines = []
+        if m and m["last_run"]:
+            stages = ", ".join(f"{k} {v:.1f}s" for k, v in m["last_stages"].items())
+            outcome = f"failed ({m['last_error']})" if m["last_error"] else "ok"
+            lines.append(f"Last run: {m['last_run']} | {outcome} in {m['last_duration_s']:.1f}s"
+                         + (f" ({stages})" if stages else "")
+                         + f" | started {m['last_drift_s']:.1f}s late")
+        if m:
+            lines.append(f"Runs: {m['runs']} ({m['failures']} failed, {m['skipped']} skipped) | "
+                         f"Emails: {m['sent']} sent, {m['send_failed']} failed, {m['retries']} retries")
+        if metrics["outbox"] or metrics["queued_runs"]:
+            lines.append(f"Waiting: {metrics['queued_runs']} run(s), {metrics['outbox']} email(s) to retry")
+        self.scheduler_metrics_var.set("\n".join(lines))
+
+    def _poll_scheduler_status(self) -> None:
+        self._update_scheduler_status()
+        self.after(self.METRICS_POLL_MS, self._poll_scheduler_status)
@@ -0,0 +1,99 @@
+# watcher.py
+# Watches the archive folder and tells listeners when the catalog changed.
+# Uses watchdog when available (else polls); bursts of file events are
+# coalesced into one notification.
+from __future__ import annotations
+import threading
+import time
+from typing import Callable
+
+import storage
+
+
+def _has_watchdog() -> bool:
+    try:
+        import watchdog  # noqa
+        return True
+    except Exception:
+        return False
+
+
+class ArchiveWatcher:
+    """
+    Calls on_change() (on the watcher thread) after the archive changed --
+    reports saved by this app or the scheduler, retention passes, files
+    copied in or deleted in Explorer, or another FilePulse instance.
+    Listeners read the details with storage.changes_since().
+    """
+    COALESCE_S = 0.3    # wait this long after an event for the rest of the burst
+    POLL_S = 2.0        # fallback check interval without watchdog
+
+    def __init__(self, on_change: Callable[[], None]) -> None:
+        self._on_change = on_change
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._observer = None
+        self._cursor = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        storage.ensure_repo()
+        self._cursor = storage.change_cursor()
+        if _has_watchdog():
+            self._observer = self._start_observer()
+        self._thread = threading.Thread(target=self._loop, name="archive-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _start_observer(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        wake = self._wake
+        meta = str(storage.META_DIR)
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, e):
+                if e.is_directory or str(e.src_path).startswith(meta):
+                    return
+                wake.set()
+
+        obs = Observer()
+        obs.schedule(Handler(), str(storage.APP_DIR), recursive=False)
+        obs.daemon = True
+        obs.start()
+        return obs
+
+    def _loop(self) -> None:
+        timeout = None if self._observer is not None else self.POLL_S
+        while not self._stop.is_set():
+            self._wake.wait(timeout)
+            if self._stop.is_set():
+                break
+            if self._wake.is_set():
+                time.sleep(self.COALESCE_S)  # let the burst finish
+                self._wake.clear()
+            try:
+                storage.reconcile()          # pick up files changed outside the app
+                cursor = storage.change_cursor()
+            except Exception as e:
+                print(f"Archive watcher: {e}")
+                continue
+            if cursor != self._cursor:
+                self._cursor = cursor
+                try:
+                    self._on_change()
+                except Exception as e:
+                    print(f"Archive watcher listener failed: {e}")